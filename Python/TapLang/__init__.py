@@ -16,9 +16,73 @@ Example usage:
             print(step)
 """
 
-from .interpreter import interpret_taplang, parse_taplang, execute_instruction, reset_wait_state
-from .validator import validate_instruction, load_spec
-from .parser import parse_instruction
+from importlib import import_module
+
+# Public name -> submodule defining it. Submodules are imported on first
+# use, so `import TapLang` does not pull in asyncio or multiprocessing.
+_EXPORTS = {
+    'interpret_taplang': 'interpreter',
+    'parse_taplang': 'interpreter',
+    'check_taplang': 'interpreter',
+    'execute_instruction': 'interpreter',
+    'reset_wait_state': 'interpreter',
+    'TapLangStreamParser': 'interpreter',
+    'compile_taplang': 'interpreter',
+    'CompiledProgram': 'interpreter',
+    'set_compile_cache_size': 'interpreter',
+    'compile_cache_info': 'interpreter',
+    'clear_compile_cache': 'interpreter',
+    'register_handler': 'interpreter',
+    'ExecutionContext': 'interpreter',
+    'interpret_events': 'interpreter',
+    'iter_execute': 'interpreter',
+    'emit_events': 'interpreter',
+    'validate_instruction': 'validator',
+    'validate_tokens': 'validator',
+    'load_spec': 'validator',
+    'parse_instruction': 'parser',
+    'Instruction': 'instruction',
+    'Opcode': 'instruction',
+    'EventLog': 'events',
+    'EventKind': 'events',
+    'Side': 'events',
+    'Backend': 'backends',
+    'AsyncBackend': 'backends',
+    'RecorderBackend': 'backends',
+    'BatchWriterBackend': 'backends',
+    'run_taplang_async': 'async_runner',
+    'interpret_many': 'batch',
+    'analyze_taplang': 'analysis',
+    'ProgramStats': 'analysis',
+    'optimize_instructions': 'optimizer',
+    'save_bytecode': 'bytecode',
+    'load_bytecode': 'bytecode',
+    'BytecodeLibrary': 'bytecode',
+    'KeyboardLayout': 'layouts',
+    'get_layout': 'layouts',
+    'register_layout': 'layouts',
+    'parse_taplang_parallel': 'parallel',
+    'canonicalize': 'canonical',
+    'program_hash': 'canonical',
+    'ResourceLimits': 'limits',
+    'ResourceLimitError': 'limits',
+}
+
+_SUBMODULES = frozenset(_EXPORTS.values()) | {'data', 'rng'}
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is not None:
+        value = getattr(import_module(f".{module}", __name__), name)
+    elif name in _SUBMODULES:
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
 
 __version__ = "1.0.0"
 __author__ = "TapLang Project"
@@ -27,9 +91,47 @@ __author__ = "TapLang Project"
 __all__ = [
     'interpret_taplang',
     'parse_taplang', 
+    'check_taplang',
+    'TapLangStreamParser',
+    'compile_taplang',
+    'CompiledProgram',
+    'set_compile_cache_size',
+    'compile_cache_info',
+    'clear_compile_cache',
+    'Instruction',
+    'Opcode',
     'parse_instruction',
     'validate_instruction',
+    'validate_tokens',
     'execute_instruction',
+    'register_handler',
+    'ExecutionContext',
+    'interpret_events',
+    'iter_execute',
+    'emit_events',
+    'EventLog',
+    'EventKind',
+    'Side',
+    'Backend',
+    'AsyncBackend',
+    'RecorderBackend',
+    'BatchWriterBackend',
+    'run_taplang_async',
+    'interpret_many',
+    'analyze_taplang',
+    'ProgramStats',
+    'optimize_instructions',
+    'save_bytecode',
+    'load_bytecode',
+    'BytecodeLibrary',
+    'KeyboardLayout',
+    'get_layout',
+    'register_layout',
+    'parse_taplang_parallel',
+    'canonicalize',
+    'program_hash',
+    'ResourceLimits',
+    'ResourceLimitError',
     'reset_wait_state',
     'load_spec'
 ]
\ No newline at end of file
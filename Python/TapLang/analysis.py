@@ -0,0 +1,121 @@
+"""Static analysis of TapLang programs
+
+Works out how long a program runs and how much input it produces
+without executing it, e.g. to pack sessions onto workers:
+
+    from TapLang import analyze_taplang
+
+    stats = analyze_taplang("SET_WAIT[RANDOM[100,300]] TYPE[`Hi`] WAIT[] CLICK[ENTER]")
+    stats.min_duration, stats.max_duration, stats.expected_duration  # 100, 300, 200.0
+
+Programs have no branches, so the bounds are exact: every run takes
+between min_duration and max_duration milliseconds of waiting.
+"""
+
+import random
+from collections import namedtuple
+from .data import MODIFIER_KEYS
+from .instruction import KEY_NAMES, Opcode
+from .interpreter import CompiledProgram, ExecutionContext, compile_taplang, _apply_set_wait
+
+ProgramStats = namedtuple('ProgramStats', [
+    'min_duration', 'max_duration', 'expected_duration',
+    'key_events', 'min_characters', 'max_characters',
+    'peak_held_keys', 'peak_held_modifiers'
+])
+ProgramStats.__doc__ = """Static bounds of a TapLang program
+
+Durations are milliseconds of WAIT; key_events counts key-down and
+key-up events; characters are typed by TYPE and escape sequences.
+"""
+
+# Key-down/key-up events per instruction
+_KEY_EVENTS = {
+    Opcode.CLICK: 2,
+    Opcode.FUNCTION: 2,
+    Opcode.PRESS: 1,
+    Opcode.PRESS_LEFT: 1,
+    Opcode.PRESS_RIGHT: 1,
+    Opcode.RELEASE: 1,
+}
+
+def _text_lengths(instruction):
+    """Return the (min, max) number of characters a TYPE instruction types"""
+    if instruction.barrier_length is None:
+        options = instruction.operand
+        if options is None:
+            return len(instruction.parameter), len(instruction.parameter)
+        lengths = [len(option) for option in options]
+        return min(lengths), max(lengths)
+    low = high = 0
+    for part in instruction.operand:
+        if part.__class__ is str:
+            low += len(part)
+            high += len(part)
+        else:
+            lengths = [len(option) for option in part]
+            low += min(lengths)
+            high += max(lengths)
+    return low, high
+
+def analyze_taplang(program, context=None):
+    """Return ProgramStats for TapLang source or a CompiledProgram
+
+    WAIT[] is resolved against the SET_WAIT state of context when given
+    (it is not modified), otherwise against a fresh state. Raises
+    ValueError when the source does not compile.
+    """
+    if not isinstance(program, CompiledProgram):
+        program = compile_taplang(program)
+
+    # Wait state and held keys are tracked the way a run tracks them
+    state = ExecutionContext(rng=random)
+    if context is not None:
+        state.default_wait_time = context.default_wait_time
+        state.random_wait_range = context.random_wait_range
+        state.held_keys.update(context.held_keys)
+
+    min_duration = max_duration = 0
+    expected_duration = 0.0
+    key_events = min_characters = max_characters = 0
+    held_keys = state.held_keys
+    peak_held = len(held_keys)
+    peak_modifiers = len(held_keys & MODIFIER_KEYS)
+
+    for instruction in program:
+        opcode = instruction.opcode
+        key_events += _KEY_EVENTS.get(opcode, 0)
+
+        if opcode == Opcode.WAIT:
+            if instruction.parameter:
+                low = high = instruction.operand or 0
+            elif state.random_wait_range:
+                low, high = state.random_wait_range
+            else:
+                low = high = state.default_wait_time or 0
+            min_duration += low
+            max_duration += high
+            expected_duration += (low + high) / 2
+        elif opcode == Opcode.SET_WAIT:
+            _apply_set_wait(instruction, state)
+        elif opcode == Opcode.TYPE:
+            low, high = _text_lengths(instruction)
+            min_characters += low
+            max_characters += high
+        elif opcode == Opcode.RELEASE:
+            held_keys.discard(instruction.parameter)
+        elif opcode in (Opcode.PRESS, Opcode.PRESS_LEFT, Opcode.PRESS_RIGHT):
+            held_keys.add(instruction.parameter)
+            peak_held = max(peak_held, len(held_keys))
+            peak_modifiers = max(peak_modifiers, len(held_keys & MODIFIER_KEYS))
+        elif opcode == Opcode.CHORD:
+            # Optimized PRESS.../CLICK/RELEASE...: modifiers are held around the click
+            presses = instruction.operand[0]
+            key_events += 2 * len(presses) + 2
+            chord_keys = held_keys | {KEY_NAMES[key] for _, key in presses}
+            peak_held = max(peak_held, len(chord_keys))
+            peak_modifiers = max(peak_modifiers, len(chord_keys & MODIFIER_KEYS))
+
+    return ProgramStats(min_duration, max_duration, expected_duration,
+                        key_events, min_characters, max_characters,
+                        peak_held, peak_modifiers)
@@ -0,0 +1,135 @@
+"""asyncio execution engine
+
+Runs TapLang programs on an event loop: WAIT[] and SET_WAIT[RANDOM[...]]
+delays become asyncio.sleep() calls instead of blocking a thread, so many
+sessions can share one loop.
+
+The backend receives the run's events (see events.py), each method
+awaited in turn:
+
+    class Driver(AsyncBackend):
+        async def key_down(self, key, side=Side.ANY):
+            await websocket.send(f"down {KEY_NAMES[key]}")
+        ...
+
+    result = await run_taplang_async("TYPE[`Hi`] WAIT[500] CLICK[ENTER]", Driver())
+"""
+
+import asyncio
+from .events import EventKind
+from .instruction import Opcode
+from .interpreter import (
+    CompiledProgram, ExecutionContext, TEXT_CHUNK_SIZE, compile_taplang, execute_instruction,
+    session_context, wait_duration, _EventBuffer, _event_handlers, _run_context, _type_pieces,
+    _wait_result
+)
+
+async def run_taplang_async(program, backend=None, context=None, time_scale=1.0, seed=None, limits=None,
+                            layout=None):
+    """Run TapLang source or a CompiledProgram, sleeping for every WAIT
+
+    backend is an AsyncBackend (see backends.py): the events of each
+    instruction are awaited on its key_down(), key_up() and text(), and
+    sleep(ms) is awaited before every wait; a layout expands text into
+    key events as in interpret_events(). Returns the same dict as
+    interpret_events(), with the backend under 'events'.
+
+    A backend with only send(instruction, result) is still supported:
+    every instruction except WAIT is executed through
+    execute_instruction() and its result string awaited on send(), and
+    the same dict as interpret_taplang() is returned. With no backend
+    the run only produces those results.
+
+    Each run gets a fresh ExecutionContext unless one is given. seed
+    works as in interpret_taplang(). time_scale multiplies all delays (0
+    runs without sleeping). limits works as in interpret_taplang(); a
+    wait over max_wait_time fails the run before it sleeps.
+    """
+    context = session_context(context, seed) or ExecutionContext()
+    run_context = _run_context(context, limits)
+    if backend is not None and not hasattr(backend, 'send'):
+        result = await _run_events(program, backend, run_context, time_scale, limits, layout)
+    else:
+        result = await _run_results(program, backend, run_context, time_scale, limits)
+    if context.seed is not None:
+        result['seed'] = context.seed
+    return result
+
+async def _run_events(program, backend, context, time_scale, limits, layout):
+    buffer = _EventBuffer()
+    if layout is None:
+        sink = buffer
+    else:
+        from .layouts import TextExpander, get_layout
+        sink = TextExpander(buffer, get_layout(layout))
+    try:
+        if not isinstance(program, CompiledProgram):
+            program = compile_taplang(program, limits=limits)
+        for instruction in program:
+            if instruction.opcode == Opcode.TYPE and len(instruction.parameter) > TEXT_CHUNK_SIZE:
+                # Send large TYPE text piece by piece instead of all at once
+                for piece in _type_pieces(instruction, context):
+                    sink.text(piece)
+                    await _send_events(buffer, backend, time_scale)
+                continue
+            _event_handlers[instruction.opcode](instruction, context, sink)
+            await _send_events(buffer, backend, time_scale)
+        await backend.flush()
+        return {
+            'success': True,
+            'instructions': len(program),
+            'events': backend
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'instructions': 0,
+            'events': backend
+        }
+
+async def _send_events(buffer, backend, time_scale):
+    """Await the buffered events on backend and empty the buffer"""
+    for kind, value, side in buffer:
+        if kind == EventKind.KEY_DOWN:
+            await backend.key_down(value, side)
+        elif kind == EventKind.KEY_UP:
+            await backend.key_up(value, side)
+        elif kind == EventKind.TEXT:
+            await backend.text(value)
+        else:
+            await backend.sleep(value)
+            await asyncio.sleep(value * time_scale / 1000)
+    buffer.clear()
+
+async def _run_results(program, backend, run_context, time_scale, limits):
+    try:
+        if not isinstance(program, CompiledProgram):
+            program = compile_taplang(program, limits=limits)
+        results = []
+
+        for instruction in program:
+            if instruction.opcode == Opcode.WAIT:
+                wait_time = wait_duration(instruction, run_context)
+                result = _wait_result(instruction, run_context, wait_time)
+                await asyncio.sleep(wait_time * time_scale / 1000)
+            else:
+                result = execute_instruction(instruction, run_context)
+                if backend is not None:
+                    await backend.send(instruction, result)
+            results.append(result)
+
+        result = {
+            'success': True,
+            'instructions': len(program),
+            'results': results
+        }
+
+    except Exception as e:
+        result = {
+            'success': False,
+            'error': str(e),
+            'instructions': 0,
+            'results': []
+        }
+    return result
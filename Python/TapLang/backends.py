@@ -0,0 +1,188 @@
+"""Output backends
+
+A backend receives the typed events of a run (see events.py) and turns
+them into real input. Pass one to interpret_events():
+
+    with BatchWriterBackend('/tmp/xdotool.fifo') as backend:
+        interpret_events("PRESS[CTRL] CLICK[C] RELEASE[CTRL]", backend=backend)
+
+Backends:
+    RecorderBackend: keeps the events in memory, for tests
+    BatchWriterBackend: writes xdotool script commands to a file, pipe or
+        device, one write per group of events between sleeps
+
+AsyncBackend is the base of backends for run_taplang_async(), whose
+methods are coroutines.
+"""
+
+import os
+import shlex
+import time
+from .events import EventLog, Side
+from .instruction import KEY_NAMES
+
+class Backend:
+    """Base class for output backends
+
+    Subclasses implement the event sink methods. flush() is called when
+    a run ends and close() when the backend is no longer needed.
+    """
+
+    def key_down(self, key, side=Side.ANY):
+        raise NotImplementedError
+
+    def key_up(self, key, side=Side.ANY):
+        raise NotImplementedError
+
+    def text(self, text):
+        raise NotImplementedError
+
+    def sleep(self, ms):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class AsyncBackend:
+    """Base class for backends of run_taplang_async()
+
+    Like Backend, but every method is a coroutine and is awaited. The
+    runner does the sleeping itself: sleep(ms) is awaited before each
+    wait, so the backend can flush, and must not sleep.
+    """
+
+    async def key_down(self, key, side=Side.ANY):
+        raise NotImplementedError
+
+    async def key_up(self, key, side=Side.ANY):
+        raise NotImplementedError
+
+    async def text(self, text):
+        raise NotImplementedError
+
+    async def sleep(self, ms):
+        pass
+
+    async def flush(self):
+        pass
+
+class RecorderBackend(EventLog, Backend):
+    """Backend that records events in memory"""
+
+    def __init__(self):
+        EventLog.__init__(self)
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+
+# xdotool key names for TapLang keys that differ from the TapLang name
+XDOTOOL_KEYS = {
+    'ENTER': 'Return', 'SPACE': 'space', 'TAB': 'Tab', 'BACKSPACE': 'BackSpace',
+    'DELETE': 'Delete', 'ESC': 'Escape', 'INSERT': 'Insert', 'HOME': 'Home', 'END': 'End',
+    'PAGE_UP': 'Prior', 'PAGE_DOWN': 'Next', 'CAPS_LOCK': 'Caps_Lock', 'NUM_LOCK': 'Num_Lock',
+    'SCROLL_LOCK': 'Scroll_Lock', 'PRINT_SCREEN': 'Print', 'PAUSE': 'Pause',
+    'UP': 'Up', 'DOWN': 'Down', 'LEFT': 'Left', 'RIGHT': 'Right',
+    'SHIFT': 'shift', 'CTRL': 'ctrl', 'ALT': 'alt', 'WIN': 'super', 'CMD': 'super', 'META': 'super',
+    ',': 'comma', '.': 'period', ';': 'semicolon', "'": 'apostrophe', '/': 'slash',
+    '\\': 'backslash', '[': 'bracketleft', ']': 'bracketright', '-': 'minus', '=': 'equal',
+    '`': 'grave', '~': 'asciitilde', '!': 'exclam', '@': 'at', '#': 'numbersign',
+    '$': 'dollar', '%': 'percent', '^': 'asciicircum', '&': 'ampersand', '*': 'asterisk',
+    '(': 'parenleft', ')': 'parenright', '_': 'underscore', '+': 'plus', '{': 'braceleft',
+    '}': 'braceright', '|': 'bar', ':': 'colon', '"': 'quotedbl', '<': 'less',
+    '>': 'greater', '?': 'question',
+}
+
+# Side-specific keysyms for PRESS_LEFT/PRESS_RIGHT
+XDOTOOL_SIDED_KEYS = {
+    'SHIFT': 'Shift', 'CTRL': 'Control', 'ALT': 'Alt', 'WIN': 'Super', 'CMD': 'Super', 'META': 'Super',
+}
+
+def xdotool_key(key, side=Side.ANY):
+    """Return the xdotool key name for a key code"""
+    name = KEY_NAMES[key]
+    if side and name in XDOTOOL_SIDED_KEYS:
+        return XDOTOOL_SIDED_KEYS[name] + ('_L' if side == Side.LEFT else '_R')
+    if len(name) == 1:
+        return XDOTOOL_KEYS.get(name, name.lower())
+    return XDOTOOL_KEYS.get(name, name)
+
+class BatchWriterBackend(Backend):
+    """Backend that writes xdotool script commands in batches
+
+    Commands are buffered and written with a single write() per group of
+    events between sleeps, then the sleep is performed. Buffered text is
+    also written once it reaches max_buffer characters, so large TYPE
+    text goes out piece by piece. Each newline in text is typed as
+    Return, since the script holds one command per line. target is a
+    path (a FIFO read by `xdotool -`, a device or a regular file), a
+    file descriptor or a binary file object.
+
+    Args:
+        target: Where commands are written
+        sleep: Called with seconds for each sleep event; None skips sleeping
+        max_buffer: Characters of text buffered before a write
+    """
+
+    def __init__(self, target, sleep=time.sleep, max_buffer=1 << 16):
+        self._owned_fd = None
+        if isinstance(target, (str, bytes, os.PathLike)):
+            self._owned_fd = os.open(target, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+            target = self._owned_fd
+        if isinstance(target, int):
+            fd = target
+            self._write = lambda data: os.write(fd, data)
+        else:
+            self._write = target.write
+        self._sleep = sleep
+        self._max_buffer = max_buffer
+        self._pending = []
+        self._pending_text = 0
+        self.writes = 0
+
+    def key_down(self, key, side=Side.ANY):
+        self._pending.append(f"keydown {xdotool_key(key, side)}")
+
+    def key_up(self, key, side=Side.ANY):
+        self._pending.append(f"keyup {xdotool_key(key, side)}")
+
+    def text(self, text):
+        for index, line in enumerate(text.split('\n')):
+            if index:
+                self._pending.append(f"key {XDOTOOL_KEYS['ENTER']}")
+            if line:
+                self._pending.append(f"type {shlex.quote(line)}")
+        self._pending_text += len(text)
+        if self._pending_text >= self._max_buffer:
+            self.flush()
+
+    def sleep(self, ms):
+        self.flush()
+        if self._sleep is not None and ms > 0:
+            self._sleep(ms / 1000)
+
+    def flush(self):
+        if self._pending:
+            data = ('\n'.join(self._pending) + '\n').encode('utf-8')
+            self._pending = []
+            self._pending_text = 0
+            # os.write may write less than asked on pipes and devices
+            while data:
+                written = self._write(data)
+                data = data[written:] if written else b''
+            self.writes += 1
+
+    def close(self):
+        self.flush()
+        if self._owned_fd is not None:
+            os.close(self._owned_fd)
+            self._owned_fd = None
@@ -0,0 +1,99 @@
+"""Batch interpretation across a process pool
+
+Example:
+    from TapLang import interpret_many
+
+    for result in interpret_many(scripts, workers=8):
+        if not result['success']:
+            print(result['index'], result['error'])
+"""
+
+import os
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from queue import SimpleQueue
+from .interpreter import ExecutionContext, compile_taplang, interpret_taplang
+
+def _interpret_one(item):
+    """Interpret (index, code, simulate, seed, limits) in a worker; never raises"""
+    index, code, simulate, seed, limits = item
+    if simulate:
+        # Fresh context so SET_WAIT state never leaks between scripts
+        context = ExecutionContext() if seed is None else ExecutionContext(seed=f"{seed}:{index}")
+        result = interpret_taplang(code, context, limits=limits)
+    else:
+        try:
+            program = compile_taplang(code, limits=limits)
+            result = {'success': True, 'instructions': len(program), 'results': []}
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'instructions': 0, 'results': []}
+    result['index'] = index
+    return result
+
+def _interpret_chunk(items):
+    return [_interpret_one(item) for item in items]
+
+# Chunks submitted to the pool ahead of the results being read, per worker
+_CHUNKS_IN_FLIGHT = 4
+
+def interpret_many(scripts, workers=None, chunksize=64, simulate=True, ordered=True, seed=None,
+                   limits=None):
+    """Parse, validate and optionally simulate many scripts in parallel
+
+    Yields one result dict per script, shaped like interpret_taplang()'s
+    plus an 'index' key giving the script's position in scripts. An error
+    in one script only fails that script's result.
+
+    Args:
+        scripts: Iterable of TapLang source strings, consumed lazily
+        workers: Number of worker processes (default: CPU count); 1 runs
+            in the current process
+        chunksize: Scripts sent to a worker at a time
+        simulate: Execute the instructions; False only parses and validates
+        ordered: Yield in input order; False yields results as they finish
+        seed: Base seed; script i runs with seed f"{seed}:{i}", which is
+            recorded in its result['seed'] like every simulated run's seed
+        limits: ResourceLimits (see limits.py) applied to every script; a
+            script over them fails its own result early
+    """
+    items = ((index, code, simulate, seed, limits) for index, code in enumerate(scripts))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    if workers == 1:
+        for item in items:
+            yield _interpret_one(item)
+        return
+
+    # Pool.imap reads its whole input up front. Instead keep a bounded
+    # number of chunks in flight and submit the next one as each finishes,
+    # so workers never wait for the rest of a window
+    chunks = iter(lambda: list(islice(items, chunksize)), [])
+    in_flight = workers * _CHUNKS_IN_FLIGHT
+    with Pool(workers) as pool:
+        if ordered:
+            pending = deque(pool.apply_async(_interpret_chunk, (chunk,))
+                            for chunk in islice(chunks, in_flight))
+            while pending:
+                results = pending.popleft().get()
+                for chunk in islice(chunks, 1):
+                    pending.append(pool.apply_async(_interpret_chunk, (chunk,)))
+                yield from results
+        else:
+            done = SimpleQueue()
+            submitted = 0
+            for chunk in islice(chunks, in_flight):
+                pool.apply_async(_interpret_chunk, (chunk,), callback=done.put, error_callback=done.put)
+                submitted += 1
+            while submitted:
+                results = done.get()
+                submitted -= 1
+                if isinstance(results, BaseException):
+                    raise results
+                for chunk in islice(chunks, 1):
+                    pool.apply_async(_interpret_chunk, (chunk,), callback=done.put, error_callback=done.put)
+                    submitted += 1
+                yield from results
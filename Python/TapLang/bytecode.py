@@ -0,0 +1,337 @@
+"""Compiled bytecode files
+
+A bytecode file holds a library of named compiled programs, so workers
+can load vetted scripts without tokenizing, parsing or validating them:
+
+    save_bytecode({'login': compile_taplang(source)}, 'macros.tlbc')
+
+    with load_bytecode('macros.tlbc') as library:
+        interpret_taplang(library['login'])
+
+load_bytecode() maps the file with mmap, so processes loading the same
+file share its pages, and a program is only decoded on first access.
+
+Layout (little-endian):
+    header          magic, format version, language version and counts
+    key table       string index of each key name; instructions store
+                    indices into this table, not the running KEY_CODES
+    string offsets  start of each pooled string in the string data
+    program table   name, source, first instruction and count
+    instructions    fixed-size records (see _INSTRUCTION)
+    operands        int64 stream: format spans and tagged operands
+    string data     UTF-8 text of the string pool
+
+Files record the SPEC language version and the format version they
+were written with; any other version is rejected on load.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from .data import LANGUAGE_VERSION
+from .instruction import KEY_CODES, KEY_NAMES, Instruction, Opcode
+from .interpreter import CompiledProgram, compile_taplang
+
+MAGIC = b'TLBC'
+FORMAT_VERSION = 2
+
+_HEADER = struct.Struct('<4sH16sIIIIII')
+_U32 = struct.Struct('<I')
+_PROGRAM = struct.Struct('<IIII')
+# opcode, barrier length (0: none), key (0xFFFF: none), parameter,
+# original, text, first span, span count, operand start
+_INSTRUCTION = struct.Struct('<BIHIIIIII')
+_OPCODES = tuple(Opcode)
+
+_NO_KEY = 0xFFFF
+_NO_STRING = 0xFFFFFFFF
+
+# Operand tags
+_NONE, _INT, _RANGE, _OPTIONS, _TEMPLATE, _CHORD = range(6)
+
+# Values an int64 operand can hold
+_INT64 = range(-(1 << 63), 1 << 63)
+
+def _cast(view, code):
+    """View little-endian table data as an array of code items"""
+    if sys.byteorder == 'little':
+        return view.cast(code)
+    values = array(code, view.tobytes())
+    values.byteswap()
+    return values
+
+class _StringPool:
+    def __init__(self):
+        self.indices = {}
+        self.strings = []
+
+    def add(self, text):
+        if text is None:
+            return _NO_STRING
+        index = self.indices.get(text)
+        if index is None:
+            index = self.indices[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+def _int64(value):
+    if value not in _INT64:
+        raise ValueError(f"{value} does not fit in a 64-bit operand")
+    return value
+
+def _encode_operand(instruction, pool, keys, operands):
+    operand = instruction.operand
+    opcode = instruction.opcode
+    if operand is None:
+        operands.append(_NONE)
+    elif opcode == Opcode.CHORD:
+        presses, key = operand
+        operands += [_CHORD, len(presses)]
+        for press, modifier in presses:
+            operands += [press, keys[modifier]]
+        operands.append(keys[key])
+    elif isinstance(operand, int):
+        operands += [_INT, _int64(operand)]
+    elif opcode == Opcode.SET_WAIT:
+        operands += [_RANGE, _int64(operand[0]), _int64(operand[1])]
+    elif opcode == Opcode.TYPE and instruction.barrier_length is None:
+        operands += [_OPTIONS, len(operand)]
+        operands += [pool.add(option) for option in operand]
+    else:
+        # Template: literal strings and tuples of RANDOM options
+        operands += [_TEMPLATE, len(operand)]
+        for part in operand:
+            if part.__class__ is str:
+                operands += [-1, pool.add(part)]
+            else:
+                operands.append(len(part))
+                operands += [pool.add(option) for option in part]
+
+def dump_bytecode(programs):
+    """Serialize programs, a mapping of name to CompiledProgram or source
+
+    Raises ValueError for a wait time that does not fit in 64 bits.
+    """
+    pool = _StringPool()
+    keys = {}   # Running key code -> index into the file's key table
+    program_records = []
+    instruction_records = []
+    operands = []
+
+    def key_index(code):
+        if code is None:
+            return _NO_KEY
+        if code not in keys:
+            keys[code] = len(keys)
+        return keys[code]
+
+    for name, program in programs.items():
+        if not isinstance(program, CompiledProgram):
+            program = compile_taplang(program)
+        program_records.append((pool.add(name), pool.add(program.source),
+                                len(instruction_records), len(program)))
+        for instruction in program:
+            if instruction.opcode == Opcode.CHORD:
+                presses, key = instruction.operand
+                for _, modifier in presses:
+                    key_index(modifier)
+                key_index(key)
+            spans_start = len(operands)
+            for start, end in instruction.format_spans:
+                operands += [start, end]
+            operand_start = len(operands)
+            try:
+                _encode_operand(instruction, pool, keys, operands)
+            except ValueError as e:
+                raise ValueError(f"Cannot store program '{name}': error in '{instruction.original}': {e}")
+            instruction_records.append((
+                instruction.opcode, instruction.barrier_length or 0, key_index(instruction.key),
+                pool.add(instruction.parameter), pool.add(instruction.original),
+                pool.add(instruction.text), spans_start, len(instruction.format_spans), operand_start))
+
+    key_table = [pool.add(KEY_NAMES[code]) for code in keys]
+    encoded = [text.encode('utf-8') for text in pool.strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    version = LANGUAGE_VERSION.encode('ascii')
+    if len(version) > 16:
+        raise ValueError(f"Language version too long for bytecode: {LANGUAGE_VERSION}")
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, version, len(key_table), len(encoded),
+                          len(program_records), len(instruction_records), len(operands), offsets[-1])]
+    parts += [_U32.pack(index) for index in key_table]
+    parts += [_U32.pack(offset) for offset in offsets]
+    parts += [_PROGRAM.pack(*record) for record in program_records]
+    parts += [_INSTRUCTION.pack(*record) for record in instruction_records]
+    parts.append(struct.pack(f'<{len(operands)}q', *operands))
+    parts += encoded
+    return b''.join(parts)
+
+def save_bytecode(programs, path):
+    """Write programs to a bytecode file
+
+    The file is replaced atomically, so processes that have the old file
+    mapped keep reading a consistent copy.
+    """
+    data = dump_bytecode(programs)
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+class BytecodeLibrary(Mapping):
+    """Read-only mapping of program name to CompiledProgram
+
+    Reads a bytecode buffer (bytes or an mmap) and decodes each program
+    the first time it is accessed. Raises ValueError if the buffer was
+    written for another format or language version.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Not a TapLang bytecode file")
+        (magic, format_version, version, key_count, string_count, program_count,
+         instruction_count, operand_count, string_bytes) = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a TapLang bytecode file")
+        version = version.rstrip(b'\0').decode('ascii')
+        if format_version != FORMAT_VERSION or version != LANGUAGE_VERSION:
+            raise ValueError(f"Stale bytecode: written for TapLang {version} (format {format_version}), "
+                             f"this is TapLang {LANGUAGE_VERSION} (format {FORMAT_VERSION})")
+
+        position = _HEADER.size
+        self._key_table_at = position
+        position += 4 * key_count
+        self._offsets_at = position
+        position += 4 * (string_count + 1)
+        self._programs_at = position
+        position += _PROGRAM.size * program_count
+        self._instructions_at = position
+        position += _INSTRUCTION.size * instruction_count
+        self._operands_at = position
+        position += 8 * operand_count
+        self._strings_at = position
+        if position + string_bytes != len(buffer):
+            raise ValueError("Truncated TapLang bytecode file")
+
+        # Typed views over the tables; programs are decoded straight from them
+        view = self._view = memoryview(buffer)
+        self._offsets = _cast(view[self._offsets_at:self._programs_at], 'I')
+        self._ints = _cast(view[self._operands_at:self._strings_at], 'q')
+        self._strings = [None] * string_count
+
+        # File key index -> running key code; unknown names mean a stale file
+        self._keys = []
+        for (index,) in _U32.iter_unpack(view[self._key_table_at:self._offsets_at]):
+            name = self._string(index)
+            if name not in KEY_CODES:
+                self.close()
+                raise ValueError(f"Stale bytecode: unknown key {name}")
+            self._keys.append(KEY_CODES[name])
+
+        self._index = {}
+        for number, record in enumerate(_PROGRAM.iter_unpack(view[self._programs_at:self._instructions_at])):
+            self._index[self._string(record[0])] = number
+        self._programs = {}
+
+    def _string(self, index):
+        if index == _NO_STRING:
+            return None
+        text = self._strings[index]
+        if text is None:
+            at = self._strings_at
+            start = at + self._offsets[index]
+            text = self._strings[index] = str(self._view[start:at + self._offsets[index + 1]], 'utf-8')
+        return text
+
+    def _decode_operand(self, index):
+        ints = self._ints
+        string = self._string
+        tag = ints[index]
+        if tag == _NONE:
+            return None
+        if tag == _INT:
+            return ints[index + 1]
+        if tag == _RANGE:
+            return (ints[index + 1], ints[index + 2])
+        if tag == _OPTIONS:
+            return tuple([string(option) for option in ints[index + 2:index + 2 + ints[index + 1]]])
+        if tag == _CHORD:
+            count = ints[index + 1]
+            keys = self._keys
+            presses = tuple((_OPCODES[ints[index + 2 + 2 * i]], keys[ints[index + 3 + 2 * i]])
+                            for i in range(count))
+            return presses, keys[ints[index + 2 + 2 * count]]
+        parts = []
+        index += 2
+        for _ in range(ints[index - 1]):
+            size = ints[index]
+            if size == -1:
+                parts.append(string(ints[index + 1]))
+                index += 2
+            else:
+                parts.append(tuple([string(option) for option in ints[index + 1:index + 1 + size]]))
+                index += 1 + size
+        return tuple(parts)
+
+    def _decode(self, number):
+        at = self._programs_at + _PROGRAM.size * number
+        name, source, first, count = _PROGRAM.unpack_from(self._view, at)
+        start = self._instructions_at + _INSTRUCTION.size * first
+        records = self._view[start:start + _INSTRUCTION.size * count]
+        ints = self._ints
+        keys = self._keys
+        string = self._string
+        restore = Instruction.restore
+        instructions = []
+        for (opcode, barrier_length, key, parameter, original, text,
+             spans_start, span_count, operand_start) in _INSTRUCTION.iter_unpack(records):
+            spans = tuple(zip(ints[spans_start:spans_start + 2 * span_count:2],
+                              ints[spans_start + 1:spans_start + 2 * span_count:2]))
+            instructions.append(restore(
+                _OPCODES[opcode], string(parameter), None if key == _NO_KEY else keys[key],
+                string(original), string(text), barrier_length or None, spans,
+                self._decode_operand(operand_start)))
+        records.release()
+        return CompiledProgram(string(source), instructions)
+
+    def __getitem__(self, name):
+        program = self._programs.get(name)
+        if program is None:
+            program = self._programs[name] = self._decode(self._index[name])
+        return program
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def close(self):
+        """Release the buffer; programs already decoded stay usable"""
+        for view in (self._offsets, self._ints, self._view):
+            if isinstance(view, memoryview):
+                view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def load_bytecode(path):
+    """Map a bytecode file and return its BytecodeLibrary"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return BytecodeLibrary(buffer)
+    except ValueError:
+        buffer.close()
+        raise
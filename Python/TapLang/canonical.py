@@ -0,0 +1,54 @@
+"""Canonical form and content hash of TapLang source
+
+TapLang commands and key names are case-insensitive and tokens may be
+separated by any number of spaces, so many source texts compile to the
+same program:
+
+    canonicalize("click[a]   Type[`Hi`]")   # 'CLICK[A] TYPE[`Hi`]'
+    program_hash("click[a]   Type[`Hi`]") == program_hash("CLICK[A] TYPE[`Hi`]")
+
+The canonical form joins the tokens of tokenize_code() with single
+spaces and upper-cases every token except the payloads of TYPE and
+escape sequences, which are kept byte for byte. parse_instruction()
+upper-cases the same parameters, except SET_WAIT's, whose value does
+not depend on case. Ordinary scripts tokenize back to the same tokens
+from their canonical form; sources that glue text directly to an
+escape sequence may not, since the tokenizer reorders such pieces.
+
+program_hash() is a SHA-256 over the canonical tokens and their
+lengths of the source, not of its canonical text, so it is stable
+across processes and versions, and equal hashes mean equal token
+sequences. compile_taplang() uses the same
+digest to share cache entries between equivalent sources.
+"""
+
+import hashlib
+from .parser import tokenize_code
+
+# Commands whose parameter is typed text
+_PAYLOAD_COMMANDS = ('TYPE', 'ESCAPE_TYPE_START', 'ESCAPE_TYPE_END')
+
+def canonical_token(token):
+    """Return token upper-cased, except for the payload of TYPE and escape sequences"""
+    bracket = token.find('[')
+    if bracket == -1:
+        return token.upper()
+    command = token[:bracket].upper()
+    if command in _PAYLOAD_COMMANDS:
+        return command + token[bracket:]
+    return token.upper()
+
+def token_digest(tokens):
+    """Return the SHA-256 digest of canonicalized tokens"""
+    tokens = [canonical_token(token) for token in tokens]
+    # Lengths first, so token boundaries are part of the hash
+    lengths = ','.join(map(str, map(len, tokens)))
+    return hashlib.sha256(f"{lengths}\n{''.join(tokens)}".encode('utf-8', 'surrogatepass')).digest()
+
+def canonicalize(code):
+    """Return the canonical source text of code"""
+    return ' '.join([canonical_token(token) for token in tokenize_code(code)])
+
+def program_hash(code):
+    """Return the hex SHA-256 content hash of code's canonical form"""
+    return token_digest(tokenize_code(code)).hex()
@@ -2,74 +2,102 @@
 # Authoritative data source for TapLang interpreter
 # 🤖 Designed primarily for AI agents and automation systems
 # Converted from JSON for better Python performance
+#
+# The key and instruction tables used on the hot path are frozen module
+# constants. The descriptive parts of the spec (instruction descriptions,
+# rules, examples) are only assembled when get_spec() is first called.
 
-SPEC = {
-    "language": {
-        "name": "TapLang",
-        "version": "1.0.0",
-        "description": "Keyboard action language for AI systems",
-        "case_sensitive": False
-    },
-    "instructions": {
-        "CLICK": "Press and release key",
-        "PRESS": "Press and hold key",
-        "RELEASE": "Release held key",
-        "TYPE": "Type text with concept barriers (`text` or ```complex```) and FORMAT support",
-        "WAIT": "Wait milliseconds",
-        "SET_WAIT": "Set wait time or random range",
-        "FUNCTION": "Press function key F1-F12",
-        "PRESS_LEFT": "Press left side modifier",
-        "PRESS_RIGHT": "Press right side modifier",
-        "ESCAPE_TYPE_START": "Begin escape sequence",
-        "ESCAPE_TYPE_END": "End escape sequence",
-        "FORMAT": "Format dynamic content within concept barriers"
-    },
-    "keys": {
-        "letters": ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P", "Q", "R", "S", "T", "U", "V", "W", "X", "Y", "Z"],
-        "numbers": ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"],
-        "symbols": [",", ".", ";", "'", "/", "\\", "[", "]", "-", "=", "`", "~", "!", "@", "#", "$", "%", "^", "&", "*", "(", ")", "_", "+", "{", "}", "|", ":", "\"", "<", ">", "?"],
-        "special": ["ENTER", "SPACE", "TAB", "BACKSPACE", "DELETE", "ESC", "INSERT", "HOME", "END", "PAGE_UP", "PAGE_DOWN", "CAPS_LOCK", "NUM_LOCK", "SCROLL_LOCK", "PRINT_SCREEN", "PAUSE"],
-        "arrows": ["UP", "DOWN", "LEFT", "RIGHT"],
-        "modifiers": ["SHIFT", "CTRL", "ALT", "WIN", "CMD", "META"],
-        "function_keys": ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12"]
-    },
-    "rules": {
-        "press_release": "Every PRESS, PRESS_LEFT, or PRESS_RIGHT must have matching RELEASE",
-        "case_insensitive": "All instructions and keys are case-insensitive",
-        "escape_sequence": "Use ESCAPE_TYPE_START and ESCAPE_TYPE_END for text with keywords",
-        "set_wait": "SET_WAIT[n] sets default wait time, SET_WAIT[RANDOM[min,max]] sets random range",
-        "type_random": "TYPE supports RANDOM[option1,option2,option3] for random text selection",
-        "concept_barrier": "TYPE text must be enclosed in triple backticks ```text```",
-        "barrier_emergency": "Use more than 3 backticks if text contains ``` (e.g., ````text with ``` inside````)",
-        "format_key": "Use FORMAT key for dynamic content: TYPE[```Hello FORMAT[RANDOM[1,2]] World```]",
-        "barrier_validation": "Invalid barrier formats raise syntax errors"
-    },
-    "examples": {
-        "basic": "TYPE[`Hello`] CLICK[SPACE] TYPE[`World`]",
-        "function": "FUNCTION[1] FUNCTION[12]",
-        "modifier": "PRESS_LEFT[SHIFT] CLICK[A] RELEASE[SHIFT]",
-        "symbols": "CLICK[!] CLICK[@] CLICK[#]",
-        "escape": "ESCAPE_TYPE_START[Text with PRESS[SHIFT] and CLICK[A] keywords] ESCAPE_TYPE_END[~]",
-        "press_rule": "PRESS[CTRL] CLICK[C] RELEASE[CTRL]",
-        "set_wait_fixed": "SET_WAIT[500] WAIT[] WAIT[] TYPE[`Done`]",
-        "set_wait_random": "SET_WAIT[RANDOM[100,1000]] WAIT[] WAIT[] TYPE[`Random delays`]",
-        "type_random": "TYPE[`FORMAT[RANDOM[Hello,Hi,Hey]]`] WAIT[500] TYPE[`FORMAT[RANDOM[World,Universe,Earth]]`]",
-        "concept_barrier": "TYPE[`Simple text`] TYPE[`Text with FORMAT[RANDOM[1,2,3]]`]",
-        "barrier_emergency": "TYPE[```Text with ` backticks```]",
-        "format_complex": "TYPE[`Hello FORMAT[RANDOM[Alice,Bob]] your number is FORMAT[RANDOM[1,2,3,4,5]]`]"
-    }
+LANGUAGE = {
+    "name": "TapLang",
+    "version": "1.0.0",
+    "description": "Keyboard action language for AI systems",
+    "case_sensitive": False
 }
 
-# Build valid keys set from spec
-VALID_KEYS = set()
-for category in SPEC["keys"].values():
-    VALID_KEYS.update([key.upper() for key in category])
+LANGUAGE_VERSION = LANGUAGE["version"]
+
+INSTRUCTION_NAMES = (
+    "CLICK", "PRESS", "RELEASE", "TYPE", "WAIT", "SET_WAIT", "FUNCTION",
+    "PRESS_LEFT", "PRESS_RIGHT", "ESCAPE_TYPE_START", "ESCAPE_TYPE_END", "FORMAT"
+)
+
+KEY_CATEGORIES = (
+    ("letters", ("A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P", "Q", "R", "S", "T", "U", "V", "W", "X", "Y", "Z")),
+    ("numbers", ("0", "1", "2", "3", "4", "5", "6", "7", "8", "9")),
+    ("symbols", (",", ".", ";", "'", "/", "\\", "[", "]", "-", "=", "`", "~", "!", "@", "#", "$", "%", "^", "&", "*", "(", ")", "_", "+", "{", "}", "|", ":", "\"", "<", ">", "?")),
+    ("special", ("ENTER", "SPACE", "TAB", "BACKSPACE", "DELETE", "ESC", "INSERT", "HOME", "END", "PAGE_UP", "PAGE_DOWN", "CAPS_LOCK", "NUM_LOCK", "SCROLL_LOCK", "PRINT_SCREEN", "PAUSE")),
+    ("arrows", ("UP", "DOWN", "LEFT", "RIGHT")),
+    ("modifiers", ("SHIFT", "CTRL", "ALT", "WIN", "CMD", "META")),
+    ("function_keys", ("1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12")),
+)
+
+FUNCTION_KEYS = dict(KEY_CATEGORIES)["function_keys"]
+MODIFIER_KEYS = frozenset(dict(KEY_CATEGORIES)["modifiers"])
 
-VALID_INSTRUCTIONS = set(SPEC["instructions"].keys())
+# Frozen lookup tables
+VALID_KEYS = frozenset(key.upper() for _, category in KEY_CATEGORIES for key in category)
+VALID_INSTRUCTIONS = frozenset(INSTRUCTION_NAMES)
+
+_spec = None
+
+def _load_spec():
+    """Assemble the full specification dictionary"""
+    return {
+        "language": dict(LANGUAGE),
+        "instructions": {
+            "CLICK": "Press and release key",
+            "PRESS": "Press and hold key",
+            "RELEASE": "Release held key",
+            "TYPE": "Type text with concept barriers (`text` or ```complex```) and FORMAT support",
+            "WAIT": "Wait milliseconds",
+            "SET_WAIT": "Set wait time or random range",
+            "FUNCTION": "Press function key F1-F12",
+            "PRESS_LEFT": "Press left side modifier",
+            "PRESS_RIGHT": "Press right side modifier",
+            "ESCAPE_TYPE_START": "Begin escape sequence",
+            "ESCAPE_TYPE_END": "End escape sequence",
+            "FORMAT": "Format dynamic content within concept barriers"
+        },
+        "keys": {name: list(category) for name, category in KEY_CATEGORIES},
+        "rules": {
+            "press_release": "Every PRESS, PRESS_LEFT, or PRESS_RIGHT must have matching RELEASE",
+            "case_insensitive": "All instructions and keys are case-insensitive",
+            "escape_sequence": "Use ESCAPE_TYPE_START and ESCAPE_TYPE_END for text with keywords",
+            "set_wait": "SET_WAIT[n] sets default wait time, SET_WAIT[RANDOM[min,max]] sets random range",
+            "type_random": "TYPE supports RANDOM[option1,option2,option3] for random text selection",
+            "concept_barrier": "TYPE text must be enclosed in triple backticks ```text```",
+            "barrier_emergency": "Use more than 3 backticks if text contains ``` (e.g., ````text with ``` inside````)",
+            "format_key": "Use FORMAT key for dynamic content: TYPE[```Hello FORMAT[RANDOM[1,2]] World```]",
+            "barrier_validation": "Invalid barrier formats raise syntax errors"
+        },
+        "examples": {
+            "basic": "TYPE[`Hello`] CLICK[SPACE] TYPE[`World`]",
+            "function": "FUNCTION[1] FUNCTION[12]",
+            "modifier": "PRESS_LEFT[SHIFT] CLICK[A] RELEASE[SHIFT]",
+            "symbols": "CLICK[!] CLICK[@] CLICK[#]",
+            "escape": "ESCAPE_TYPE_START[Text with PRESS[SHIFT] and CLICK[A] keywords] ESCAPE_TYPE_END[~]",
+            "press_rule": "PRESS[CTRL] CLICK[C] RELEASE[CTRL]",
+            "set_wait_fixed": "SET_WAIT[500] WAIT[] WAIT[] TYPE[`Done`]",
+            "set_wait_random": "SET_WAIT[RANDOM[100,1000]] WAIT[] WAIT[] TYPE[`Random delays`]",
+            "type_random": "TYPE[`FORMAT[RANDOM[Hello,Hi,Hey]]`] WAIT[500] TYPE[`FORMAT[RANDOM[World,Universe,Earth]]`]",
+            "concept_barrier": "TYPE[`Simple text`] TYPE[`Text with FORMAT[RANDOM[1,2,3]]`]",
+            "barrier_emergency": "TYPE[```Text with ` backticks```]",
+            "format_complex": "TYPE[`Hello FORMAT[RANDOM[Alice,Bob]] your number is FORMAT[RANDOM[1,2,3,4,5]]`]"
+        }
+    }
 
 def get_spec():
     """Get the specification dictionary"""
-    return SPEC
+    global _spec
+    if _spec is None:
+        _spec = _load_spec()
+    return _spec
+
+def __getattr__(name):
+    # SPEC is built on first access
+    if name == "SPEC":
+        return get_spec()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_valid_keys():
     """Get set of valid keys"""
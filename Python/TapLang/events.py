@@ -0,0 +1,111 @@
+"""Typed execution events
+
+Instead of result strings, execution can emit key-down/key-up events
+with a key code, text chunks and sleeps in milliseconds. EventLog stores
+them in flat arrays and only builds strings when render() is called.
+"""
+
+from array import array
+from collections import namedtuple
+from enum import IntEnum
+from .instruction import KEY_NAMES
+
+_MAX_VALUE = 2 ** 63 - 1  # Largest value the 'q' array holds
+
+class EventKind(IntEnum):
+    """Kinds of execution events"""
+    KEY_DOWN = 0
+    KEY_UP = 1
+    TEXT = 2
+    SLEEP = 3
+
+class Side(IntEnum):
+    """Which modifier of a pair a key event refers to"""
+    ANY = 0
+    LEFT = 1
+    RIGHT = 2
+
+class Event(namedtuple('Event', ['kind', 'value', 'side'])):
+    """One execution event
+
+    value is a key code (index into KEY_NAMES) for key events, the text
+    for TEXT and milliseconds for SLEEP.
+    """
+    __slots__ = ()
+
+    @property
+    def key_name(self):
+        if self.kind in (EventKind.KEY_DOWN, EventKind.KEY_UP):
+            return KEY_NAMES[self.value]
+        return None
+
+    def __str__(self):
+        if self.kind == EventKind.TEXT:
+            return f"Text: '{self.value}'"
+        if self.kind == EventKind.SLEEP:
+            return f"Sleep: {self.value}ms"
+        action = "Key down" if self.kind == EventKind.KEY_DOWN else "Key up"
+        if self.side:
+            return f"{action}: {self.side.name.lower()} {KEY_NAMES[self.value]}"
+        return f"{action}: {KEY_NAMES[self.value]}"
+
+class EventLog:
+    """Compact in-memory sequence of events
+
+    Also serves as an event sink: key_down(), key_up(), text() and
+    sleep() append one event each.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.sides = array('B')
+        self.values = array('q')  # Key code, milliseconds or index into texts
+        self.texts = []
+        self.long_sleeps = {}  # Sleeps too long for values, by event index
+
+    def key_down(self, key, side=Side.ANY):
+        self.kinds.append(EventKind.KEY_DOWN)
+        self.sides.append(side)
+        self.values.append(key)
+
+    def key_up(self, key, side=Side.ANY):
+        self.kinds.append(EventKind.KEY_UP)
+        self.sides.append(side)
+        self.values.append(key)
+
+    def text(self, text):
+        self.kinds.append(EventKind.TEXT)
+        self.sides.append(Side.ANY)
+        self.values.append(len(self.texts))
+        self.texts.append(text)
+
+    def sleep(self, ms):
+        if ms > _MAX_VALUE:
+            self.long_sleeps[len(self.kinds)] = ms
+            ms = -1
+        self.kinds.append(EventKind.SLEEP)
+        self.sides.append(Side.ANY)
+        self.values.append(ms)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        kind = EventKind(self.kinds[index])
+        value = self.values[index]
+        if kind == EventKind.TEXT:
+            value = self.texts[value]
+        elif kind == EventKind.SLEEP and value < 0:
+            value = self.long_sleeps[index % len(self.kinds)]
+        return Event(kind, value, Side(self.sides[index]))
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def render(self):
+        """Return the events as human-readable strings"""
+        return [str(event) for event in self]
+
+    def __repr__(self):
+        return f"EventLog({len(self.kinds)} events)"
@@ -0,0 +1,289 @@
+"""Compact instruction representation
+
+Instructions from parse_taplang are plain dicts. Compiled programs store
+them as Instruction objects instead: an integer opcode, an interned key
+code and the TYPE text with its FORMAT offsets, in a __slots__ class that
+still reads like the original dict (instruction['command'], 'barrier_info'
+in instruction, instruction.get('format_keys', [])).
+"""
+
+import sys
+from collections.abc import Mapping
+from enum import IntEnum
+from types import MappingProxyType
+from .data import KEY_CATEGORIES, FUNCTION_KEYS
+
+class Opcode(IntEnum):
+    """Integer codes for TapLang commands"""
+    CLICK = 0
+    PRESS = 1
+    RELEASE = 2
+    TYPE = 3
+    WAIT = 4
+    SET_WAIT = 5
+    FUNCTION = 6
+    PRESS_LEFT = 7
+    PRESS_RIGHT = 8
+    ESCAPE_TYPE_START = 9
+    ESCAPE_TYPE_END = 10
+    FORMAT = 11
+    CHORD = 12  # Made by the optimizer from PRESS/CLICK/RELEASE; not valid in source
+
+OPCODES = {opcode.name: opcode for opcode in Opcode}
+
+# Commands that take a key operand
+KEY_OPCODES = frozenset([Opcode.CLICK, Opcode.PRESS, Opcode.RELEASE, Opcode.PRESS_LEFT, Opcode.PRESS_RIGHT])
+PRESS_OPCODES = frozenset([Opcode.PRESS, Opcode.PRESS_LEFT, Opcode.PRESS_RIGHT])
+
+def _build_key_names():
+    names = []
+    for _, category in KEY_CATEGORIES:
+        for key in category:
+            key = sys.intern(key.upper())
+            if key not in names:
+                names.append(key)
+    # FUNCTION[n] presses key Fn
+    names.extend(sys.intern(f"F{key}") for key in FUNCTION_KEYS)
+    return tuple(names)
+
+# Every valid key name in spec order, then F1-F12; a key code is an index into this table
+KEY_NAMES = _build_key_names()
+KEY_CODES = {name: code for code, name in enumerate(KEY_NAMES)}
+
+_FORMAT_PREFIX = len('FORMAT[')
+
+def parse_random_options(text):
+    """Return the options of RANDOM[a,b,...] as a tuple, or None if text is not RANDOM"""
+    if text.upper().startswith('RANDOM[') and text.endswith(']'):
+        return tuple(opt.strip() for opt in text[7:-1].split(','))
+    return None
+
+def compile_template(text, format_spans):
+    """Compile TYPE text into literal segments and RANDOM slots
+    
+    Returns a tuple whose items are either literal strings or tuples of
+    RANDOM options; FORMAT keys without RANDOM become literal text.
+    """
+    template = []
+    literal = []
+    position = 0
+    for start, end in format_spans:
+        literal.append(text[position:start])
+        content = text[start + _FORMAT_PREFIX:end - 1]
+        options = parse_random_options(content)
+        if options is None:
+            literal.append(content)
+        else:
+            template.append(''.join(literal))
+            template.append(options)
+            literal = []
+        position = end
+    literal.append(text[position:])
+    template.append(''.join(literal))
+    return tuple(part for part in template if part != '')
+
+def render_template(template, rng):
+    """Render a compiled template, drawing every RANDOM slot independently"""
+    return ''.join([part if part.__class__ is str else rng.choice(part) for part in template])
+
+def iter_template(template, rng, size):
+    """Render a compiled template in pieces of at most size characters
+    
+    RANDOM slots are drawn as they are reached, in the same order as
+    render_template(), so the joined pieces equal its result. Only one
+    piece is built at a time. Yields at least one (possibly empty) piece.
+    """
+    pending = []
+    length = 0
+    emitted = False
+    for part in template:
+        if part.__class__ is not str:
+            part = rng.choice(part)
+        start = 0
+        while len(part) - start >= size - length:
+            end = start + size - length
+            pending.append(part[start:end])
+            yield ''.join(pending)
+            emitted = True
+            pending = []
+            length = 0
+            start = end
+        if start < len(part):
+            pending.append(part[start:] if start else part)
+            length += len(part) - start
+    if pending or not emitted:
+        yield ''.join(pending)
+
+def parse_chord(text):
+    """Parse a CHORD parameter like CTRL+LEFT_SHIFT+A
+
+    Returns ((press opcode, key code), ...) for the held modifiers and
+    the key code of the clicked key.
+    """
+    split = text.rindex('+', 0, len(text) - 1)
+    presses = []
+    for name in text[:split].split('+'):
+        opcode = Opcode.PRESS
+        if name.startswith('LEFT_'):
+            opcode, name = Opcode.PRESS_LEFT, name[5:]
+        elif name.startswith('RIGHT_'):
+            opcode, name = Opcode.PRESS_RIGHT, name[6:]
+        presses.append((opcode, KEY_CODES[name]))
+    return tuple(presses), KEY_CODES[text[split + 1:]]
+
+def parse_operand(instruction):
+    """Parse the arguments an instruction needs at run time
+    
+    - TYPE with concept barriers: template from compile_template()
+    - TYPE from an escape sequence: RANDOM options or None
+    - WAIT: milliseconds as int, or None for WAIT[]
+    - SET_WAIT: milliseconds as int, or a (min, max) tuple for RANDOM
+    - CHORD: modifiers and key from parse_chord()
+    """
+    opcode = instruction.opcode
+    if opcode == Opcode.TYPE:
+        if instruction.barrier_length is None:
+            return parse_random_options(instruction.parameter)
+        return compile_template(instruction.text, instruction.format_spans)
+    if opcode == Opcode.WAIT:
+        try:
+            return int(instruction.parameter)
+        except ValueError:
+            return None
+    if opcode == Opcode.SET_WAIT:
+        param = instruction.parameter
+        if param.upper().startswith('RANDOM['):
+            parts = param[7:-1].split(',')
+            return (int(parts[0].strip()), int(parts[1].strip()))
+        return int(param)
+    if opcode == Opcode.CHORD:
+        return parse_chord(instruction.parameter)
+    return None
+
+def _key_code(opcode, parameter):
+    """Return the key code an instruction operates on, or None"""
+    if opcode in KEY_OPCODES:
+        return KEY_CODES.get(parameter)
+    if opcode == Opcode.FUNCTION:
+        return KEY_CODES.get('F' + parameter)
+    return None
+
+class Instruction(Mapping):
+    """Read-only compiled instruction with a dict-compatible view
+
+    Attributes:
+        opcode: Opcode of the command
+        parameter: Parameter string, interned for everything except TYPE
+        key: Key code (index into KEY_NAMES) for key operands and FUNCTION, else None
+        original: Source token(s) the instruction was parsed from
+        text: Text typed by TYPE, else None
+        barrier_length: Concept barrier length of TYPE, None for escape sequences
+        format_spans: (start, end) offsets of each FORMAT key in text
+        operand: Arguments parsed at compile time (see parse_operand)
+    """
+    __slots__ = ('opcode', 'parameter', 'key', 'original', 'text', 'barrier_length', 'format_spans', 'operand')
+
+    def __init__(self, opcode, parameter, original=None, text=None, barrier_length=None, format_spans=()):
+        if opcode != Opcode.TYPE:
+            parameter = sys.intern(parameter)
+        object.__setattr__(self, 'opcode', opcode)
+        object.__setattr__(self, 'parameter', parameter)
+        object.__setattr__(self, 'key', _key_code(opcode, parameter))
+        object.__setattr__(self, 'original', original)
+        object.__setattr__(self, 'text', text)
+        object.__setattr__(self, 'barrier_length', barrier_length)
+        object.__setattr__(self, 'format_spans', tuple(format_spans))
+        object.__setattr__(self, 'operand', parse_operand(self))
+
+    @classmethod
+    def restore(cls, opcode, parameter, key, original, text, barrier_length, format_spans, operand):
+        """Rebuild an Instruction from its stored fields without parsing"""
+        instruction = object.__new__(cls)
+        if opcode != Opcode.TYPE:
+            parameter = sys.intern(parameter)
+        setattr_ = object.__setattr__
+        setattr_(instruction, 'opcode', opcode)
+        setattr_(instruction, 'parameter', parameter)
+        setattr_(instruction, 'key', key)
+        setattr_(instruction, 'original', original)
+        setattr_(instruction, 'text', text)
+        setattr_(instruction, 'barrier_length', barrier_length)
+        setattr_(instruction, 'format_spans', tuple(format_spans))
+        setattr_(instruction, 'operand', operand)
+        return instruction
+
+    @classmethod
+    def from_dict(cls, instruction):
+        """Build an Instruction from a parse_taplang dict"""
+        opcode = OPCODES[instruction['command']]
+        parameter = instruction['parameter']
+        barrier_info = instruction.get('barrier_info')
+        if barrier_info is not None:
+            return cls(opcode, parameter, instruction.get('original'),
+                       text=barrier_info['content'],
+                       barrier_length=barrier_info['barrier_length'],
+                       format_spans=[(key['start'], key['end']) for key in instruction.get('format_keys', [])])
+        if opcode == Opcode.TYPE:
+            return cls(opcode, parameter, instruction.get('original'), text=parameter)
+        return cls(opcode, parameter, instruction.get('original'))
+
+    def to_dict(self):
+        """Return the instruction as a plain parse_taplang dict"""
+        instruction = {'command': self.opcode.name, 'parameter': self.parameter}
+        if self.original is not None:
+            instruction['original'] = self.original
+        if self.barrier_length is not None:
+            instruction['barrier_info'] = self._barrier_info()
+            instruction['format_keys'] = self._format_keys()
+        return instruction
+
+    @property
+    def command(self):
+        return self.opcode.name
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Instruction is immutable")
+
+    def _barrier_info(self):
+        return {
+            'content': self.text,
+            'barrier_length': self.barrier_length,
+            'has_format': 'FORMAT[' in self.text
+        }
+
+    def _format_keys(self):
+        return [{
+            'full_match': self.text[start:end],
+            'content': self.text[start + _FORMAT_PREFIX:end - 1],
+            'start': start,
+            'end': end
+        } for start, end in self.format_spans]
+
+    def __getitem__(self, name):
+        if name == 'command':
+            return self.opcode.name
+        if name == 'parameter':
+            return self.parameter
+        if name == 'original' and self.original is not None:
+            return self.original
+        if self.barrier_length is not None:
+            if name == 'barrier_info':
+                return MappingProxyType(self._barrier_info())
+            if name == 'format_keys':
+                return [MappingProxyType(key) for key in self._format_keys()]
+        raise KeyError(name)
+
+    def __iter__(self):
+        yield 'command'
+        yield 'parameter'
+        if self.original is not None:
+            yield 'original'
+        if self.barrier_length is not None:
+            yield 'barrier_info'
+            yield 'format_keys'
+
+    def __len__(self):
+        return 2 + (self.original is not None) + 2 * (self.barrier_length is not None)
+
+    def __repr__(self):
+        return f"Instruction({self.opcode.name}[{self.parameter}])"
@@ -1,195 +1,997 @@
+import itertools
 import random
-from .parser import parse_instruction, tokenize_code
+import threading
+from collections import OrderedDict, deque, namedtuple
+from .parser import parse_instruction, tokenize_code, IncrementalTokenizer, LineIndex
 from .validator import validate_instruction
+from .instruction import Instruction, Opcode, OPCODES, iter_template, render_template
+from .rng import new_seed, predraw
+from .events import Event, EventKind, EventLog, Side
+# optimizer, layouts and canonical (with hashlib) are imported where they
+# are first needed, keeping them out of the import of the hot path
+from .limits import ResourceGuard
 
-# Global state for SET_WAIT
-_default_wait_time = None
-_random_wait_range = None
-
-def execute_instruction(instruction):
-    """Execute a single instruction (simulation)"""
-    global _default_wait_time, _random_wait_range
-    
-    cmd = instruction['command']
-    param = instruction['parameter']
-    
-    if cmd == 'CLICK':
-        return f"Clicked key: {param}"
-    elif cmd == 'PRESS':
-        return f"Pressing key: {param}"
-    elif cmd == 'RELEASE':
-        return f"Released key: {param}"
-    elif cmd == 'TYPE':
-        # Handle new concept barrier format
-        if 'barrier_info' in instruction:
-            content = instruction['barrier_info']['content']
-            format_keys = instruction.get('format_keys', [])
-            
-            # Process FORMAT keys
-            final_text = content
-            for format_key in format_keys:
-                format_content = format_key['content']
-                
-                # Handle RANDOM within FORMAT
-                if format_content.upper().startswith('RANDOM[') and format_content.endswith(']'):
-                    options_part = format_content[7:-1]
-                    options = [opt.strip() for opt in options_part.split(',')]
-                    selected = random.choice(options)
-                    final_text = final_text.replace(format_key['full_match'], selected)
-                else:
-                    # Handle other FORMAT types (could be extended)
-                    final_text = final_text.replace(format_key['full_match'], format_content)
-            
-            return f"Typed: '{final_text}'"
-        
-        # Legacy support for old format (backward compatibility)
-        elif param.upper().startswith('RANDOM[') and param.endswith(']'):
-            # Handle RANDOM[option1,option2,option3]
-            options_part = param[7:-1]
-            options = [opt.strip() for opt in options_part.split(',')]
-            selected = random.choice(options)
-            return f"Typed: '{selected}' (random from {len(options)} options)"
+class ExecutionContext:
+    """Execution state of one TapLang session
+    
+    Holds the SET_WAIT state, the random number generator used for
+    RANDOM selections and random waits, and the keys currently held by
+    PRESS. Sessions with separate contexts can run in parallel threads.
+    
+    Without an explicit rng the context seeds its own random.Random and
+    keeps the seed in context.seed, so any run can be replayed.
+    
+    guard is None here; a run with resource limits sees its own
+    ResourceGuard (see limits.py) there, which every wait is counted
+    against.
+    """
+    
+    def __init__(self, rng=None, seed=None):
+        self.seed = None
+        if rng is not None:
+            self.rng = rng
         else:
-            return f"Typed: '{param}'"
-    elif cmd == 'WAIT':
-        if param:  # WAIT[specific_time]
-            return f"Waited: {param}ms"
-        else:  # WAIT[] - use default or random
-            if _random_wait_range:
-                wait_time = random.randint(_random_wait_range[0], _random_wait_range[1])
-                return f"Waited: {wait_time}ms (random)"
-            elif _default_wait_time:
-                return f"Waited: {_default_wait_time}ms (default)"
-            else:
-                return "Waited: 0ms (no default set)"
-    elif cmd == 'SET_WAIT':
-        if param.upper().startswith('RANDOM['):
-            # Parse RANDOM[min,max]
-            range_part = param[7:-1]
-            parts = range_part.split(',')
-            min_val = int(parts[0].strip())
-            max_val = int(parts[1].strip())
-            _random_wait_range = (min_val, max_val)
-            _default_wait_time = None
-            return f"Set random wait range: {min_val}-{max_val}ms"
+            self.reseed(new_seed() if seed is None else seed)
+        self.default_wait_time = None
+        self.random_wait_range = None
+        self.held_keys = set()
+        self.key_sides = {}  # Side of keys held by PRESS_LEFT/PRESS_RIGHT
+        self.guard = None
+    
+    def reseed(self, seed):
+        """Replace the RNG with a new random.Random seeded with seed"""
+        self.seed = seed
+        self.rng = random.Random(seed)
+    
+    def reset(self):
+        """Clear wait state and held keys"""
+        self.default_wait_time = None
+        self.random_wait_range = None
+        self.held_keys.clear()
+        self.key_sides.clear()
+
+class _RunContext:
+    """One run's view of an ExecutionContext
+    
+    Reads and writes the context's wait state and held keys but keeps
+    the run's own RNG and ResourceGuard when given, so runs sharing a
+    context never draw from each other's pre-drawn values or count
+    against each other's limits.
+    """
+    __slots__ = ('_context', 'rng', 'guard')
+    
+    def __init__(self, context, rng=None, guard=None):
+        object.__setattr__(self, '_context', context)
+        # An unset slot falls through to the context in __getattr__
+        if rng is not None:
+            object.__setattr__(self, 'rng', rng)
+        object.__setattr__(self, 'guard', guard)
+    
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+    
+    def __setattr__(self, name, value):
+        if name in _RunContext.__slots__:
+            object.__setattr__(self, name, value)
         else:
-            # Fixed wait time
-            _default_wait_time = int(param)
-            _random_wait_range = None
-            return f"Set default wait time: {param}ms"
-    elif cmd == 'FUNCTION':
-        return f"Pressed F{param}"
-    elif cmd in ['PRESS_LEFT', 'PRESS_RIGHT']:
-        side = cmd.split('_')[1].lower()
-        return f"Pressed {side} {param}"
-    
-    return f"Executed: {cmd}[{param}]"
+            setattr(self._context, name, value)
+
+class _DefaultContext(ExecutionContext):
+    """The context used when none is given
+    
+    Every run reseeds it, and its random.Random is only built when the
+    run first draws from it, so runs without randomness stay cheap.
+    """
+    
+    def reseed(self, seed):
+        self.seed = seed
+        self.__dict__.pop('rng', None)
+    
+    def __getattr__(self, name):
+        if name != 'rng':
+            raise AttributeError(name)
+        self.rng = random.Random(self.seed)
+        return self.rng
+
+_default_context = _DefaultContext()
+
+def _default_run_context():
+    """Reseed the default context for a new run and return it"""
+    _default_context.reseed(new_seed())
+    return _default_context
+
+def _click(instruction, context):
+    return f"Clicked key: {instruction.parameter}"
+
+def _press(instruction, context):
+    context.held_keys.add(instruction.parameter)
+    return f"Pressing key: {instruction.parameter}"
+
+def _release(instruction, context):
+    context.held_keys.discard(instruction.parameter)
+    return f"Released key: {instruction.parameter}"
+
+def _type(instruction, context):
+    if instruction.barrier_length is None:
+        # Legacy support for old format (backward compatibility)
+        options = instruction.operand
+        if options is not None:
+            selected = context.rng.choice(options)
+            return f"Typed: '{selected}' (random from {len(options)} options)"
+        return f"Typed: '{instruction.parameter}'"
+    
+    return f"Typed: '{render_template(instruction.operand, context.rng)}'"
+
+def wait_duration(instruction, context=None):
+    """Return the milliseconds a WAIT instruction waits
+    
+    WAIT[] uses the SET_WAIT state of context, drawing from its RNG
+    after SET_WAIT[RANDOM[min,max]]. Raises ResourceLimitError when the
+    wait takes the run over its max_wait_time.
+    """
+    context = context or _default_context
+    if instruction.parameter:  # WAIT[specific_time]
+        wait_time = instruction.operand or 0
+    # WAIT[] - use default or random
+    elif context.random_wait_range:
+        wait_time = context.rng.randint(context.random_wait_range[0], context.random_wait_range[1])
+    else:
+        wait_time = context.default_wait_time or 0
+    if context.guard is not None:
+        context.guard.check_wait(wait_time)
+    return wait_time
+
+def _wait_result(instruction, context, wait_time):
+    if instruction.parameter:
+        return f"Waited: {instruction.parameter}ms"
+    if context.random_wait_range:
+        return f"Waited: {wait_time}ms (random)"
+    elif context.default_wait_time:
+        return f"Waited: {wait_time}ms (default)"
+    else:
+        return "Waited: 0ms (no default set)"
+
+def _wait(instruction, context):
+    return _wait_result(instruction, context, wait_duration(instruction, context))
+
+def _apply_set_wait(instruction, context):
+    if isinstance(instruction.operand, tuple):
+        context.random_wait_range = instruction.operand
+        context.default_wait_time = None
+    else:
+        # Fixed wait time
+        context.default_wait_time = instruction.operand
+        context.random_wait_range = None
+
+def _set_wait(instruction, context):
+    _apply_set_wait(instruction, context)
+    if context.random_wait_range:
+        min_val, max_val = context.random_wait_range
+        return f"Set random wait range: {min_val}-{max_val}ms"
+    return f"Set default wait time: {instruction.parameter}ms"
+
+def _function(instruction, context):
+    return f"Pressed F{instruction.parameter}"
+
+def _press_side(instruction, context):
+    context.held_keys.add(instruction.parameter)
+    side = instruction.opcode.name.split('_')[1].lower()
+    return f"Pressed {side} {instruction.parameter}"
+
+def _chord(instruction, context):
+    return f"Pressed chord: {instruction.parameter}"
+
+def _executed(instruction, context):
+    return f"Executed: {instruction.opcode.name}[{instruction.parameter}]"
+
+_handlers = {
+    Opcode.CLICK: _click,
+    Opcode.PRESS: _press,
+    Opcode.RELEASE: _release,
+    Opcode.TYPE: _type,
+    Opcode.WAIT: _wait,
+    Opcode.SET_WAIT: _set_wait,
+    Opcode.FUNCTION: _function,
+    Opcode.PRESS_LEFT: _press_side,
+    Opcode.PRESS_RIGHT: _press_side,
+    Opcode.ESCAPE_TYPE_START: _executed,
+    Opcode.ESCAPE_TYPE_END: _executed,
+    Opcode.FORMAT: _executed,
+    Opcode.CHORD: _chord,
+}
+
+def _emit_click(instruction, context, sink):
+    sink.key_down(instruction.key)
+    sink.key_up(instruction.key)
+
+def _emit_press(instruction, context, sink):
+    context.held_keys.add(instruction.parameter)
+    sink.key_down(instruction.key)
+
+def _emit_press_side(instruction, context, sink):
+    side = Side.LEFT if instruction.opcode == Opcode.PRESS_LEFT else Side.RIGHT
+    context.held_keys.add(instruction.parameter)
+    context.key_sides[instruction.parameter] = side
+    sink.key_down(instruction.key, side)
+
+def _emit_release(instruction, context, sink):
+    context.held_keys.discard(instruction.parameter)
+    sink.key_up(instruction.key, context.key_sides.pop(instruction.parameter, Side.ANY))
+
+# TYPE text longer than this is rendered and sent to sinks in pieces of this size
+TEXT_CHUNK_SIZE = 1 << 16
+
+def _type_pieces(instruction, context):
+    """Yield the text of a large TYPE in pieces of TEXT_CHUNK_SIZE characters"""
+    if instruction.barrier_length is None:
+        options = instruction.operand
+        template = (context.rng.choice(options) if options is not None else instruction.parameter,)
+    else:
+        template = instruction.operand
+    return iter_template(template, context.rng, TEXT_CHUNK_SIZE)
+
+def _emit_type(instruction, context, sink):
+    if len(instruction.parameter) > TEXT_CHUNK_SIZE:
+        for piece in _type_pieces(instruction, context):
+            sink.text(piece)
+    elif instruction.barrier_length is None:
+        options = instruction.operand
+        sink.text(context.rng.choice(options) if options is not None else instruction.parameter)
+    else:
+        sink.text(render_template(instruction.operand, context.rng))
+
+def _emit_wait(instruction, context, sink):
+    sink.sleep(wait_duration(instruction, context))
+
+def _emit_set_wait(instruction, context, sink):
+    _apply_set_wait(instruction, context)
+
+_PRESS_SIDES = {Opcode.PRESS: Side.ANY, Opcode.PRESS_LEFT: Side.LEFT, Opcode.PRESS_RIGHT: Side.RIGHT}
+
+def _emit_chord(instruction, context, sink):
+    presses, key = instruction.operand
+    for opcode, modifier in presses:
+        sink.key_down(modifier, _PRESS_SIDES[opcode])
+    sink.key_down(key)
+    sink.key_up(key)
+    for opcode, modifier in reversed(presses):
+        sink.key_up(modifier, _PRESS_SIDES[opcode])
+
+def _emit_nothing(instruction, context, sink):
+    pass
+
+_event_handlers = {
+    Opcode.CLICK: _emit_click,
+    Opcode.PRESS: _emit_press,
+    Opcode.RELEASE: _emit_release,
+    Opcode.TYPE: _emit_type,
+    Opcode.WAIT: _emit_wait,
+    Opcode.SET_WAIT: _emit_set_wait,
+    Opcode.FUNCTION: _emit_click,
+    Opcode.PRESS_LEFT: _emit_press_side,
+    Opcode.PRESS_RIGHT: _emit_press_side,
+    Opcode.ESCAPE_TYPE_START: _emit_nothing,
+    Opcode.ESCAPE_TYPE_END: _emit_nothing,
+    Opcode.FORMAT: _emit_nothing,
+    Opcode.CHORD: _emit_chord,
+}
+
+def register_handler(opcode, handler):
+    """Replace the handler for an opcode and return the previous one
+    
+    A handler takes an Instruction and the ExecutionContext and returns
+    the step result.
+    """
+    opcode = OPCODES[opcode.upper()] if isinstance(opcode, str) else Opcode(opcode)
+    previous = _handlers[opcode]
+    _handlers[opcode] = handler
+    return previous
+
+def execute_instruction(instruction, context=None, backend=None):
+    """Execute a single instruction (simulation)
+    
+    Accepts an Instruction or a parse_taplang dict and dispatches on its
+    opcode through the handler table. State is kept in context, or in a
+    shared default context when none is given.
+    
+    With a backend (see backends.py) the instruction's events are sent to
+    it instead, and nothing is returned.
+    """
+    if backend is not None:
+        emit_events(instruction, backend, context)
+        return None
+    if not isinstance(instruction, Instruction):
+        cmd = instruction['command']
+        if cmd not in OPCODES:
+            return f"Executed: {cmd}[{instruction['parameter']}]"
+        instruction = Instruction.from_dict(instruction)
+    return _handlers[instruction.opcode](instruction, context or _default_context)
+
+def emit_events(instruction, sink, context=None):
+    """Execute a single instruction, emitting typed events into sink
+    
+    sink needs key_down(key, side), key_up(key, side), text(text) and
+    sleep(ms) methods; EventLog records them. Key events carry key
+    codes from KEY_NAMES, so no result strings are built.
+    """
+    if not isinstance(instruction, Instruction):
+        instruction = Instruction.from_dict(instruction)
+    _event_handlers[instruction.opcode](instruction, context or _default_context, sink)
 
 def reset_wait_state():
-    """Reset wait state (useful for testing)"""
-    global _default_wait_time, _random_wait_range
-    _default_wait_time = None
-    _random_wait_range = None
+    """Reset wait state of the default context (useful for testing)"""
+    _default_context.reset()
 
-def parse_taplang(code):
-    """Parse TapLang code and return list of instructions"""
-    instructions = []
-    held_keys = set()  # Track held keys
-    in_escape = False
-    escape_buffer = ""
+class TapLangStreamParser:
+    """Incremental TapLang parser for source that arrives in chunks
+    
+    feed() returns the validated instructions whose tokens are complete,
+    so execution can start before the whole script has been received.
+    Held keys and escape sequences are tracked across chunks.
+    
+    With recover=True errors do not raise: each bad token is skipped and
+    recorded in self.errors, and parsing continues with the next token.
+    Every error is a dict with 'token', 'error', 'start' and 'end' (the
+    token's source span) and 1-based 'line' and 'column'.
+    
+    With limits (a ResourceLimits, see limits.py) the source length is
+    checked as chunks are fed and the other parse-time limits as each
+    instruction is parsed; max_type_characters also covers the TYPE text
+    of the token still being fed. ResourceLimitError is raised even with
+    recover=True.
+    
+    Example:
+        parser = TapLangStreamParser()
+        for chunk in chunks:
+            for instruction in parser.feed(chunk):
+                execute_instruction(instruction)
+        for instruction in parser.close():
+            execute_instruction(instruction)
+    """
+    
+    def __init__(self, recover=False, limits=None):
+        self._tokenizer = IncrementalTokenizer(recover, None if limits is None else limits.max_source_length)
+        self._guard = None if limits is None else ResourceGuard(limits)
+        self.held_keys = set()  # Track held keys
+        self.in_escape = False
+        self.escape_buffer = ""
+        self.recover = recover
+        self.errors = []
+        self._lines = LineIndex() if recover else None
+        self._press_spans = {}     # Held key -> span of its PRESS, with recover=True
+        self._escape_span = None   # Span of the open ESCAPE_TYPE_START, with recover=True
     
-    tokens = tokenize_code(code)
+    def feed(self, chunk):
+        """Add source text and return the instructions completed by it"""
+        if self.recover:
+            self._lines.feed(chunk)
+        instructions = self._parse_tokens(self._tokenizer.feed(chunk))
+        self._check_open_type()
+        return instructions
     
-    for token in tokens:
+    def close(self):
+        """Finish the source, return the remaining instructions and check final state"""
+        instructions = self._parse_tokens(self._tokenizer.close())
+        self.finish()
+        return instructions
+    
+    def _check_open_type(self):
+        """Check the TYPE text of the unfinished token against the limits"""
+        if self._guard is not None:
+            self._guard.check_open_type(self._tokenizer.open_type_length())
+    
+    def _parse_tokens(self, tokens):
+        if self.recover:
+            return self._recover_tokens(tokens)
+        instructions = []
+        for token in tokens:
+            instruction = self.parse_token(token)
+            if instruction:
+                instructions.append(instruction)
+        return instructions
+    
+    def _recover_tokens(self, spanned_tokens):
+        instructions = []
+        for token, start, end in spanned_tokens:
+            in_escape = self.in_escape
+            try:
+                instruction = self._parse_token(token)
+            except ValueError as e:
+                self._add_error(str(e), (token, start, end))
+                continue
+            if self.in_escape and not in_escape:
+                self._escape_span = (token, start, end)
+            if instruction:
+                if self._guard is not None:
+                    self._guard.check_instruction(instruction)
+                if instruction['command'] in ('PRESS', 'PRESS_LEFT', 'PRESS_RIGHT'):
+                    self._press_spans[instruction['parameter']] = (token, start, end)
+                instructions.append(instruction)
+        return instructions
+    
+    def _add_error(self, message, span):
+        token, start, end = span
+        line, column = self._lines.position(start)
+        self.errors.append({
+            'token': token,
+            'error': message,
+            'start': start,
+            'end': end,
+            'line': line,
+            'column': column
+        })
+    
+    def parse_token(self, token):
+        """Parse and validate one token, returning its instruction or None"""
         if not token:
-            continue
-            
+            return None
         try:
-            parsed = parse_instruction(token)
-            if not parsed:
-                continue
-                
-            validate_instruction(parsed)
-            
-            cmd = parsed['command']
-            param = parsed['parameter']
-            
-            # Handle escape sequences
-            if cmd == 'ESCAPE_TYPE_START':
-                in_escape = True
-                escape_buffer = param
-                continue
-            elif cmd == 'ESCAPE_TYPE_END':
-                if not in_escape:
-                    raise ValueError("ESCAPE_TYPE_END without ESCAPE_TYPE_START")
-                instructions.append({
-                    'command': 'TYPE',
-                    'parameter': escape_buffer,
-                    'original': f"ESCAPE_TYPE_START[{escape_buffer}] ESCAPE_TYPE_END[{param}]"
-                })
-                in_escape = False
-                escape_buffer = ""
-                continue
-            
-            if in_escape:
-                raise ValueError("Instructions not allowed inside escape sequence")
-            
-            # Track held keys
-            if cmd in ['PRESS', 'PRESS_LEFT', 'PRESS_RIGHT']:
-                if param in held_keys:
-                    raise ValueError(f"Key {param} is already pressed")
-                held_keys.add(param)
-            elif cmd == 'RELEASE':
-                if param not in held_keys:
-                    raise ValueError(f"Cannot release {param} - not currently pressed")
-                held_keys.remove(param)
+            instruction = self._parse_token(token)
+        except ValueError as e:
+            raise ValueError(f"Error in '{token}': {e}")
+        if instruction and self._guard is not None:
+            self._guard.check_instruction(instruction)
+        return instruction
+    
+    def _parse_token(self, token):
+        parsed = parse_instruction(token)
+        if not parsed:
+            return None
             
-            # Preserve all parsed information
+        validate_instruction(parsed)
+        
+        cmd = parsed['command']
+        param = parsed['parameter']
+        
+        # Handle escape sequences
+        if cmd == 'ESCAPE_TYPE_START':
+            self.in_escape = True
+            self.escape_buffer = param
+            return None
+        elif cmd == 'ESCAPE_TYPE_END':
+            if not self.in_escape:
+                raise ValueError("ESCAPE_TYPE_END without ESCAPE_TYPE_START")
             instruction = {
-                'command': cmd,
-                'parameter': param,
-                'original': token
+                'command': 'TYPE',
+                'parameter': self.escape_buffer,
+                'original': f"ESCAPE_TYPE_START[{self.escape_buffer}] ESCAPE_TYPE_END[{param}]"
             }
-            # Add TYPE-specific information if present
-            if 'barrier_info' in parsed:
-                instruction['barrier_info'] = parsed['barrier_info']
-            if 'format_keys' in parsed:
-                instruction['format_keys'] = parsed['format_keys']
-                
-            instructions.append(instruction)
+            self.in_escape = False
+            self.escape_buffer = ""
+            return instruction
+        
+        if self.in_escape:
+            raise ValueError("Instructions not allowed inside escape sequence")
+        
+        self._track_keys(cmd, param)
+        
+        # Preserve all parsed information
+        instruction = {
+            'command': cmd,
+            'parameter': param,
+            'original': token
+        }
+        # Add TYPE-specific information if present
+        if 'barrier_info' in parsed:
+            instruction['barrier_info'] = parsed['barrier_info']
+        if 'format_keys' in parsed:
+            instruction['format_keys'] = parsed['format_keys']
             
-        except ValueError as e:
-            raise ValueError(f"Error in '{token}': {e}")
+        return instruction
     
-    # Check for unfinished presses
-    if held_keys:
-        raise ValueError(f"Unfinished PRESS operations: {', '.join(held_keys)}")
+    def _track_keys(self, cmd, param):
+        """Track held keys"""
+        if cmd in ['PRESS', 'PRESS_LEFT', 'PRESS_RIGHT']:
+            if param in self.held_keys:
+                raise ValueError(f"Key {param} is already pressed")
+            self.held_keys.add(param)
+        elif cmd == 'RELEASE':
+            if param not in self.held_keys:
+                raise ValueError(f"Cannot release {param} - not currently pressed")
+            self.held_keys.remove(param)
     
-    if in_escape:
-        raise ValueError("Unfinished escape sequence - missing ESCAPE_TYPE_END")
+    def finish(self):
+        """Check that no key is still held and no escape sequence is open"""
+        if self.recover:
+            # One error per held key, at the PRESS that holds it
+            for key in sorted(self.held_keys, key=lambda key: self._press_spans[key][1]):
+                self._add_error(f"Unfinished PRESS operations: {key}", self._press_spans[key])
+            if self.in_escape:
+                self._add_error("Unfinished escape sequence - missing ESCAPE_TYPE_END", self._escape_span)
+            return
+        
+        # Check for unfinished presses
+        if self.held_keys:
+            raise ValueError(f"Unfinished PRESS operations: {', '.join(self.held_keys)}")
+        
+        if self.in_escape:
+            raise ValueError("Unfinished escape sequence - missing ESCAPE_TYPE_END")
+
+def parse_taplang(code, limits=None):
+    """Parse TapLang code and return list of instructions
+    
+    With limits (see limits.py) a script over them raises
+    ResourceLimitError at the first instruction that goes over.
+    """
+    if limits is not None:
+        return _parse_limited(code, limits)
+    return _parse_token_list(tokenize_code(code))
+
+def _parse_token_list(tokens):
+    parser = TapLangStreamParser()
+    instructions = parser._parse_tokens(tokens)
+    parser.finish()
+    return instructions
+
+def _parse_limited(code, limits, tokens=None):
+    """Tokenize and parse code a chunk at a time, so a script over limits fails early
     
+    The tokens are appended to tokens when it is given.
+    """
+    parser = TapLangStreamParser(limits=limits)
+    tokenizer = parser._tokenizer
+    tokenizer._check_length(len(code))
+    instructions = []
+    for chunk in itertools.chain(_chunks(code), (None,)):
+        chunk_tokens = tokenizer.feed(chunk) if chunk is not None else tokenizer.close()
+        if tokens is not None:
+            tokens += chunk_tokens
+        instructions += parser._parse_tokens(chunk_tokens)
+        if chunk is not None:
+            parser._check_open_type()
+    parser.finish()
     return instructions
 
-def interpret_taplang(code):
-    """Main interpreter function"""
+def check_taplang(code):
+    """Parse and validate code, reporting every error instead of the first
+    
+    Tokenizes once and recovers at token boundaries: a bad token is
+    skipped and parsing continues. Returns the errors in the order they
+    were found (empty when the code is valid), each a dict with 'token',
+    'error', 'start', 'end', 'line' and 'column'. The first error is the
+    one parse_taplang() stops at.
+    """
+    parser = TapLangStreamParser(recover=True)
+    parser._lines.feed(code)
+    parser._parse_tokens(tokenize_code(code, spans=True))
+    parser.finish()
+    return parser.errors
+
+class CompiledProgram:
+    """Immutable, validated TapLang program
+    
+    Holds the parsed instructions as compact Instruction objects, so one compiled
+    program can be executed any number of times. FORMAT[RANDOM[...]] and
+    WAIT[] are still evaluated on every run.
+    """
+    __slots__ = ('_source', '_instructions')
+    
+    def __init__(self, source, instructions):
+        object.__setattr__(self, '_source', source)
+        object.__setattr__(self, '_instructions', tuple(
+            i if isinstance(i, Instruction) else Instruction.from_dict(i) for i in instructions))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledProgram is immutable")
+    
+    @property
+    def source(self):
+        return self._source
+    
+    @property
+    def instructions(self):
+        return self._instructions
+    
+    def _with_source(self, source):
+        """Return this program with another source, sharing the instructions"""
+        if source is self._source or source == self._source:
+            return self
+        program = object.__new__(CompiledProgram)
+        object.__setattr__(program, '_source', source)
+        object.__setattr__(program, '_instructions', self._instructions)
+        return program
+    
+    def __len__(self):
+        return len(self._instructions)
+    
+    def __iter__(self):
+        return iter(self._instructions)
+    
+    def __repr__(self):
+        return f"CompiledProgram({len(self._instructions)} instructions)"
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class ProgramCache:
+    """Bounded LRU cache of compiled programs
+    
+    Programs are stored under a canonical key (see canonical.py), so
+    sources that differ only in case and spacing share one entry. Each
+    entry also remembers the last few exact sources that led to it, so
+    repeating a source skips canonicalization as well.
+    """
+    
+    # Exact sources remembered per entry
+    MAX_SOURCES = 16
+    
+    def __init__(self, maxsize=256):
+        self._programs = OrderedDict()  # Canonical key -> (program, sources)
+        self._sources = {}              # Source key -> canonical key
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, code):
+        """Return the cached program for this exact source, or None
+        
+        Only hits are counted; a miss is counted by get_canonical().
+        """
+        with self._lock:
+            canonical = self._sources.get(code)
+            if canonical is None:
+                return None
+            self.hits += 1
+            self._programs.move_to_end(canonical)
+            return self._programs[canonical][0]
+    
+    def get_canonical(self, code, canonical):
+        """Return the cached program for a canonical key, or None
+        
+        On a hit code is remembered as another source of the program.
+        """
+        with self._lock:
+            entry = self._programs.get(canonical)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._programs.move_to_end(canonical)
+            self._add_source(code, canonical, entry[1])
+            return entry[0]
+    
+    def put(self, code, canonical, program):
+        """Store a program, evicting the least recently used ones"""
+        with self._lock:
+            entry = self._programs.get(canonical)
+            if entry is None:
+                entry = self._programs[canonical] = (program, [])
+            self._programs.move_to_end(canonical)
+            self._add_source(code, canonical, entry[1])
+            self._evict()
+    
+    def resize(self, maxsize):
+        """Change the number of cached programs (0 disables caching)"""
+        if maxsize < 0:
+            raise ValueError("Cache size must be positive")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+    
+    def clear(self):
+        """Remove all programs and reset the counters"""
+        with self._lock:
+            self._programs.clear()
+            self._sources.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def info(self):
+        """Return cache statistics"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._programs))
+    
+    def _add_source(self, code, canonical, sources):
+        if code in self._sources:
+            return
+        self._sources[code] = canonical
+        sources.append(code)
+        if len(sources) > self.MAX_SOURCES:
+            del self._sources[sources.pop(0)]
+    
+    def _evict(self):
+        while len(self._programs) > self.maxsize:
+            _, (program, sources) = self._programs.popitem(last=False)
+            for code in sources:
+                del self._sources[code]
+
+_program_cache = ProgramCache()
+
+def compile_taplang(code, use_cache=True, optimize=False, limits=None):
+    """Parse and validate TapLang code into a reusable CompiledProgram
+    
+    Programs are cached by their canonical form (see canonical.py), so
+    compiling the same script again, or one differing only in case and
+    spacing, skips parsing and validation. A program found that way
+    has code as its source but shares the instructions, and their
+    original text, of the source first compiled.
+    optimize=True runs the peephole optimizer (see optimizer.py) over
+    the instructions.
+    
+    With limits the source is checked as parse_taplang() checks it.
+    Programs are cached per limits, so a cached program has passed the
+    limits it is looked up with.
+    """
+    # Optimized and limited programs are cached apart from plain ones
+    if limits is not None:
+        key = (code, optimize, limits)
+    else:
+        key = (code, True) if optimize else code
+    if use_cache:
+        program = _program_cache.get(key)
+        if program is not None:
+            return program._with_source(code)
+    
+    if limits is not None:
+        # Parse first: the whole source is never tokenized when it fails early
+        tokens = []
+        instructions = _parse_limited(code, limits, tokens)
+    else:
+        tokens = tokenize_code(code)
+    if use_cache:
+        from .canonical import token_digest
+        canonical = (token_digest(tokens), optimize, limits)
+        program = _program_cache.get_canonical(key, canonical)
+        if program is not None:
+            return program._with_source(code)
+    
+    if limits is None:
+        instructions = _parse_token_list(tokens)
+    if optimize:
+        from .optimizer import optimize_instructions
+        instructions = optimize_instructions(instructions)
+    program = CompiledProgram(code, instructions)
+    if use_cache:
+        _program_cache.put(key, canonical, program)
+    return program
+
+def set_compile_cache_size(maxsize):
+    """Set how many compiled programs are kept in the cache"""
+    _program_cache.resize(maxsize)
+
+def compile_cache_info():
+    """Return (hits, misses, maxsize, currsize) for the compile cache"""
+    return _program_cache.info()
+
+def clear_compile_cache():
+    """Empty the compile cache and reset its counters"""
+    _program_cache.clear()
+
+def session_context(context=None, seed=None):
+    """Return the context a run should use
+    
+    A seed gives a new context seeded with it, or reseeds context.
+    """
+    if seed is not None:
+        if context is None:
+            return ExecutionContext(seed=seed)
+        context.reseed(seed)
+    return context
+
+def _run_context(context, limits, rng=None):
+    """Return the context one run executes in: a _RunContext when the run
+    has its own limits or RNG, else context itself"""
+    if limits is None and rng is None:
+        return context
+    return _RunContext(context, rng, None if limits is None else ResourceGuard(limits))
+
+def _run(code, context, seed, predraw_random, output, execute, limits=None):
+    """Compile code, run it with execute(program, context) and build the result dict"""
+    context = session_context(context, seed) or _default_run_context()
     try:
-        instructions = parse_taplang(code)
-        results = []
+        if isinstance(code, CompiledProgram):
+            program = code
+        else:
+            program = compile_taplang(code, limits=limits)
         
-        for instruction in instructions:
-            result = execute_instruction(instruction)
-            results.append(result)
+        rng = predraw(program, context) if predraw_random else None
+        value = execute(program, _run_context(context, limits, rng))
         
-        return {
+        result = {
             'success': True,
-            'instructions': len(instructions),
-            'results': results
+            'instructions': len(program),
+            output: value
         }
     
     except Exception as e:
-        return {
+        result = {
             'success': False,
             'error': str(e),
             'instructions': 0,
-            'results': []
-        }
\ No newline at end of file
+            output: execute((), None)
+        }
+    
+    if context.seed is not None:
+        result['seed'] = context.seed
+    return result
+
+def _run_results(program, context):
+    results = []
+    for instruction in program:
+        result = execute_instruction(instruction, context)
+        results.append(result)
+    return results
+
+def _run_events(program, context, sink=None):
+    if sink is None:
+        sink = EventLog()
+    for instruction in program:
+        _event_handlers[instruction.opcode](instruction, context, sink)
+    return sink
+
+def _run_summary(code, context, seed, predraw_random, size, limits):
+    """interpret_taplang() in summary mode: counts and the last size results"""
+    context = session_context(context, seed) or _default_run_context()
+    run_context = context
+    counts = [0] * (max(Opcode) + 1)
+    last = deque(maxlen=size)
+    result = {'success': True}
+    try:
+        rng = None
+        if predraw_random:
+            if not isinstance(code, CompiledProgram):
+                code = compile_taplang(code, limits=limits)
+            rng = predraw(code, run_context)
+        run_context = _run_context(run_context, limits, rng)
+        for instruction in _stream_instructions(code, limits):
+            last.append(_handlers[instruction.opcode](instruction, run_context))
+            counts[instruction.opcode] += 1
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    
+    result['instructions'] = sum(counts)
+    result['counts'] = {opcode.name: counts[opcode] for opcode in Opcode if counts[opcode]}
+    result['results'] = list(last)
+    if context.seed is not None:
+        result['seed'] = context.seed
+    return result
+
+def interpret_taplang(code, context=None, seed=None, predraw_random=False, summary=None, limits=None):
+    """Main interpreter function
+    
+    Accepts TapLang source or a CompiledProgram from compile_taplang().
+    Pass an ExecutionContext to keep the run's state out of the shared
+    default context, or a seed to run in a new context seeded with it.
+    The default context is reseeded with a fresh seed for every run.
+    When the context has a seed it is returned in result['seed'];
+    interpreting again with that seed replays the run exactly.
+    
+    With predraw_random all random choices and waits of the program are
+    drawn in one batch before execution; the output is the same.
+    
+    With summary=N only the last N results are kept in result['results'],
+    and result['counts'] counts the executed instructions per command.
+    Source is then parsed while it runs rather than compiled (and
+    cached) first, so memory stays flat however long the script is. An
+    invalid instruction ends the run after the ones before it were
+    executed; result['instructions'] counts those.
+    
+    With limits (a ResourceLimits, see limits.py) source is checked
+    while it is parsed and waits while they run; a script over a limit
+    fails with the ResourceLimitError message as its error. A
+    CompiledProgram is only checked against max_wait_time.
+    """
+    if summary is not None:
+        return _run_summary(code, context, seed, predraw_random, summary, limits)
+    return _run(code, context, seed, predraw_random, 'results', _run_results, limits)
+
+def interpret_events(code, context=None, seed=None, predraw_random=False, backend=None, layout=None,
+                     limits=None):
+    """Interpret TapLang and return typed events instead of result strings
+    
+    Works like interpret_taplang(), but the result holds an EventLog under
+    'events' in place of 'results'. Use result['events'].render() to get
+    readable strings. With a backend the events are sent to it instead,
+    it is flushed at the end of the run and returned under 'events'.
+    
+    With a layout (a name such as 'us' or a KeyboardLayout, see
+    layouts.py) typed text is expanded into the key events that type it.
+    
+    TYPE text longer than TEXT_CHUNK_SIZE is rendered and emitted as
+    several consecutive text events of at most that size, so a large
+    paste is never copied whole on its way to the backend.
+    
+    limits works as in interpret_taplang(); a wait over max_wait_time
+    fails the run before the backend sleeps.
+    """
+    if layout is not None:
+        from .layouts import TextExpander, get_layout
+        layout = get_layout(layout)
+    
+    def run_events(program, context):
+        sink = EventLog() if backend is None else backend
+        _run_events(program, context, sink if layout is None else TextExpander(sink, layout))
+        if backend is not None:
+            backend.flush()
+        return sink
+    return _run(code, context, seed, predraw_random, 'events', run_events, limits)
+
+# Source is fed to the stream parser in chunks of this many characters
+_STREAM_CHUNK = 1 << 16
+
+def _chunks(code):
+    return (code[start:start + _STREAM_CHUNK] for start in range(0, len(code), _STREAM_CHUNK))
+
+def _stream_instructions(program, limits=None):
+    """Yield the Instructions of a program, parsing source as they are consumed"""
+    if isinstance(program, CompiledProgram):
+        yield from program
+        return
+    # Tokens are parsed one at a time, so each instruction runs before
+    # the next one is checked
+    parser = TapLangStreamParser(limits=limits)
+    tokenizer = parser._tokenizer
+    if isinstance(program, str):
+        tokenizer._check_length(len(program))
+        chunks = _chunks(program)
+    else:
+        chunks = program
+    parse_token = parser.parse_token
+    from_dict = Instruction.from_dict
+    for chunk in itertools.chain(chunks, (None,)):
+        for token in tokenizer.feed(chunk) if chunk is not None else tokenizer.close():
+            instruction = parse_token(token)
+            if instruction:
+                yield from_dict(instruction)
+        if chunk is not None:
+            parser._check_open_type()
+    parser.finish()
+
+class _EventBuffer(list):
+    """Event sink holding the events of one instruction for iter_execute()"""
+    
+    def key_down(self, key, side=Side.ANY):
+        self.append(Event(EventKind.KEY_DOWN, key, Side(side)))
+    
+    def key_up(self, key, side=Side.ANY):
+        self.append(Event(EventKind.KEY_UP, key, Side(side)))
+    
+    def text(self, text):
+        self.append(Event(EventKind.TEXT, text, Side.ANY))
+    
+    def sleep(self, ms):
+        self.append(Event(EventKind.SLEEP, ms, Side.ANY))
+
+def iter_execute(program, context=None, seed=None, events=False, layout=None, limits=None):
+    """Execute a program lazily, yielding each step as it is produced
+    
+    program is a CompiledProgram, source text or an iterable of source
+    chunks such as an open file. Source is parsed while it runs instead
+    of being compiled first, so memory stays flat however long the
+    script is. An invalid instruction raises ValueError from the
+    generator after the steps before it have been yielded.
+    
+    Yields the result string of each instruction, or with events=True
+    each Event (see events.py); a layout expands typed text into key
+    events as in interpret_events(). TYPE text longer than
+    TEXT_CHUNK_SIZE arrives as several TEXT events.
+    
+    With limits (see limits.py) the generator raises ResourceLimitError
+    at the first instruction or wait over them.
+    
+    No seed is reported from here: pass a seed, or a context whose seed
+    is set, to be able to replay the steps.
+    """
+    context = _run_context(session_context(context, seed) or _default_context, limits)
+    if not events:
+        for instruction in _stream_instructions(program, limits):
+            yield _handlers[instruction.opcode](instruction, context)
+        return
+    
+    buffer = _EventBuffer()
+    if layout is None:
+        sink = buffer
+    else:
+        from .layouts import TextExpander, get_layout
+        sink = TextExpander(buffer, get_layout(layout))
+    for instruction in _stream_instructions(program, limits):
+        if instruction.opcode == Opcode.TYPE and len(instruction.parameter) > TEXT_CHUNK_SIZE:
+            # Yield large TYPE text piece by piece instead of all at once
+            for piece in _type_pieces(instruction, context):
+                sink.text(piece)
+                yield from buffer
+                buffer.clear()
+            continue
+        _event_handlers[instruction.opcode](instruction, context, sink)
+        yield from buffer
+        buffer.clear()
@@ -0,0 +1,169 @@
+"""Keyboard layouts for TYPE expansion
+
+A layout turns typed text into the key events that produce it on a real
+keyboard, holding SHIFT around runs of shifted characters:
+
+    layout = get_layout('us')
+    layout.expand("Hi!").render()
+    # ['Key down: SHIFT', 'Key down: H', 'Key up: H', 'Key up: SHIFT',
+    #  'Key down: I', 'Key up: I', 'Key down: SHIFT', 'Key down: 1', ...]
+
+Each layout is compiled once into str.translate tables. Expansion then
+maps a whole string at a time: one translate gives the key codes, one
+gives the SHIFT state, and each SHIFT run is written into an EventLog
+with array slice assignments instead of a Python branch per character.
+
+Layouts are built on first use and cached; add others with
+register_layout().
+"""
+
+import re
+import sys
+from array import array
+from .events import EventKind, EventLog, Side
+from .instruction import KEY_CODES
+
+_SHIFT_RUNS = re.compile('0+|1+')
+_UTF32 = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+class KeyboardLayout:
+    """Compiled character-to-keystroke table of one keyboard layout
+
+    Args:
+        name: Layout name
+        keys: Mapping of character to (key name, shifted); key names are
+            TapLang key names such as 'A', '1' or 'ENTER'
+    """
+
+    def __init__(self, name, keys):
+        self.name = name
+        self._codes = {}
+        self._shifts = {}
+        for char, (key, shifted) in keys.items():
+            if key not in KEY_CODES:
+                raise ValueError(f"Unknown key {key} in layout {name}")
+            self._codes[ord(char)] = chr(KEY_CODES[key])
+            self._shifts[ord(char)] = '1' if shifted else '0'
+        self._known = dict.fromkeys(self._codes)  # Deletes every character of the layout
+        self._shift_key = KEY_CODES['SHIFT']
+
+    def __contains__(self, char):
+        return ord(char) in self._codes
+
+    def _check(self, text):
+        # Only characters missing from the layout survive deleting the known ones
+        unknown = text.translate(self._known)
+        if unknown:
+            raise ValueError(f"Cannot type {unknown[0]!r} with keyboard layout {self.name}")
+
+    def expand_into(self, text, sink):
+        """Send the key events that type text to sink
+
+        EventLog sinks are filled in bulk; any other sink gets one
+        key_down()/key_up() call per event.
+        """
+        self._check(text)
+        shifts = text.translate(self._shifts)
+        codes = _widen(text.translate(self._codes))
+        bulk = isinstance(sink, EventLog)
+        shift_key = self._shift_key
+        for run in _SHIFT_RUNS.finditer(shifts):
+            start, end = run.span()
+            shifted = shifts[start] == '1'
+            if shifted:
+                sink.key_down(shift_key)
+            if bulk:
+                _append_clicks(sink, codes[start:end])
+            else:
+                for code in codes[start:end]:
+                    sink.key_down(code)
+                    sink.key_up(code)
+            if shifted:
+                sink.key_up(shift_key)
+
+    def expand(self, text):
+        """Return an EventLog with the key events that type text"""
+        log = EventLog()
+        self.expand_into(text, log)
+        return log
+
+    def __repr__(self):
+        return f"KeyboardLayout({self.name!r}, {len(self._codes)} characters)"
+
+def _widen(keys):
+    """Return the code points of keys as an int64 array"""
+    # UTF-32 in native byte order is one machine int per character
+    return array('q', array('I', keys.encode(_UTF32)))
+
+def _append_clicks(log, codes):
+    """Append a key-down/key-up pair per key code to an EventLog"""
+    count = len(codes)
+    log.kinds.frombytes(bytes((EventKind.KEY_DOWN, EventKind.KEY_UP)) * count)
+    log.sides.frombytes(bytes(2 * count))
+    values = array('q', bytes(16 * count))
+    values[0::2] = codes
+    values[1::2] = codes
+    log.values.extend(values)
+
+# Shifted symbols of the US layout and the key under each
+_US_SHIFTED_SYMBOLS = {
+    '~': '`', '!': '1', '@': '2', '#': '3', '$': '4', '%': '5', '^': '6', '&': '7',
+    '*': '8', '(': '9', ')': '0', '_': '-', '+': '=', '{': '[', '}': ']', '|': '\\',
+    ':': ';', '"': "'", '<': ',', '>': '.', '?': '/',
+}
+
+def _us_layout():
+    keys = {}
+    for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+        keys[letter.lower()] = (letter, False)
+        keys[letter] = (letter, True)
+    for char in "0123456789,.;'/\\[]-=`":
+        keys[char] = (char, False)
+    for char, key in _US_SHIFTED_SYMBOLS.items():
+        keys[char] = (key, True)
+    keys[' '] = ('SPACE', False)
+    keys['\n'] = ('ENTER', False)
+    keys['\t'] = ('TAB', False)
+    return KeyboardLayout('us', keys)
+
+_layout_builders = {'us': _us_layout}
+_layouts = {}
+
+def register_layout(name, layout):
+    """Register a KeyboardLayout, or a function building one on first use"""
+    _layout_builders[name] = layout if callable(layout) else (lambda: layout)
+    _layouts.pop(name, None)
+
+def get_layout(layout='us'):
+    """Return the compiled layout with this name (a KeyboardLayout is returned as is)"""
+    if isinstance(layout, KeyboardLayout):
+        return layout
+    compiled = _layouts.get(layout)
+    if compiled is None:
+        if layout not in _layout_builders:
+            raise ValueError(f"Unknown keyboard layout: {layout}")
+        compiled = _layouts[layout] = _layout_builders[layout]()
+    return compiled
+
+class TextExpander:
+    """Event sink wrapper that types text through a keyboard layout
+
+    Key and sleep events pass through to sink; text events become the
+    key events that type the text.
+    """
+
+    def __init__(self, sink, layout='us'):
+        self.sink = sink
+        self.layout = get_layout(layout)
+
+    def key_down(self, key, side=Side.ANY):
+        self.sink.key_down(key, side)
+
+    def key_up(self, key, side=Side.ANY):
+        self.sink.key_up(key, side)
+
+    def text(self, text):
+        self.layout.expand_into(text, self.sink)
+
+    def sleep(self, ms):
+        self.sink.sleep(ms)
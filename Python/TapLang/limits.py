@@ -0,0 +1,133 @@
+"""Resource limits for untrusted TapLang
+
+Scripts from untrusted sources can hold a huge TYPE body, millions of
+instructions or WAIT[999999999]. ResourceLimits caps what one script
+may use, and the checks run while the script is tokenized, parsed and
+executed, so an oversized script fails at the first instruction over a
+limit instead of after everything has been built:
+
+    limits = ResourceLimits(max_source_length=1 << 20, max_instructions=10000,
+                            max_wait_time=60000)
+    result = interpret_taplang(untrusted, limits=limits)
+    # {'success': False, 'error': 'More than 10000 instructions', ...}
+
+Every limit left as None is not checked. Exceeding one raises
+ResourceLimitError, a ValueError naming the limit in its limit
+attribute.
+"""
+
+import re
+from collections import namedtuple
+
+ResourceLimits = namedtuple('ResourceLimits', [
+    'max_source_length', 'max_instructions', 'max_type_characters',
+    'max_format_depth', 'max_random_options', 'max_wait_time'
+], defaults=(None,) * 6)
+ResourceLimits.__doc__ = """Limits on what one TapLang script may use
+
+max_source_length: characters of source
+max_instructions: parsed instructions
+max_type_characters: text of all TYPE instructions and escape
+    sequences, counted on the source text between the barriers
+max_format_depth: bracket nesting of one FORMAT key; FORMAT[X] is 1
+    and FORMAT[RANDOM[a,b]] is 2
+max_random_options: options of one RANDOM
+max_wait_time: total milliseconds of WAIT; explicit WAIT[ms] are
+    summed while parsing, every wait including WAIT[] while running
+"""
+
+_MESSAGES = {
+    'max_source_length': "Source is longer than {} characters",
+    'max_instructions': "More than {} instructions",
+    'max_type_characters': "More than {} characters of TYPE text",
+    'max_format_depth': "FORMAT nested deeper than {} levels",
+    'max_random_options': "RANDOM with more than {} options",
+    'max_wait_time': "Total wait time exceeds {}ms",
+}
+
+_BRACKETS = re.compile(r'[\[\]]')
+
+class ResourceLimitError(ValueError):
+    """A script went over one of its ResourceLimits"""
+
+    def __init__(self, limit, maximum):
+        super().__init__(_MESSAGES[limit].format(maximum))
+        self.limit = limit
+        self.maximum = maximum
+
+def _nesting(text):
+    """Return the deepest bracket nesting in text"""
+    depth = deepest = 0
+    for bracket in _BRACKETS.finditer(text):
+        if bracket.group() == '[':
+            depth += 1
+            deepest = max(deepest, depth)
+        else:
+            depth -= 1
+    return deepest
+
+def _random_options(text):
+    """Return the number of options of RANDOM[a,b,...], or 0 if text is not RANDOM"""
+    if text[:7].upper() == 'RANDOM[' and text.endswith(']'):
+        return text.count(',', 7) + 1
+    return 0
+
+class ResourceGuard:
+    """Running totals of one parse or run, checked against ResourceLimits"""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.instructions = 0
+        self.type_characters = 0
+        self.declared_wait = 0  # Explicit WAIT[ms] seen while parsing
+        self.wait_time = 0      # Waited while running
+
+    def check_instruction(self, instruction):
+        """Count a parsed instruction dict, raising if it goes over a limit"""
+        limits = self.limits
+        self.instructions += 1
+        if limits.max_instructions is not None and self.instructions > limits.max_instructions:
+            raise ResourceLimitError('max_instructions', limits.max_instructions)
+
+        command = instruction['command']
+        if command == 'TYPE':
+            barrier_info = instruction.get('barrier_info')
+            if barrier_info is None:
+                # From an escape sequence: plain text, or RANDOM[...] as a whole
+                text = instruction['parameter']
+                self._check_random(text)
+            else:
+                text = barrier_info['content']
+                for format_key in instruction.get('format_keys', ()):
+                    content = format_key['content']
+                    if limits.max_format_depth is not None and \
+                            _nesting(content) + 1 > limits.max_format_depth:
+                        raise ResourceLimitError('max_format_depth', limits.max_format_depth)
+                    self._check_random(content)
+            self.type_characters += len(text)
+            if limits.max_type_characters is not None and \
+                    self.type_characters > limits.max_type_characters:
+                raise ResourceLimitError('max_type_characters', limits.max_type_characters)
+
+        elif command == 'WAIT' and instruction['parameter'] and limits.max_wait_time is not None:
+            self.declared_wait += int(instruction['parameter'])
+            if self.declared_wait > limits.max_wait_time:
+                raise ResourceLimitError('max_wait_time', limits.max_wait_time)
+
+    def check_wait(self, wait_time):
+        """Count a wait about to happen, raising if it goes over max_wait_time"""
+        self.wait_time += wait_time
+        maximum = self.limits.max_wait_time
+        if maximum is not None and self.wait_time > maximum:
+            raise ResourceLimitError('max_wait_time', maximum)
+
+    def check_open_type(self, length):
+        """Check TYPE text still being tokenized, raising if it already goes over max_type_characters"""
+        maximum = self.limits.max_type_characters
+        if maximum is not None and self.type_characters + length > maximum:
+            raise ResourceLimitError('max_type_characters', maximum)
+    
+    def _check_random(self, text):
+        maximum = self.limits.max_random_options
+        if maximum is not None and _random_options(text) > maximum:
+            raise ResourceLimitError('max_random_options', maximum)
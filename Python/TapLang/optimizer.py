@@ -0,0 +1,126 @@
+"""Peephole optimizer
+
+Rewrites runs of adjacent instructions from parse_taplang into fewer
+instructions with the same keyboard output:
+
+- consecutive WAIT[n] become one WAIT with the total time
+- two or more CLICKs of letter, digit, unshifted symbol or SPACE keys,
+  with no key held, become one TYPE of the characters they type
+  (letters in lower case); typed through a layout such as 'us', each
+  character is the same key without SHIFT
+- PRESS of modifiers, one CLICK or FUNCTION and the RELEASEs in reverse
+  order become one CHORD, which emits the same key events
+
+No rewrite touches RANDOM, WAIT[] or SET_WAIT, so runs draw the same
+random values as the unoptimized program. Use it through
+compile_taplang(code, optimize=True).
+"""
+
+from .data import MODIFIER_KEYS
+
+_PRESS_COMMANDS = ('PRESS', 'PRESS_LEFT', 'PRESS_RIGHT')
+_CHORD_PREFIXES = {'PRESS': '', 'PRESS_LEFT': 'LEFT_', 'PRESS_RIGHT': 'RIGHT_'}
+
+# Character typed by each foldable key. Shifted symbols such as ! are
+# typed as SHIFT and another key, so a CLICK of them is not the same as
+# their character; backticks would need a longer concept barrier.
+_TYPED_CHARS = {letter: letter.lower() for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'}
+_TYPED_CHARS.update((char, char) for char in "0123456789,.;'/\\[]-=")
+_TYPED_CHARS['SPACE'] = ' '
+
+def typed_char(instruction):
+    """Return the character a CLICK types, or None if it cannot be folded"""
+    if instruction['command'] != 'CLICK':
+        return None
+    return _TYPED_CHARS.get(instruction['parameter'])
+
+def _fixed_wait(instruction):
+    if instruction['command'] != 'WAIT' or not instruction['parameter']:
+        return None
+    try:
+        return int(instruction['parameter'])
+    except ValueError:
+        return None
+
+def _originals(run):
+    return ' '.join(instruction.get('original', '') for instruction in run)
+
+def _match_chord(instructions, start):
+    """Return the length of the chord starting at start, or 0"""
+    end = start
+    length = len(instructions)
+    while end < length and instructions[end]['command'] in _PRESS_COMMANDS \
+            and instructions[end]['parameter'] in MODIFIER_KEYS:
+        end += 1
+    count = end - start
+    if count == 0 or end >= length or instructions[end]['command'] not in ('CLICK', 'FUNCTION'):
+        return 0
+    pressed = [instruction['parameter'] for instruction in instructions[start:end]]
+    releases = instructions[end + 1:end + 1 + count]
+    if [instruction['command'] for instruction in releases] != ['RELEASE'] * count \
+            or [instruction['parameter'] for instruction in releases] != pressed[::-1]:
+        return 0
+    return 2 * count + 1
+
+def _chord(run):
+    count = len(run) // 2
+    parts = [_CHORD_PREFIXES[instruction['command']] + instruction['parameter'] for instruction in run[:count]]
+    key = run[count]
+    parts.append('F' + key['parameter'] if key['command'] == 'FUNCTION' else key['parameter'])
+    return {'command': 'CHORD', 'parameter': '+'.join(parts), 'original': _originals(run)}
+
+def optimize_instructions(instructions):
+    """Return a shorter list of parse_taplang dicts with the same output"""
+    optimized = []
+    held_keys = set()
+    i = 0
+    length = len(instructions)
+    while i < length:
+        instruction = instructions[i]
+        command = instruction['command']
+
+        size = _match_chord(instructions, i)
+        if size:
+            optimized.append(_chord(instructions[i:i + size]))
+            i += size
+            continue
+
+        if not held_keys and typed_char(instruction) is not None:
+            end = i + 1
+            while end < length and typed_char(instructions[end]) is not None:
+                end += 1
+            if end - i > 1:
+                run = instructions[i:end]
+                text = ''.join(typed_char(click) for click in run)
+                optimized.append({
+                    'command': 'TYPE',
+                    'parameter': f"`{text}`",
+                    'original': _originals(run),
+                    'barrier_info': {'content': text, 'barrier_length': 1, 'has_format': False},
+                    'format_keys': []
+                })
+                i = end
+                continue
+
+        wait = _fixed_wait(instruction)
+        if wait is not None:
+            end = i + 1
+            while end < length and _fixed_wait(instructions[end]) is not None:
+                wait += _fixed_wait(instructions[end])
+                end += 1
+            if end - i > 1:
+                optimized.append({
+                    'command': 'WAIT',
+                    'parameter': str(wait),
+                    'original': _originals(instructions[i:end])
+                })
+                i = end
+                continue
+
+        if command in _PRESS_COMMANDS:
+            held_keys.add(instruction['parameter'])
+        elif command == 'RELEASE':
+            held_keys.discard(instruction['parameter'])
+        optimized.append(instruction)
+        i += 1
+    return optimized
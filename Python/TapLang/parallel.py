@@ -0,0 +1,128 @@
+"""Parallel parsing of one large script
+
+parse_taplang_parallel() splits the source into chunks at likely token
+boundaries and tokenizes, parses and validates the chunks in a process
+pool. A sequential stitch then checks PRESS/RELEASE balance across the
+chunks in source order:
+
+    instructions = parse_taplang_parallel(session_replay, workers=8)
+    program = CompiledProgram(session_replay, instructions)
+
+Split points are only guesses: a space after ']' and before the next
+command name, which may still lie inside a TYPE body. Each worker
+reports whether its chunk ended in the tokenizer's initial state; when
+it did not, the stitch continues tokenizing the following chunks in
+the current process until a chunk ends cleanly again. The result and
+any error are always the same as parse_taplang()'s.
+"""
+
+import os
+import re
+from multiprocessing import Pool
+from .interpreter import TapLangStreamParser
+
+# A space between a ']' and what looks like the next instruction
+_SPLIT = re.compile(r'(?<=\]) (?=[A-Za-z_]+\[)')
+
+class _ChunkParser(TapLangStreamParser):
+    """Parser for one chunk; held keys are checked by the stitch instead"""
+
+    def _track_keys(self, cmd, param):
+        pass
+
+def split_points(code, chunk_size):
+    """Return the offsets just after each chosen split space"""
+    points = []
+    position = chunk_size
+    while position < len(code):
+        match = _SPLIT.search(code, position)
+        if match is None:
+            break
+        points.append(match.end())
+        position = match.end() + chunk_size
+    return points
+
+def _is_clean(parser):
+    """Whether parser is in the state a fresh parser starts in (held keys aside)"""
+    tokenizer = parser._tokenizer
+    return (not parser.in_escape and not tokenizer._in_escape and not tokenizer._escape_phase
+            and tokenizer._bracket_count == 0 and not tokenizer._pieces
+            and tokenizer._token_start == len(tokenizer._buffer))
+
+def _parse_chunk(item):
+    """Parse (text, final) in a worker; never raises
+
+    Returns (instructions, error, state). state is None when the chunk
+    ended where a fresh parser would start, else the chunk's parser, so
+    the stitch can carry on from it.
+    """
+    text, final = item
+    parser = _ChunkParser()
+    tokens = parser._tokenizer.feed(text)
+    if final:
+        tokens += parser._tokenizer.close()
+    instructions = []
+    for token in tokens:
+        try:
+            instruction = parser.parse_token(token)
+        except ValueError as e:
+            # Instructions before the error still need their held keys checked
+            return instructions, str(e), None
+        if instruction:
+            instructions.append(instruction)
+    return instructions, None, None if not final and _is_clean(parser) else parser
+
+def _stitch(chunks, results):
+    """Check held keys in source order, re-parsing chunks after an unclean seam"""
+    parser = TapLangStreamParser()
+    track_keys = parser._track_keys
+    instructions = []
+    serial = False
+    for (text, final), (chunk_instructions, error, state) in zip(chunks, results):
+        if serial:
+            # This chunk's worker started mid-token; carry on from the previous chunk's state
+            instructions += parser.feed(text)
+            if final:
+                return instructions + parser.close()
+            serial = not _is_clean(parser)
+            continue
+        
+        for instruction in chunk_instructions:
+            try:
+                track_keys(instruction['command'], instruction['parameter'])
+            except ValueError as e:
+                raise ValueError(f"Error in '{instruction['original']}': {e}")
+            instructions.append(instruction)
+        if error is not None:
+            raise ValueError(error)
+        if state is not None:
+            parser._tokenizer = state._tokenizer
+            parser.in_escape = state.in_escape
+            parser.escape_buffer = state.escape_buffer
+            serial = not final
+    parser.finish()
+    return instructions
+
+def parse_taplang_parallel(code, workers=None, chunk_size=1 << 20):
+    """Parse and validate one large script across a process pool
+
+    Returns the same instructions as parse_taplang(code) and raises the
+    same ValueError for invalid code.
+
+    Args:
+        code: TapLang source
+        workers: Number of worker processes (default: CPU count); 1
+            parses in the current process
+        chunk_size: Approximate characters per chunk
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    bounds = [0] + split_points(code, chunk_size) + [len(code)]
+    chunks = [(code[start:end], end == len(code)) for start, end in zip(bounds, bounds[1:])]
+    
+    if workers == 1 or len(chunks) == 1:
+        return _stitch(chunks, map(_parse_chunk, chunks))
+    with Pool(min(workers, len(chunks))) as pool:
+        return _stitch(chunks, pool.imap(_parse_chunk, chunks))
@@ -1,5 +1,7 @@
 import re
+from bisect import bisect_right
 from .data import get_valid_instructions
+from .limits import ResourceLimitError
 
 def parse_concept_barrier(param):
     """Parse concept barrier syntax for TYPE instruction
@@ -59,31 +61,29 @@ def parse_format_keys(text):
         if format_start == -1:
             break
         
-        # Find matching bracket
+        # Find matching bracket, jumping between brackets
         bracket_count = 0
-        j = format_start + 7  # Start after 'FORMAT['
-        start_pos = j
+        start_pos = format_start + 7  # Start after 'FORMAT['
         
-        while j < len(text):
-            if text[j] == '[':
+        for bracket in _BRACKETS.finditer(text, start_pos):
+            if bracket.group() == '[':
                 bracket_count += 1
-            elif text[j] == ']':
-                if bracket_count == 0:
-                    # Found the matching bracket
-                    format_content = text[start_pos:j]
-                    full_match = text[format_start:j+1]
-                    
-                    format_keys.append({
-                        'full_match': full_match,
-                        'content': format_content,
-                        'start': format_start,
-                        'end': j+1
-                    })
-                    i = j + 1
-                    break
-                else:
-                    bracket_count -= 1
-            j += 1
+            elif bracket_count == 0:
+                # Found the matching bracket
+                j = bracket.start()
+                format_content = text[start_pos:j]
+                full_match = text[format_start:j+1]
+                
+                format_keys.append({
+                    'full_match': full_match,
+                    'content': format_content,
+                    'start': format_start,
+                    'end': j+1
+                })
+                i = j + 1
+                break
+            else:
+                bracket_count -= 1
         else:
             # No matching bracket found
             i = format_start + 1
@@ -93,7 +93,6 @@ def parse_format_keys(text):
 def parse_instruction(instruction):
     """Parse a single instruction like CLICK[A] or TYPE[Hello]"""
     original_instruction = instruction.strip()
-    instruction_upper = instruction.strip().upper()
     
     if not instruction:
         return None
@@ -134,75 +133,342 @@ def parse_instruction(instruction):
     
     return {'command': cmd, 'parameter': param}
 
-def tokenize_code(code):
-    """Split TapLang code into tokens, handling nested brackets"""
-    tokens = []
-    current_token = ""
-    bracket_count = 0
-    in_escape = False
+_TOKEN_DELIMITERS = re.compile(r'[\[\] ]')
+_BRACKETS = re.compile(r'[\[\]]')
+_ESCAPE_START = re.compile(r'ESCAPE_TYPE_START\[', re.IGNORECASE)
+_ESCAPE_END = re.compile(r'ESCAPE_TYPE_END\[', re.IGNORECASE)
+_ESCAPE_END_PREFIX = 'ESCAPE_TYPE_END['
+
+# Unfinished tokens longer than this are moved out of the tokenizer buffer
+_PIECE_SIZE = 1 << 12
+
+# Characters of an unfinished token read to find a TYPE[ and its barrier
+_TYPE_HEAD = 64
+
+class IncrementalTokenizer:
+    """Incremental form of tokenize_code
     
-    i = 0
-    while i < len(code):
-        char = code[i]
+    Source text is fed in chunks; feed() returns the tokens that are
+    complete so far and close() returns the rest. The concatenated output
+    is always identical to tokenize_code() on the whole source.
+    
+    With spans=True every token is returned as a (token, start, end)
+    tuple, where source[start:end] is the token text (for a token split
+    by an escape sequence, the span also covers the escape sequence).
+    
+    With max_length, feeding more than that many characters in total
+    raises ResourceLimitError before the chunk is buffered.
+    open_type_length() tells how much TYPE text the unfinished token
+    already holds, so a huge TYPE can be rejected before it completes.
+    
+    Only the unscanned end of the source stays in the buffer: once an
+    unfinished token or escape sequence grows past _PIECE_SIZE its
+    scanned text is moved into a list of pieces, joined when it
+    completes, so a long token fed in small chunks takes linear time.
+    """
+    
+    def __init__(self, spans=False, max_length=None):
+        self.spans = spans
+        self.max_length = max_length
+        self._buffer = ""
+        self._offset = 0        # Source offset of the start of the buffer
+        self._pos = 0           # Where the delimiter scan resumes
+        self._escape_from = 0   # Where the escape sequence search resumes
+        self._token_start = 0
+        self._pieces = []       # Scanned parts of the unfinished token
+        self._piece_starts = [] # Source offsets of the pieces, with spans=True
+        self._pieces_length = 0
+        self._bracket_count = 0
+        self._in_escape = False
+        # Escape sequence being scanned: phase 1 is inside ESCAPE_TYPE_START[...],
+        # 2 looks for ESCAPE_TYPE_END[ and 3 is inside its brackets; 0 when none
+        self._escape_phase = 0
+        self._escape_depth = 0
+        self._escape_parts = []     # Scanned parts of the escape token being collected
+        self._escape_parts_length = 0
+        self._escape_start = 0      # Source offset of that token
+        self._escape_tokens = []    # Completed (token, start, end) of the sequence
+    
+    def feed(self, chunk):
+        """Add source text and return the tokens completed by it"""
+        self._check_length(self._offset + len(self._buffer) + len(chunk))
+        self._buffer += chunk
+        tokens = self._scan(final=False)
         
-        # Check for escape sequences
-        if not in_escape and code[i:].upper().startswith('ESCAPE_TYPE_START['):
-            in_escape = True
-            # Find the complete escape sequence
-            start = i
-            bracket_count = 0
-            j = i
-            while j < len(code):
-                if code[j] == '[':
-                    bracket_count += 1
-                elif code[j] == ']':
-                    bracket_count -= 1
-                    if bracket_count == 0:
-                        break
-                j += 1
+        # Drop consumed source once it dominates the buffer
+        cut = self._token_start
+        if cut and cut * 2 >= len(self._buffer):
+            self._buffer = self._buffer[cut:]
+            self._offset += cut
+            self._pos -= cut
+            self._escape_from -= cut
+            self._token_start = 0
+        return tokens
+    
+    def close(self):
+        """Finish the source and return the remaining tokens"""
+        tokens = self._scan(final=True)
+        self.__init__(self.spans, self.max_length)
+        return tokens
+    
+    def _check_length(self, length):
+        if self.max_length is not None and length > self.max_length:
+            raise ResourceLimitError('max_source_length', self.max_length)
+    
+    def open_type_length(self):
+        """Return the characters of TYPE text the unfinished token holds at least
+        
+        Counts the text between the barriers of a TYPE[ whose bracket is
+        still open and inside an unclosed ESCAPE_TYPE_START[, as
+        check_instruction() in limits.py will once the token completes;
+        0 for any other token.
+        """
+        if self._escape_phase == 1:
+            length = self._escape_parts_length + len(self._buffer) - self._token_start
+            return max(0, length - len('ESCAPE_TYPE_START['))
+        if self._escape_phase or not self._bracket_count:
+            return 0
+        
+        # Text from _escape_from on may still turn out to start an escape sequence
+        start = self._token_start
+        end = max(start, self._escape_from)
+        head = ""
+        for piece in self._pieces:
+            head += piece
+            if len(head) >= _TYPE_HEAD:
+                break
+        else:
+            head += self._buffer[start:min(end, start + _TYPE_HEAD)]
+        stripped = head.lstrip()
+        if stripped[:5].upper() != 'TYPE[':
+            return 0
+        barrier = len(stripped) - 5 - len(stripped[5:].lstrip('`'))
+        if not barrier or 5 + barrier == len(stripped):
+            return 0  # No barrier, or one that may still go on
+        
+        # Trailing whitespace is stripped if the source ends here
+        tail = self._buffer[max(start, end - _TYPE_HEAD):end]
+        for piece in reversed(self._pieces):
+            if len(tail) >= _TYPE_HEAD:
+                break
+            tail = piece + tail
+        if not tail.strip():
+            return 0
+        length = self._pieces_length + end - start - (len(head) - len(stripped)) \
+            - (len(tail) - len(tail.rstrip()))
+        # Leave room for the closing barrier and bracket
+        return max(0, length - len('TYPE[]') - 2 * barrier)
+    
+    def _add_piece(self, code, end):
+        self._pieces.append(code[self._token_start:end])
+        self._pieces_length += end - self._token_start
+        if self.spans:
+            self._piece_starts.append(self._offset + self._token_start)
+    
+    def _end_token(self, tokens):
+        """Emit the token made of the collected pieces, if it is not blank"""
+        token = ''.join(self._pieces).strip()
+        if token:
+            if self.spans:
+                tokens.append((token,) + self._piece_span())
+            else:
+                tokens.append(token)
+        self._pieces = []
+        self._piece_starts = []
+        self._pieces_length = 0
+    
+    def _piece_span(self):
+        """Return the source (start, end) of the stripped pieces"""
+        pieces = list(zip(self._pieces, self._piece_starts))
+        for piece, piece_start in pieces:
+            stripped = piece.lstrip()
+            if stripped:
+                start = piece_start + len(piece) - len(stripped)
+                break
+        for piece, piece_start in reversed(pieces):
+            stripped = piece.rstrip()
+            if stripped:
+                return start, piece_start + len(stripped)
+    
+    def _scan(self, final):
+        code = self._buffer
+        tokens = []
+        length = len(code)
+        i = self._pos
+        escape_from = None
+        spans = self.spans
+        if self._escape_phase:
+            i = self._scan_escape(code, i, final, tokens)
+            if i is None:
+                return tokens
+            search_from = i
+        else:
+            search_from = self._escape_from
+        
+        escape_match = None if self._in_escape else _ESCAPE_START.search(code, search_from)
+        next_escape = escape_match.start() if escape_match else length
+        
+        while i < length:
+            # Spaces only end tokens outside brackets; inside, skip to the next bracket
+            delimiter = (_TOKEN_DELIMITERS if self._bracket_count == 0 else _BRACKETS).search(code, i)
+            next_delimiter = delimiter.start() if delimiter else length
             
-            # Add the ESCAPE_TYPE_START token
-            tokens.append(code[start:j+1])
-            i = j + 1
+            # Check for escape sequences
+            if not self._in_escape and next_escape < next_delimiter:
+                if next_escape > self._token_start:
+                    self._add_piece(code, next_escape)
+                self._token_start = next_escape
+                self._escape_phase = 1
+                self._escape_depth = 0
+                self._escape_start = self._offset + next_escape
+                i = self._scan_escape(code, next_escape, final, tokens)
+                if i is None:
+                    return tokens
+                if not self._in_escape:
+                    search_from = i
+                    escape_match = _ESCAPE_START.search(code, i)
+                    next_escape = escape_match.start() if escape_match else length
+                continue
             
-            # Skip spaces
-            while i < len(code) and code[i] == ' ':
-                i += 1
-                
-            # Find ESCAPE_TYPE_END
-            if i < len(code) and code[i:].upper().startswith('ESCAPE_TYPE_END['):
-                start = i
-                bracket_count = 0
-                j = i
-                while j < len(code):
-                    if code[j] == '[':
-                        bracket_count += 1
-                    elif code[j] == ']':
-                        bracket_count -= 1
-                        if bracket_count == 0:
-                            break
-                    j += 1
-                tokens.append(code[start:j+1])
-                i = j + 1
-                in_escape = False
-            continue
+            if next_delimiter == length:
+                # A partial ESCAPE_TYPE_START[ may still be completed by the next chunk
+                escape_from = max(search_from, length - len('ESCAPE_TYPE_START[') + 1)
+                i = length
+                break
+            
+            char = code[next_delimiter]
+            if char == '[':
+                self._bracket_count += 1
+            elif char == ']':
+                self._bracket_count -= 1
+            elif self._bracket_count == 0:
+                if spans or self._pieces:
+                    self._add_piece(code, next_delimiter)
+                    self._end_token(tokens)
+                else:
+                    # Hot path, inlined
+                    token = code[self._token_start:next_delimiter].strip()
+                    if token:
+                        tokens.append(token)
+                self._token_start = next_delimiter + 1
+            
+            i = next_delimiter + 1
         
-        if char == '[':
-            bracket_count += 1
-            current_token += char
-        elif char == ']':
-            bracket_count -= 1
-            current_token += char
-        elif char == ' ' and bracket_count == 0:
-            if current_token.strip():
-                tokens.append(current_token.strip())
-            current_token = ""
+        if final:
+            self._add_piece(code, length)
+            self._end_token(tokens)
         else:
-            current_token += char
+            self._pos = i
+            self._escape_from = i if escape_from is None else escape_from
+            # Move a long unfinished token out of the buffer, keeping what is still to be scanned
+            keep = min(i, self._escape_from)
+            if keep - self._token_start >= _PIECE_SIZE:
+                self._add_piece(code, keep)
+                self._token_start = keep
+        return tokens
+    
+    def _scan_escape(self, code, i, final, tokens):
+        """Continue scanning the escape sequence at code[i:]
         
-        i += 1
+        Scans ESCAPE_TYPE_START[...] and an optional ESCAPE_TYPE_END[...],
+        emits their tokens and returns the index after the sequence. When
+        more input could change the result and final is False, keeps the
+        scan state and returns None instead.
+        """
+        length = len(code)
+        start = self._token_start  # Start of the unstored part of the current token
+        while True:
+            if self._escape_phase == 2:
+                # Skip spaces, then look for ESCAPE_TYPE_END
+                while i < length and code[i] == ' ':
+                    i += 1
+                if not final and (i == length or (length - i < len(_ESCAPE_END_PREFIX)
+                                                  and _ESCAPE_END_PREFIX.startswith(code[i:].upper()))):
+                    self._token_start = self._pos = self._escape_from = i
+                    return None
+                if i >= length or not _ESCAPE_END.match(code, i):
+                    break
+                self._escape_phase = 3
+                self._escape_depth = 0
+                self._escape_start = self._offset + i
+                start = i
+            
+            # Find the bracket closing the first '[', carrying the depth across chunks
+            depth = self._escape_depth
+            close = length
+            for bracket in _BRACKETS.finditer(code, i):
+                if bracket.group() == '[':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        close = bracket.start()
+                        break
+            if close == length and not final:
+                self._escape_depth = depth
+                if length - start >= _PIECE_SIZE:
+                    self._escape_parts.append(code[start:length])
+                    self._escape_parts_length += length - start
+                    start = length
+                self._token_start = start
+                self._pos = self._escape_from = length
+                return None
+            
+            i = close + 1
+            self._escape_parts.append(code[start:i])
+            self._escape_tokens.append((''.join(self._escape_parts), self._escape_start, self._offset + i))
+            self._escape_parts = []
+            self._escape_parts_length = 0
+            if self._escape_phase == 3:
+                break
+            self._escape_phase = 2
+        
+        if self.spans:
+            tokens.extend(self._escape_tokens)
+        else:
+            tokens.extend(token for token, _, _ in self._escape_tokens)
+        self._in_escape = len(self._escape_tokens) == 1
+        self._escape_tokens = []
+        self._escape_phase = 0
+        self._bracket_count = 0
+        self._token_start = i
+        return i
+
+def tokenize_code(code, spans=False, max_length=None):
+    """Split TapLang code into tokens, handling nested brackets
+
+    Single pass over the source: the scanner jumps between delimiters
+    ('[', ']', ' ') and escape sequences, and tokens are sliced out of
+    the source by index instead of being built one character at a time.
+    With spans=True returns (token, start, end) tuples instead. Code
+    longer than max_length raises ResourceLimitError.
+    """
+    tokenizer = IncrementalTokenizer(spans, max_length)
+    tokenizer._check_length(len(code))
+    tokenizer._buffer = code
+    return tokenizer._scan(final=True)
+
+class LineIndex:
+    """Maps source offsets to 1-based (line, column) pairs
+    
+    Source is fed in the same chunks as the tokenizer, so positions can
+    be looked up without keeping the source.
+    """
+    
+    def __init__(self, code=""):
+        self._line_starts = [0]
+        self._length = 0
+        self.feed(code)
     
-    if current_token.strip():
-        tokens.append(current_token.strip())
+    def feed(self, chunk):
+        find = chunk.find
+        i = find('\n')
+        while i != -1:
+            self._line_starts.append(self._length + i + 1)
+            i = find('\n', i + 1)
+        self._length += len(chunk)
     
-    return [token for token in tokens if token]
\ No newline at end of file
+    def position(self, offset):
+        """Return the (line, column) of a source offset"""
+        line = bisect_right(self._line_starts, offset)
+        return line, offset - self._line_starts[line - 1] + 1
@@ -0,0 +1,73 @@
+"""Random draws for TapLang runs
+
+Every random decision in a run is either a RANDOM[...] choice or a
+random WAIT[], and both reduce to one randrange(n) draw on the context
+RNG. Because programs have no branches, the sizes of all draws can be
+worked out before execution and drawn in one batch; the run then
+consumes them through PredrawnRandom and produces exactly the output of
+a sequential run with the same seed.
+"""
+
+import os
+import random
+from .instruction import Opcode
+
+def new_seed():
+    """Return a fresh 64-bit seed from the operating system"""
+    return int.from_bytes(os.urandom(8), 'little')
+
+def draw_sizes(program, random_wait_range=None):
+    """Return the size of every random draw a run of program makes, in order
+
+    random_wait_range is the SET_WAIT[RANDOM[...]] range in effect when
+    the run starts.
+    """
+    sizes = []
+    for instruction in program:
+        opcode = instruction.opcode
+        if opcode == Opcode.TYPE:
+            if instruction.barrier_length is None:
+                if instruction.operand is not None:
+                    sizes.append(len(instruction.operand))
+            else:
+                sizes.extend(len(part) for part in instruction.operand if part.__class__ is not str)
+        elif opcode == Opcode.WAIT:
+            if not instruction.parameter and random_wait_range:
+                sizes.append(random_wait_range[1] - random_wait_range[0] + 1)
+        elif opcode == Opcode.SET_WAIT:
+            random_wait_range = instruction.operand if isinstance(instruction.operand, tuple) else None
+    return sizes
+
+class PredrawnRandom:
+    """RNG stand-in that replays draws made in advance
+
+    Provides the choice() and randint() calls the interpreter uses. Once
+    the pre-drawn values run out it continues with the source RNG.
+    """
+
+    def __init__(self, draws, rng):
+        self.draws = draws
+        self.rng = rng
+        self._next = 0
+
+    def _draw(self, size):
+        if self._next < len(self.draws):
+            value = self.draws[self._next]
+            self._next += 1
+            return value
+        return self.rng.randrange(size)
+
+    def choice(self, options):
+        return options[self._draw(len(options))]
+
+    def randint(self, low, high):
+        return low + self._draw(high - low + 1)
+
+def predraw(program, context):
+    """Draw every random value a run of program needs from context.rng
+
+    Returns a PredrawnRandom to use as the run's RNG.
+    """
+    randrange = context.rng.randrange
+    draws = [randrange(size) for size in draw_sizes(program, context.random_wait_range)]
+    return PredrawnRandom(draws, context.rng)
@@ -1,19 +1,24 @@
-from .data import get_valid_keys, get_spec
+from .data import VALID_KEYS, FUNCTION_KEYS, get_spec
+from .parser import parse_instruction
+
+# Lookup tables for the hot path
+KEY_COMMANDS = frozenset(['CLICK', 'PRESS', 'RELEASE', 'PRESS_LEFT', 'PRESS_RIGHT'])
+VALID_KEY_TABLE = VALID_KEYS
+FUNCTION_KEY_TABLE = frozenset(FUNCTION_KEYS)
 
 def validate_instruction(parsed):
     """Validate a parsed instruction"""
     cmd = parsed['command']
     param = parsed['parameter']
-    spec = get_spec()
     
-    if cmd in ['CLICK', 'PRESS', 'RELEASE', 'PRESS_LEFT', 'PRESS_RIGHT']:
+    if cmd in KEY_COMMANDS:
         if not param:
             raise ValueError(f"{cmd} requires a key parameter")
-        if param not in get_valid_keys():
+        if param not in VALID_KEY_TABLE:
             raise ValueError(f"Invalid key: {param}")
     
     elif cmd == 'FUNCTION':
-        if param not in spec['keys']['function_keys']:
+        if param not in FUNCTION_KEY_TABLE:
             raise ValueError(f"Invalid function key: F{param}. Must be 1-12")
     
     elif cmd == 'TYPE':
@@ -87,6 +92,44 @@ def validate_instruction(parsed):
     
     return True
 
+def validate_tokens(tokens):
+    """Validate every token from tokenize_code and return all errors
+    
+    Key and FUNCTION operands are checked directly against the lookup
+    tables; other tokens go through parse_instruction and
+    validate_instruction. Unlike parse_taplang this does not stop at the
+    first error, and it does not check PRESS/RELEASE pairing or escape
+    sequence state.
+    
+    Returns a list of {'index': token index, 'token': token, 'error': message}.
+    """
+    errors = []
+    for index, token in enumerate(tokens):
+        bracket_pos = token.find('[')
+        if bracket_pos > 0 and token[-1] == ']':
+            cmd = token[:bracket_pos].upper()
+            if cmd in KEY_COMMANDS:
+                param = token[bracket_pos+1:-1].upper()
+                if param in VALID_KEY_TABLE:
+                    continue
+                message = f"Invalid key: {param}" if param else f"{cmd} requires a key parameter"
+                errors.append({'index': index, 'token': token, 'error': message})
+                continue
+            if cmd == 'FUNCTION':
+                param = token[bracket_pos+1:-1].upper()
+                if param not in FUNCTION_KEY_TABLE:
+                    errors.append({'index': index, 'token': token,
+                                   'error': f"Invalid function key: F{param}. Must be 1-12"})
+                continue
+        
+        try:
+            parsed = parse_instruction(token)
+            if parsed:
+                validate_instruction(parsed)
+        except ValueError as e:
+            errors.append({'index': index, 'token': token, 'error': str(e)})
+    return errors
+
 # Re-export for compatibility
 def load_spec():
     """Load specification (compatibility function)"""
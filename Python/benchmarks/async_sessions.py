@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Async session scaling benchmark
+Runs N concurrent TapLang sessions on one event loop (one core) and
+reports wall time against the time a single session spends waiting.
+
+Usage: python benchmarks/async_sessions.py [max_sessions]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TapLang import AsyncBackend, compile_taplang, run_taplang_async
+
+SCRIPT = ("SET_WAIT[RANDOM[20,40]] TYPE[`Hello FORMAT[RANDOM[Alice,Bob]]`] WAIT[] "
+          "PRESS[CTRL] CLICK[A] RELEASE[CTRL] WAIT[] CLICK[ENTER] WAIT[100]")
+
+
+class NullBackend(AsyncBackend):
+    async def key_down(self, key, side=0):
+        pass
+
+    async def key_up(self, key, side=0):
+        pass
+
+    async def text(self, text):
+        pass
+
+
+async def run_sessions(program, count):
+    backend = NullBackend()
+    return await asyncio.gather(*(run_taplang_async(program, backend) for _ in range(count)))
+
+
+def main():
+    max_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    program = compile_taplang(SCRIPT)
+    print("Async session scaling (one event loop)")
+    print("=" * 60)
+    print(f"{'sessions':>10} {'wall (s)':>10} {'sessions/s':>12} {'overhead/session':>18}")
+
+    count = 1
+    while count <= max_sessions:
+        start = time.perf_counter()
+        results = asyncio.run(run_sessions(program, count))
+        elapsed = time.perf_counter() - start
+        assert all(result['success'] for result in results)
+        # Each session sleeps 140-180ms; the rest is interpreter and loop overhead
+        overhead = max(elapsed - 0.18, 0) / count * 1e6
+        print(f"{count:>10} {elapsed:>10.3f} {count / elapsed:>12.0f} {overhead:>15.1f} us")
+        count *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Import time benchmark
+Times imports of TapLang in fresh interpreters, not counting the cost of
+starting Python itself. The budget is on the first-use import of the
+interpreter, `from TapLang import interpret_taplang`, which is what a cold
+worker pays; the run fails if its median exceeds the budget.
+
+Usage: python benchmarks/import_time.py [budget_ms] [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 30.0
+
+# The import the budget applies to
+BUDGETED = "+ interpret_taplang"
+
+
+def median_startup(code, runs):
+    # -X importtime would include its own overhead; time whole processes instead
+    timer = ("import time; _start = time.perf_counter(); {}; "
+             "print((time.perf_counter() - _start) * 1000)")
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", timer.format(code)], cwd=PACKAGE_DIR, text=True)
+        samples.append(float(output))
+    return statistics.median(samples)
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print("Import time (median of fresh interpreters)")
+    print("=" * 60)
+
+    rows = [
+        ("import TapLang", "import TapLang"),
+        ("+ interpret_taplang", "from TapLang import interpret_taplang"),
+        ("+ get_spec()", "import TapLang.data as d; d.get_spec()"),
+        ("everything", "from TapLang import *"),
+    ]
+    results = {}
+    for label, code in rows:
+        results[label] = median_startup(code, runs)
+        print(f"{label:<24} {results[label]:>8.2f} ms")
+
+    elapsed = results[BUDGETED]
+    print(f"\nBudget for `{dict(rows)[BUDGETED]}`: {budget:.2f} ms")
+    if elapsed > budget:
+        print(f"❌ Over budget by {elapsed - budget:.2f} ms")
+        sys.exit(1)
+    print("✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()
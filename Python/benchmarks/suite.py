@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+TapLang benchmark suite
+Times tokenize_code, parse_instruction, validate_instruction and
+interpret_taplang separately on generated workloads, reports throughput
+and peak memory, and compares against benchmarks/baseline.json.
+
+Times are stored relative to a fixed pure-Python calibration loop run
+alongside each stage, so a baseline recorded on one machine can be
+checked on another. A stage more than --tolerance slower than the
+baseline, or using more than --tolerance more memory, fails the run
+with exit status 1.
+
+Usage:
+    python benchmarks/suite.py                    # run and compare
+    python benchmarks/suite.py --update-baseline  # record a new baseline
+    python benchmarks/suite.py --scale 0.1        # smaller workloads
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TapLang import clear_compile_cache, interpret_taplang, parse_instruction, validate_instruction
+from TapLang.parser import tokenize_code
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SEED = 20240501
+
+
+def long_type_bodies(scale):
+    """Few instructions with very long TYPE bodies"""
+    rng = random.Random(SEED)
+    words = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta']
+    body_words = max(1, int(20000 * scale))
+    bodies = []
+    for _ in range(50):
+        text = ' '.join(rng.choice(words) for _ in range(body_words))
+        bodies.append(f"TYPE[`{text}`] CLICK[ENTER]")
+    return ' '.join(bodies)
+
+
+def nested_format(scale):
+    """TYPE bodies packed with FORMAT[RANDOM[...]] keys with bracketed options"""
+    rng = random.Random(SEED + 1)
+    parts = []
+    for _ in range(max(1, int(5000 * scale))):
+        depth = rng.randint(1, 6)
+        options = ','.join('[' * depth + f"opt{i}" + ']' * depth for i in range(rng.randint(2, 8)))
+        parts.append(f"TYPE[`value FORMAT[RANDOM[{options}]] and FORMAT[RANDOM[a,b,c]]`]")
+    return ' '.join(parts)
+
+
+def escape_heavy(scale):
+    """Escape sequences full of instruction keywords"""
+    rng = random.Random(SEED + 2)
+    parts = []
+    for _ in range(max(1, int(10000 * scale))):
+        inner = ' '.join(rng.choice(['PRESS[SHIFT]', 'CLICK[A]', 'TYPE[x]', 'WAIT[5]', 'text'])
+                         for _ in range(rng.randint(1, 6)))
+        parts.append(f"ESCAPE_TYPE_START[{inner}] ESCAPE_TYPE_END[~] CLICK[TAB]")
+    return ' '.join(parts)
+
+
+def mixed_100k(scale):
+    """100k instructions of every kind"""
+    rng = random.Random(SEED + 3)
+    # Each fragment with the number of instructions it holds
+    fragments = [
+        ("CLICK[A]", 1), ("CLICK[ENTER]", 1), ("FUNCTION[5]", 1), ("WAIT[10]", 1), ("WAIT[]", 1),
+        ("SET_WAIT[RANDOM[1,20]]", 1), ("SET_WAIT[15]", 1), ("TYPE[`hello world`]", 1),
+        ("TYPE[`Hi FORMAT[RANDOM[Alice,Bob,Carol]]`]", 1), ("PRESS[CTRL] CLICK[C] RELEASE[CTRL]", 3),
+        ("PRESS_LEFT[SHIFT] CLICK[TAB] RELEASE[SHIFT]", 3),
+    ]
+    parts = []
+    count = 0
+    target = max(1, int(100000 * scale))
+    while count < target:
+        fragment, size = rng.choice(fragments)
+        if count + size > target:
+            continue
+        parts.append(fragment)
+        count += size
+    return ' '.join(parts)
+
+
+WORKLOADS = {
+    'long_type': long_type_bodies,
+    'nested_format': nested_format,
+    'escape_heavy': escape_heavy,
+    'mixed_100k': mixed_100k,
+}
+
+
+def calibration_loop():
+    """Fixed pure-Python work that stage times are measured against"""
+    total = 0
+    items = {}
+    for i in range(100000):
+        total += i % 7
+        items[i & 1023] = str(i)
+    return total
+
+
+def best_times(function, repeat):
+    """Best time of function and of the calibration loop, run interleaved
+
+    Interleaving keeps both measurements under the same machine load,
+    so their ratio is far steadier than either time on its own.
+    """
+    best = calibration = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        calibration_loop()
+        middle = time.perf_counter()
+        function()
+        end = time.perf_counter()
+        calibration = min(calibration, middle - start)
+        best = min(best, end - middle)
+    return best, calibration
+
+
+def peak_memory(function):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def stages(code):
+    """Return {stage: callable} timing each layer on its own input"""
+    tokens = tokenize_code(code)
+    parsed = [parse_instruction(token) for token in tokens]
+
+    def parse():
+        for token in tokens:
+            parse_instruction(token)
+
+    def validate():
+        for instruction in parsed:
+            validate_instruction(instruction)
+
+    def interpret():
+        clear_compile_cache()
+        result = interpret_taplang(code, seed=SEED)
+        assert result['success'], result.get('error')
+
+    return len(tokens), {
+        'tokenize': lambda: tokenize_code(code),
+        'parse': parse,
+        'validate': validate,
+        'interpret': interpret,
+    }
+
+
+def run_suite(scale, repeat):
+    results = {}
+    for name, build in WORKLOADS.items():
+        code = build(scale)
+        megabytes = len(code.encode('utf-8')) / 1e6
+        count, timed = stages(code)
+        for stage, function in timed.items():
+            seconds, calibration = best_times(function, repeat)
+            results[f"{name}/{stage}"] = {
+                'instructions': count,
+                'seconds': seconds,
+                # Calibrated time per instruction, comparable across machines
+                'relative': seconds / calibration / count,
+                'instructions_per_s': count / seconds,
+                'mb_per_s': megabytes / seconds,
+                'peak_bytes': peak_memory(function),
+            }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        time_ratio = result['relative'] / expected['relative']
+        memory_ratio = result['peak_bytes'] / max(expected['peak_bytes'], 1)
+        result['time_ratio'] = time_ratio
+        if time_ratio > 1 + tolerance:
+            failures.append(f"{key}: {time_ratio:.2f}x slower than baseline")
+        if memory_ratio > 1 + tolerance:
+            failures.append(f"{key}: {memory_ratio:.2f}x more memory than baseline")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scale', type=float, default=1.0, help="workload size factor")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per stage (best is kept)")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown, 0.5 = 50%%")
+    parser.add_argument('--update-baseline', action='store_true', help="store results as the baseline")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline file")
+    args = parser.parse_args()
+
+    results = run_suite(args.scale, args.repeat)
+
+    baseline = {}
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get('scale') == args.scale:
+            baseline = stored['results']
+        else:
+            print(f"Baseline was recorded at scale {stored.get('scale')}; not comparing")
+    failures = compare(results, baseline, args.tolerance)
+
+    print("TapLang benchmark suite")
+    print("=" * 96)
+    print(f"Scale {args.scale}, best of {args.repeat} runs")
+    print(f"{'workload/stage':<28} {'instr':>8} {'time (ms)':>10} {'instr/s':>12} {'MB/s':>8} "
+          f"{'peak MB':>8} {'vs base':>8}")
+    for key, result in results.items():
+        ratio = f"{result['time_ratio']:.2f}x" if 'time_ratio' in result else '-'
+        print(f"{key:<28} {result['instructions']:>8} {result['seconds'] * 1000:>10.2f} "
+              f"{result['instructions_per_s']:>12,.0f} {result['mb_per_s']:>8.2f} "
+              f"{result['peak_bytes'] / 1e6:>8.2f} {ratio:>8}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'scale': args.scale, 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if failures:
+        print("\n❌ Regressions:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    if baseline:
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Static analysis tests
+Checks analyze_taplang's bounds against simulated runs
+"""
+
+from TapLang import ExecutionContext, analyze_taplang, compile_taplang, interpret_events
+from TapLang.analysis import MODIFIER_KEYS
+from TapLang.events import EventKind
+from TapLang.instruction import KEY_NAMES
+from test_tokenizer import EXAMPLE_CORPUS
+
+
+def valid_programs():
+    for code in EXAMPLE_CORPUS + [
+        "SET_WAIT[RANDOM[10,20]] WAIT[] SET_WAIT[5] WAIT[] WAIT[7] WAIT[]",
+        "PRESS_LEFT[SHIFT] PRESS[CTRL] PRESS[A] CLICK[B] RELEASE[A] RELEASE[CTRL] RELEASE[SHIFT]",
+        "TYPE[`FORMAT[RANDOM[a,bbb]] x FORMAT[RANDOM[cc,d]]`] TYPE[RANDOM[x,yyyy]] FUNCTION[5]",
+    ]:
+        try:
+            yield compile_taplang(code)
+        except ValueError:
+            pass
+
+
+def simulate(program, seed):
+    log = interpret_events(program, seed=seed)['events']
+    duration = key_events = characters = 0
+    held = set()
+    peak_held = peak_modifiers = 0
+    for event in log:
+        if event.kind == EventKind.SLEEP:
+            duration += event.value
+        elif event.kind == EventKind.TEXT:
+            characters += len(event.value)
+        else:
+            key_events += 1
+            if event.kind == EventKind.KEY_DOWN:
+                held.add(KEY_NAMES[event.value])
+            else:
+                held.discard(KEY_NAMES[event.value])
+            peak_held = max(peak_held, len(held))
+            peak_modifiers = max(peak_modifiers, len(held & MODIFIER_KEYS))
+    return duration, key_events, characters, peak_held, peak_modifiers
+
+
+def test_bounds_hold_for_runs():
+    for program in valid_programs():
+        stats = analyze_taplang(program)
+        assert stats.min_duration <= stats.expected_duration <= stats.max_duration
+        for seed in range(30):
+            duration, key_events, characters, peak_held, peak_modifiers = simulate(program, seed)
+            assert stats.min_duration <= duration <= stats.max_duration, program.source
+            assert stats.min_characters <= characters <= stats.max_characters, program.source
+            assert key_events == stats.key_events, program.source
+            assert peak_modifiers == stats.peak_held_modifiers, program.source
+            # CLICK briefly holds its key, which the static count leaves out
+            assert peak_held - 1 <= stats.peak_held_keys <= peak_held, program.source
+
+
+def test_known_program():
+    stats = analyze_taplang("SET_WAIT[RANDOM[100,300]] PRESS[CTRL] PRESS_LEFT[SHIFT] CLICK[A] "
+                            "RELEASE[SHIFT] RELEASE[CTRL] WAIT[] WAIT[500] TYPE[`FORMAT[RANDOM[a,bcd]]!`]")
+    assert (stats.min_duration, stats.max_duration, stats.expected_duration) == (600, 800, 700.0)
+    assert stats.key_events == 6
+    assert (stats.min_characters, stats.max_characters) == (2, 4)
+    assert (stats.peak_held_keys, stats.peak_held_modifiers) == (2, 2)
+
+
+def test_context_wait_state_is_used_not_changed():
+    context = ExecutionContext(seed=1)
+    interpret_events("SET_WAIT[250]", context)
+    stats = analyze_taplang("WAIT[] SET_WAIT[RANDOM[1,3]] WAIT[]", context)
+    assert (stats.min_duration, stats.max_duration) == (251, 253)
+    assert context.default_wait_time == 250 and context.random_wait_range is None
+
+
+if __name__ == "__main__":
+    test_bounds_hold_for_runs()
+    print("✅ Simulated runs stay within the static bounds")
+    test_known_program()
+    print("✅ Known program gives exact bounds")
+    test_context_wait_state_is_used_not_changed()
+    print("✅ Context wait state is read, not modified")
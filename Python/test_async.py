@@ -0,0 +1,95 @@
+"""
+asyncio runner tests
+"""
+
+import asyncio
+import random
+import time
+
+from TapLang import (
+    AsyncBackend, ExecutionContext, compile_taplang, interpret_events, interpret_taplang, run_taplang_async
+)
+from TapLang.events import Event, EventKind, Side
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, instruction, result):
+        self.sent.append(result)
+
+
+class EventRecorder(AsyncBackend):
+    def __init__(self):
+        self.events = []
+        self.flushes = 0
+
+    async def key_down(self, key, side=Side.ANY):
+        self.events.append(Event(EventKind.KEY_DOWN, key, side))
+
+    async def key_up(self, key, side=Side.ANY):
+        self.events.append(Event(EventKind.KEY_UP, key, side))
+
+    async def text(self, text):
+        self.events.append(Event(EventKind.TEXT, text, Side.ANY))
+
+    async def sleep(self, ms):
+        self.events.append(Event(EventKind.SLEEP, ms, Side.ANY))
+
+    async def flush(self):
+        self.flushes += 1
+
+
+def test_events_match_interpret_events():
+    code = ("SET_WAIT[RANDOM[1,20]] PRESS_LEFT[CTRL] CLICK[C] RELEASE[CTRL] WAIT[] WAIT[3] "
+            "TYPE[`FORMAT[RANDOM[a,b,c]]!`] FUNCTION[5]")
+    for layout in (None, 'us'):
+        backend = EventRecorder()
+        result = asyncio.run(run_taplang_async(code, backend, seed=4, time_scale=0, layout=layout))
+        expected = interpret_events(code, seed=4, layout=layout)
+        assert result == {'success': True, 'instructions': 8, 'events': backend, 'seed': 4}
+        assert backend.events == list(expected['events']) and backend.flushes == 1
+    # Waits reach the backend as sleeps
+    assert [event.value for event in backend.events if event.kind == EventKind.SLEEP][1] == 3
+
+    result = asyncio.run(run_taplang_async("PRESS[CTRL]", EventRecorder()))
+    assert not result['success'] and result['error'] == "Unfinished PRESS operations: CTRL"
+
+
+def test_results_match_interpreter():
+    code = "SET_WAIT[RANDOM[1,20]] PRESS[CTRL] CLICK[C] RELEASE[CTRL] WAIT[] WAIT[3] TYPE[`FORMAT[RANDOM[a,b,c]]`]"
+    backend = RecordingBackend()
+    result = asyncio.run(run_taplang_async(code, backend, ExecutionContext(rng=random.Random(3))))
+    expected = interpret_taplang(code, ExecutionContext(rng=random.Random(3)))
+    assert result == expected
+    assert backend.sent == [step for step in expected['results'] if not step.startswith("Waited")]
+
+
+def test_waits_sleep_without_blocking():
+    program = compile_taplang("WAIT[50] CLICK[A] WAIT[50]")
+
+    async def run_sessions():
+        return await asyncio.gather(*(run_taplang_async(program) for _ in range(500)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_sessions())
+    elapsed = time.perf_counter() - start
+    assert all(result['success'] for result in results)
+    assert 0.1 <= elapsed < 2.0  # 500 sessions x 100ms run concurrently
+
+
+def test_errors_are_reported():
+    result = asyncio.run(run_taplang_async("PRESS[CTRL]"))
+    assert not result['success'] and result['error'] == "Unfinished PRESS operations: CTRL"
+
+
+if __name__ == "__main__":
+    test_events_match_interpret_events()
+    print("✅ Async backends receive the events of interpret_events")
+    test_results_match_interpreter()
+    print("✅ Async results match interpret_taplang")
+    test_waits_sleep_without_blocking()
+    print("✅ Concurrent sessions sleep on one event loop")
+    test_errors_are_reported()
+    print("✅ Errors are reported like interpret_taplang")
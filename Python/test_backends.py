@@ -0,0 +1,85 @@
+"""
+Output backend tests
+Runs headlessly: the batch writer is checked through a pipe and a file
+standing in for the input device
+"""
+
+import os
+import tempfile
+
+from TapLang import (
+    interpret_events, execute_instruction, compile_taplang, ExecutionContext,
+    RecorderBackend, BatchWriterBackend
+)
+
+SCRIPT = "PRESS_LEFT[SHIFT] CLICK[A] RELEASE[SHIFT] TYPE[`it's FORMAT[RANDOM[ok]]`] WAIT[20] CLICK[ENTER] FUNCTION[5]"
+
+
+def test_recorder_matches_event_log():
+    backend = RecorderBackend()
+    result = interpret_events(SCRIPT, seed=1, backend=backend)
+    assert result['events'] is backend and backend.flushes == 1
+    assert list(backend) == list(interpret_events(SCRIPT, seed=1)['events'])
+
+
+def test_execute_instruction_dispatches_to_backend():
+    backend = RecorderBackend()
+    context = ExecutionContext()
+    for instruction in compile_taplang("CLICK[B] WAIT[3]"):
+        assert execute_instruction(instruction, context, backend) is None
+    assert backend.render() == ["Key down: B", "Key up: B", "Sleep: 3ms"]
+
+
+def test_batch_writer_through_pipe():
+    read_fd, write_fd = os.pipe()
+    sleeps = []
+    try:
+        backend = BatchWriterBackend(write_fd, sleep=sleeps.append)
+        interpret_events(SCRIPT, backend=backend)
+        assert backend.writes == 2  # One write before WAIT[20], one at the end
+        assert sleeps == [0.02]
+        output = os.read(read_fd, 4096).decode('utf-8')
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+    assert output.splitlines() == [
+        "keydown Shift_L", "keydown a", "keyup a", "keyup Shift_L", "type 'it'\"'\"'s ok'",
+        "keydown Return", "keyup Return", "keydown F5", "keyup F5",
+    ]
+
+
+def test_batch_writer_types_newlines_as_return():
+    read_fd, write_fd = os.pipe()
+    try:
+        with BatchWriterBackend(write_fd, sleep=None) as backend:
+            interpret_events("TYPE[`line1\nline2\n\nend`] CLICK[A]", backend=backend)
+        output = os.read(read_fd, 4096).decode('utf-8')
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+    assert output.splitlines() == [
+        "type line1", "key Return", "type line2", "key Return", "key Return", "type end",
+        "keydown a", "keyup a",
+    ]
+
+
+def test_batch_writer_to_device_file():
+    with tempfile.TemporaryDirectory() as directory:
+        device = os.path.join(directory, 'fake-device')
+        with BatchWriterBackend(device, sleep=None) as backend:
+            interpret_events("PRESS[CTRL] CLICK[C] RELEASE[CTRL]", backend=backend)
+        with open(device) as f:
+            assert f.read() == "keydown ctrl\nkeydown c\nkeyup c\nkeyup ctrl\n"
+
+
+if __name__ == "__main__":
+    test_recorder_matches_event_log()
+    print("✅ Recorder backend records the event stream")
+    test_execute_instruction_dispatches_to_backend()
+    print("✅ execute_instruction dispatches into backends")
+    test_batch_writer_through_pipe()
+    print("✅ Batch writer groups events between sleeps")
+    test_batch_writer_types_newlines_as_return()
+    print("✅ Batch writer types newlines as Return")
+    test_batch_writer_to_device_file()
+    print("✅ Batch writer writes to a device path")
@@ -0,0 +1,66 @@
+"""
+Batch interpretation tests
+"""
+
+from TapLang import interpret_taplang, interpret_many, ExecutionContext
+
+SCRIPTS = [
+    "CLICK[A] CLICK[B]",
+    "PRESS[CTRL] CLICK[C]",          # Unfinished PRESS
+    "SET_WAIT[300] WAIT[]",
+    "WAIT[]",                        # Must not see the SET_WAIT above
+    "CLICK[NOT_A_KEY]",
+    "TYPE[`Hello`] CLICK[ENTER]",
+] * 50
+
+
+def test_ordered_results_match_interpreter():
+    results = list(interpret_many(SCRIPTS, workers=2, chunksize=4, seed=7))
+    assert [result['index'] for result in results] == list(range(len(SCRIPTS)))
+    for code, result in zip(SCRIPTS, results):
+        expected = interpret_taplang(code, seed=f"7:{result['index']}")
+        expected['index'] = result['index']
+        assert result == expected
+
+
+def test_unordered_and_validation_only():
+    results = list(interpret_many(iter(SCRIPTS), workers=2, chunksize=3, simulate=False, ordered=False))
+    assert sorted(result['index'] for result in results) == list(range(len(SCRIPTS)))
+    for result in results:
+        code = SCRIPTS[result['index']]
+        assert result['success'] == interpret_taplang(code, ExecutionContext())['success']
+        assert result['results'] == []
+
+
+def test_input_is_read_as_workers_need_it():
+    read = 0
+
+    def scripts():
+        nonlocal read
+        for code in SCRIPTS * 4:
+            read += 1
+            yield code
+
+    for ordered in (True, False):
+        read = 0
+        results = interpret_many(scripts(), workers=2, chunksize=3, ordered=ordered)
+        next(results)
+        assert read <= 3 * 2 * 4 + 3  # Chunks in flight, plus the one refilled
+        assert len(list(results)) == len(SCRIPTS) * 4 - 1
+
+
+def test_single_worker_runs_in_process():
+    results = list(interpret_many(SCRIPTS[:6], workers=1))
+    assert [result['success'] for result in results] == [True, False, True, True, False, True]
+    assert results[3]['results'] == ["Waited: 0ms (no default set)"]
+
+
+if __name__ == "__main__":
+    test_ordered_results_match_interpreter()
+    print("✅ Ordered results match interpret_taplang")
+    test_unordered_and_validation_only()
+    print("✅ Unordered validation-only results")
+    test_input_is_read_as_workers_need_it()
+    print("✅ Input is read as the workers need it")
+    test_single_worker_runs_in_process()
+    print("✅ Single worker runs in process with isolated errors")
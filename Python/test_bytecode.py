@@ -0,0 +1,100 @@
+"""
+Bytecode file tests
+Round-trips compiled programs through save_bytecode/load_bytecode and
+checks that stale or damaged files are rejected
+"""
+
+import os
+import struct
+import tempfile
+
+from TapLang import BytecodeLibrary, compile_taplang, interpret_events, load_bytecode, save_bytecode
+from TapLang.bytecode import dump_bytecode
+from test_optimizer import scripts
+
+
+def library_programs():
+    programs = {}
+    for index, code in enumerate(scripts(300, 5)):
+        programs[f"plain{index}"] = compile_taplang(code, use_cache=False)
+        programs[f"optimized{index}"] = compile_taplang(code, use_cache=False, optimize=True)
+    return programs
+
+
+def test_round_trip():
+    programs = library_programs()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'macros.tlbc')
+        save_bytecode(programs, path)
+        with load_bytecode(path) as library:
+            assert list(library) == list(programs)
+            for name, program in programs.items():
+                loaded = library[name]
+                assert loaded.source == program.source
+                assert [dict(i) for i in loaded] == [dict(i) for i in program], name
+                for original, restored in zip(program, loaded):
+                    assert (restored.opcode, restored.key, restored.operand, restored.format_spans) == \
+                        (original.opcode, original.key, original.operand, original.format_spans), name
+                assert interpret_events(loaded, seed=3)['events'].render() == \
+                    interpret_events(program, seed=3)['events'].render(), name
+
+
+def test_sources_compile_on_save():
+    library = BytecodeLibrary(dump_bytecode({'greet': "TYPE[`Hi FORMAT[RANDOM[a,b]]`] CLICK[ENTER]"}))
+    assert [i['command'] for i in library['greet']] == ['TYPE', 'CLICK']
+
+
+def test_operands_out_of_range_are_rejected():
+    for source, value in (("WAIT[99999999999999999999]", 99999999999999999999),
+                          ("SET_WAIT[RANDOM[1,99999999999999999999]]", 99999999999999999999)):
+        try:
+            dump_bytecode({'slow': source})
+        except ValueError as e:
+            assert str(e) == (f"Cannot store program 'slow': error in '{source}': "
+                              f"{value} does not fit in a 64-bit operand")
+        else:
+            raise AssertionError("expected ValueError")
+    library = BytecodeLibrary(dump_bytecode({'max': f"WAIT[{(1 << 63) - 1}]"}))
+    assert library['max'].instructions[0].operand == (1 << 63) - 1
+
+
+def test_long_barriers_and_many_format_keys():
+    barrier = '`' * 256
+    many = "TYPE[`" + "FORMAT[X]" * 70000 + "`]"
+    library = BytecodeLibrary(dump_bytecode({'fenced': f"TYPE[{barrier}hello{barrier}]", 'many': many}))
+    assert library['fenced'].instructions[0].barrier_length == 256
+    assert library['fenced'].instructions == compile_taplang(f"TYPE[{barrier}hello{barrier}]").instructions
+    assert library['many'].instructions == compile_taplang(many).instructions
+
+
+def rejected(data):
+    try:
+        BytecodeLibrary(data)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def test_stale_and_damaged_files_are_rejected():
+    data = dump_bytecode({'a': "CLICK[A]"})
+    # Language version field follows the magic and the format version
+    older = data[:6] + b'0.9.0'.ljust(16, b'\0') + data[22:]
+    assert rejected(older).startswith("Stale bytecode: written for TapLang 0.9.0")
+    newer_format = data[:4] + struct.pack('<H', 99) + data[6:]
+    assert rejected(newer_format).startswith("Stale bytecode")
+    assert rejected(b'XXXX' + data[4:]) == "Not a TapLang bytecode file"
+    assert rejected(data[:-1]) == "Truncated TapLang bytecode file"
+    assert rejected(b'') == "Not a TapLang bytecode file"
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    print("✅ Programs round-trip through bytecode files")
+    test_sources_compile_on_save()
+    print("✅ Sources are compiled when saved")
+    test_operands_out_of_range_are_rejected()
+    print("✅ Operands that do not fit in 64 bits are rejected")
+    test_long_barriers_and_many_format_keys()
+    print("✅ Long barriers and many FORMAT keys round-trip")
+    test_stale_and_damaged_files_are_rejected()
+    print("✅ Stale and damaged files are rejected")
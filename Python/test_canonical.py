@@ -0,0 +1,82 @@
+"""
+Canonical form tests
+Scripts differing only in case and spacing must share a canonical form,
+a hash and a compile cache entry, and run the same
+"""
+
+import random
+
+from TapLang import (
+    canonicalize, clear_compile_cache, compile_cache_info, compile_taplang, interpret_taplang, program_hash
+)
+from TapLang.canonical import canonical_token
+from TapLang.parser import tokenize_code
+from test_optimizer import scripts
+
+PAYLOAD_COMMANDS = ('TYPE', 'ESCAPE_TYPE_START', 'ESCAPE_TYPE_END')
+
+
+def vary(code, rng):
+    """Randomize the case outside payloads and the spacing between tokens"""
+    def mixed_case(text):
+        return ''.join(c.upper() if rng.random() < 0.5 else c.lower() for c in text)
+    varied = []
+    for token in tokenize_code(code):
+        bracket = token.index('[')
+        if token[:bracket].upper() in PAYLOAD_COMMANDS:
+            varied.append(mixed_case(token[:bracket]) + token[bracket:])
+        else:
+            varied.append(mixed_case(token))
+    spaces = [' ' * rng.randint(1, 3) for _ in varied]
+    return ' ' * rng.randint(0, 2) + ''.join(token + space for token, space in zip(varied, spaces))
+
+
+def test_variants_share_form_hash_and_results():
+    rng = random.Random(24)
+    for code in scripts(300, 24):
+        variant = vary(code, rng)
+        canonical = canonicalize(code)
+        assert canonicalize(variant) == canonical, (code, variant)
+        assert program_hash(variant) == program_hash(code) == program_hash(canonical)
+        assert canonicalize(canonical) == canonical
+        assert tokenize_code(canonical) == [canonical_token(token) for token in tokenize_code(code)]
+        expected = interpret_taplang(code, seed=3)
+        result = interpret_taplang(variant, seed=3)
+        assert result['success'] and result['results'] == expected['results'], variant
+
+
+def test_payloads_are_kept():
+    assert canonicalize("type[`Hi`]   click[a]") == "TYPE[`Hi`] CLICK[A]"
+    assert canonicalize("escape_type_start[CLICK[a] x] escape_type_end[~]") == \
+        "ESCAPE_TYPE_START[CLICK[a] x] ESCAPE_TYPE_END[~]"
+    assert program_hash("TYPE[`Hi`]") != program_hash("TYPE[`hi`]")
+    assert program_hash("SET_WAIT[015]") != program_hash("SET_WAIT[15]")
+    assert canonicalize("set_wait[random[1,5]]") == "SET_WAIT[RANDOM[1,5]]"
+    assert program_hash("") == program_hash("   ")
+    assert len(program_hash("CLICK[A]")) == 64
+
+
+def test_compile_cache_is_shared():
+    clear_compile_cache()
+    try:
+        program = compile_taplang("CLICK[A] TYPE[`x`]")
+        assert compile_taplang("CLICK[A] TYPE[`x`]") is program
+        # Variants share the instructions but keep their own source
+        for _ in range(2):
+            variant = compile_taplang("click[a]   Type[`x`]")
+            assert variant.instructions is program.instructions
+            assert variant.source == "click[a]   Type[`x`]"
+        assert compile_taplang("CLICK[A] TYPE[`X`]") is not program
+        assert compile_taplang("CLICK[A] TYPE[`x`]", optimize=True) is not program
+        assert compile_cache_info() == (3, 3, 256, 3)
+    finally:
+        clear_compile_cache()
+
+
+if __name__ == "__main__":
+    test_variants_share_form_hash_and_results()
+    print("✅ Case and spacing variants share canonical form, hash and results")
+    test_payloads_are_kept()
+    print("✅ TYPE, escape and SET_WAIT payloads are kept byte for byte")
+    test_compile_cache_is_shared()
+    print("✅ Equivalent sources share a compile cache entry")
@@ -0,0 +1,84 @@
+"""
+Compiled program tests
+Covers compile_taplang, the LRU compile cache and running compiled programs
+"""
+
+from TapLang import (
+    interpret_taplang, parse_taplang, compile_taplang, CompiledProgram,
+    set_compile_cache_size, compile_cache_info, clear_compile_cache
+)
+
+
+def test_compiled_program_matches_parse():
+    code = "PRESS[CTRL] CLICK[C] RELEASE[CTRL] TYPE[`Hi FORMAT[RANDOM[A,B]]`]"
+    program = compile_taplang(code, use_cache=False)
+    assert len(program) == 4
+    assert program.source == code
+    for compiled, parsed in zip(program, parse_taplang(code)):
+        assert compiled['command'] == parsed['command']
+        assert compiled['parameter'] == parsed['parameter']
+    assert program.instructions[3]['format_keys'][0]['content'] == 'RANDOM[A,B]'
+
+
+def test_compiled_program_is_immutable():
+    program = compile_taplang("TYPE[`Hi`]", use_cache=False)
+    for mutate in (lambda: setattr(program, 'source', 'x'),
+                   lambda: program.instructions[0].__setitem__('command', 'CLICK'),
+                   lambda: program.instructions[0]['barrier_info'].__setitem__('content', 'x')):
+        try:
+            mutate()
+        except (AttributeError, TypeError):
+            pass
+        else:
+            assert False, "compiled programs must be read-only"
+
+
+def test_cache_hits_misses_and_eviction():
+    clear_compile_cache()
+    set_compile_cache_size(2)
+    try:
+        first = compile_taplang("CLICK[A]")
+        assert compile_taplang("CLICK[A]") is first
+        compile_taplang("CLICK[B]")
+        compile_taplang("CLICK[C]")  # Evicts CLICK[A]
+        assert compile_taplang("CLICK[A]") is not first
+        assert compile_cache_info() == (1, 4, 2, 2)
+    finally:
+        set_compile_cache_size(256)
+        clear_compile_cache()
+
+
+def test_errors_are_not_cached():
+    clear_compile_cache()
+    try:
+        compile_taplang("PRESS[CTRL]")
+    except ValueError as e:
+        assert str(e) == "Unfinished PRESS operations: CTRL"
+    else:
+        assert False, "compile_taplang should reject unfinished presses"
+    assert compile_cache_info().currsize == 0
+
+
+def test_interpret_compiled_program():
+    program = compile_taplang("TYPE[`FORMAT[RANDOM[A,B,C,D,E,F,G,H]]`] WAIT[5]")
+    assert isinstance(program, CompiledProgram)
+    outputs = set()
+    for _ in range(50):
+        result = interpret_taplang(program)
+        assert result['success'] and result['instructions'] == 2
+        assert result['results'][1] == "Waited: 5ms"
+        outputs.add(result['results'][0])
+    assert len(outputs) > 1  # FORMAT[RANDOM[...]] is drawn on every run
+
+
+if __name__ == "__main__":
+    test_compiled_program_matches_parse()
+    print("✅ Compiled programs match parse_taplang")
+    test_compiled_program_is_immutable()
+    print("✅ Compiled programs are read-only")
+    test_cache_hits_misses_and_eviction()
+    print("✅ Cache counts hits and misses and evicts least recently used")
+    test_errors_are_not_cached()
+    print("✅ Invalid scripts are not cached")
+    test_interpret_compiled_program()
+    print("✅ interpret_taplang runs compiled programs")
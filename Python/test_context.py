@@ -0,0 +1,59 @@
+"""
+Execution context tests
+Checks that sessions with their own ExecutionContext do not share state
+"""
+
+import random
+import threading
+
+from TapLang import interpret_taplang, compile_taplang, reset_wait_state, ExecutionContext
+
+
+def test_contexts_keep_separate_wait_state():
+    first, second = ExecutionContext(), ExecutionContext()
+    interpret_taplang("SET_WAIT[100]", first)
+    interpret_taplang("SET_WAIT[200]", second)
+    assert interpret_taplang("WAIT[]", first)['results'] == ["Waited: 100ms (default)"]
+    assert interpret_taplang("WAIT[]", second)['results'] == ["Waited: 200ms (default)"]
+    reset_wait_state()
+    assert interpret_taplang("WAIT[]")['results'] == ["Waited: 0ms (no default set)"]
+
+
+def test_context_rng_and_held_keys():
+    code = "SET_WAIT[RANDOM[1,1000]] WAIT[] TYPE[`FORMAT[RANDOM[a,b,c,d,e,f]]`] PRESS[CTRL] CLICK[C] RELEASE[CTRL] PRESS[SHIFT] RELEASE[SHIFT]"
+    first = interpret_taplang(code, ExecutionContext(rng=random.Random(42)))
+    second = interpret_taplang(code, ExecutionContext(rng=random.Random(42)))
+    assert first['results'] == second['results']
+
+    context = ExecutionContext()
+    interpret_taplang(compile_taplang("PRESS[CTRL] CLICK[C] RELEASE[CTRL]"), context)
+    assert context.held_keys == set()
+
+
+def test_parallel_sessions():
+    program = compile_taplang("WAIT[] " * 50)
+    failures = []
+
+    def session(wait):
+        context = ExecutionContext()
+        interpret_taplang(f"SET_WAIT[{wait}]", context)
+        for _ in range(20):
+            results = interpret_taplang(program, context)['results']
+            if results != [f"Waited: {wait}ms (default)"] * 50:
+                failures.append(wait)
+
+    threads = [threading.Thread(target=session, args=(wait,)) for wait in range(1, 17)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not failures
+
+
+if __name__ == "__main__":
+    test_contexts_keep_separate_wait_state()
+    print("✅ Contexts keep separate wait state")
+    test_context_rng_and_held_keys()
+    print("✅ Contexts carry their own RNG and held keys")
+    test_parallel_sessions()
+    print("✅ Parallel sessions do not interfere")
@@ -0,0 +1,104 @@
+"""
+Error position and recovery tests
+Checks token spans against the source, that check_taplang reports every
+error with its position, and that its first error is the one
+parse_taplang stops at
+"""
+
+import random
+
+from TapLang import TapLangStreamParser, check_taplang, parse_taplang
+from TapLang.parser import IncrementalTokenizer, tokenize_code
+from test_tokenizer import EXAMPLE_CORPUS
+
+FRAGMENTS = ['[', ']', ' ', '\n', 'a', '`', 'CLICK[A]', 'CLICK[NOPE]', 'PRESS[CTRL]', 'RELEASE[CTRL]',
+             'TYPE[`hi`]', 'TYPE[hi]', 'WAIT[x]', 'FOO[1]', 'ESCAPE_TYPE_START[', 'ESCAPE_TYPE_END[~]']
+
+
+def random_scripts(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ' '.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 10)))
+
+
+def test_spans_locate_tokens():
+    for code in EXAMPLE_CORPUS + list(random_scripts(2000, 0)):
+        spanned = tokenize_code(code, spans=True)
+        assert [token for token, _, _ in spanned] == tokenize_code(code), code
+        for token, start, end in spanned:
+            text = code[start:end]
+            # Tokens split by an escape sequence span the escape sequence too
+            assert text == token or (text.startswith(token[:1]) and text.endswith(token[-1:])), (code, token)
+
+
+def test_chunked_spans_match():
+    rng = random.Random(1)
+    for code in EXAMPLE_CORPUS + list(random_scripts(500, 1)):
+        tokenizer = IncrementalTokenizer(spans=True)
+        tokens = []
+        i = 0
+        while i < len(code):
+            size = rng.randint(1, 5)
+            tokens.extend(tokenizer.feed(code[i:i+size]))
+            i += size
+        tokens.extend(tokenizer.close())
+        assert tokens == tokenize_code(code, spans=True), code
+
+
+def test_first_error_matches_parse_taplang():
+    for code in EXAMPLE_CORPUS + list(random_scripts(2000, 2)):
+        errors = check_taplang(code)
+        try:
+            parse_taplang(code)
+        except ValueError as e:
+            first = errors[0]
+            if first['error'].startswith("Unfinished PRESS"):
+                assert str(e).startswith("Unfinished PRESS"), code
+            elif first['error'].startswith("Unfinished escape"):
+                assert str(e) == first['error'], code
+            else:
+                assert str(e) == f"Error in '{first['token']}': {first['error']}", code
+        else:
+            assert errors == [], code
+
+
+def test_reports_every_error():
+    code = "CLICK[A] CLICK[NOPE] \nFOO[x]  TYPE[hi] \n  RELEASE[ALT] PRESS[SHIFT]"
+    errors = check_taplang(code)
+    assert [(e['token'], e['line'], e['column']) for e in errors] == [
+        ('CLICK[NOPE]', 1, 10),
+        ('FOO[x]', 2, 1),
+        ('TYPE[hi]', 2, 9),
+        ('RELEASE[ALT]', 3, 3),
+        ('PRESS[SHIFT]', 3, 16),
+    ]
+    assert errors[0]['error'] == "Invalid key: NOPE"
+    assert errors[-1]['error'] == "Unfinished PRESS operations: SHIFT"
+    for error in errors:
+        assert code[error['start']:error['end']] == error['token']
+
+
+def test_stream_recovery_matches():
+    rng = random.Random(3)
+    for code in list(random_scripts(500, 3)):
+        parser = TapLangStreamParser(recover=True)
+        i = 0
+        while i < len(code):
+            size = rng.randint(1, 6)
+            parser.feed(code[i:i+size])
+            i += size
+        parser.close()
+        assert parser.errors == check_taplang(code), code
+
+
+if __name__ == "__main__":
+    test_spans_locate_tokens()
+    print("✅ Token spans locate every token in the source")
+    test_chunked_spans_match()
+    print("✅ Chunked tokenizing gives the same spans")
+    test_first_error_matches_parse_taplang()
+    print("✅ First recovered error matches parse_taplang")
+    test_reports_every_error()
+    print("✅ Every error is reported with line and column")
+    test_stream_recovery_matches()
+    print("✅ Streaming recovery matches check_taplang")
@@ -0,0 +1,59 @@
+"""
+Event stream tests
+"""
+
+from TapLang import interpret_events, interpret_taplang, EventLog, EventKind, Side
+from TapLang.instruction import KEY_CODES
+
+
+def test_event_stream():
+    code = ("PRESS_LEFT[SHIFT] CLICK[a] RELEASE[SHIFT] FUNCTION[12] TYPE[`Hi FORMAT[RANDOM[Bob]]`] "
+            "SET_WAIT[40] WAIT[] WAIT[5] ESCAPE_TYPE_START[CLICK[A]] ESCAPE_TYPE_END[~]")
+    result = interpret_events(code, seed=1)
+    assert result['success'] and result['instructions'] == 9
+    assert list(result['events']) == [
+        (EventKind.KEY_DOWN, KEY_CODES['SHIFT'], Side.LEFT),
+        (EventKind.KEY_DOWN, KEY_CODES['A'], Side.ANY),
+        (EventKind.KEY_UP, KEY_CODES['A'], Side.ANY),
+        (EventKind.KEY_UP, KEY_CODES['SHIFT'], Side.LEFT),
+        (EventKind.KEY_DOWN, KEY_CODES['F12'], Side.ANY),
+        (EventKind.KEY_UP, KEY_CODES['F12'], Side.ANY),
+        (EventKind.TEXT, 'Hi Bob', Side.ANY),
+        (EventKind.SLEEP, 40, Side.ANY),
+        (EventKind.SLEEP, 5, Side.ANY),
+        (EventKind.TEXT, 'CLICK[A]', Side.ANY),
+    ]
+    assert result['events'].render()[:2] == ["Key down: left SHIFT", "Key down: A"]
+
+
+def test_events_follow_string_results():
+    code = "SET_WAIT[RANDOM[1,900]] TYPE[`FORMAT[RANDOM[a,b,c]] FORMAT[RANDOM[d,e]]`] WAIT[] WAIT[]"
+    events = interpret_events(code, seed=5)['events']
+    results = interpret_taplang(code, seed=5)['results']
+    assert events[0].value == results[1][len("Typed: '"):-1]
+    assert [f"Waited: {event.value}ms (random)" for event in list(events)[1:]] == results[2:]
+
+
+def test_errors_return_empty_log():
+    result = interpret_events("PRESS[A]")
+    assert not result['success'] and isinstance(result['events'], EventLog) and len(result['events']) == 0
+
+
+def test_waits_beyond_int64():
+    huge = 99999999999999999999
+    result = interpret_events(f"WAIT[{huge}] SET_WAIT[{huge}] WAIT[] WAIT[5]")
+    assert result['success'] and interpret_taplang(f"WAIT[{huge}]")['success']
+    events = result['events']
+    assert [event.value for event in events] == [huge, huge, 5]
+    assert events[-2].value == huge and events.render()[0] == f"Sleep: {huge}ms"
+
+
+if __name__ == "__main__":
+    test_event_stream()
+    print("✅ Typed event stream")
+    test_events_follow_string_results()
+    print("✅ Events carry the same values as result strings")
+    test_errors_return_empty_log()
+    print("✅ Errors return an empty event log")
+    test_waits_beyond_int64()
+    print("✅ Waits beyond int64 are recorded")
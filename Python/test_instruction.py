@@ -0,0 +1,88 @@
+"""
+Compact instruction tests
+Checks that Instruction objects read exactly like the parse_taplang dicts
+"""
+
+import sys
+
+from TapLang import parse_taplang, compile_taplang, interpret_taplang, register_handler, Instruction, Opcode
+from TapLang.instruction import KEY_NAMES
+from test_tokenizer import EXAMPLE_CORPUS
+
+
+def valid_programs():
+    for code in EXAMPLE_CORPUS:
+        try:
+            yield parse_taplang(code)
+        except ValueError:
+            pass
+
+
+def test_dict_view_matches_parse_taplang():
+    for instructions in valid_programs():
+        for parsed in instructions:
+            instruction = Instruction.from_dict(parsed)
+            assert instruction == parsed
+            assert instruction.to_dict() == parsed
+            assert dict(instruction) == parsed
+            assert ('barrier_info' in instruction) == ('barrier_info' in parsed)
+            assert instruction.get('format_keys', []) == parsed.get('format_keys', [])
+
+
+def test_opcodes_and_key_codes():
+    press, click, release = (Instruction.from_dict(i) for i in parse_taplang("PRESS_LEFT[shift] CLICK[a] RELEASE[SHIFT]"))
+    assert press.opcode == Opcode.PRESS_LEFT and press['command'] == 'PRESS_LEFT'
+    assert KEY_NAMES[press.key] == 'SHIFT' and press.key == release.key
+    assert KEY_NAMES[click.key] == 'A'
+    assert press.parameter is release.parameter  # Interned
+    function, wait, set_wait, escape = compile_taplang(
+        "FUNCTION[5] WAIT[5] SET_WAIT[7] ESCAPE_TYPE_START[A] ESCAPE_TYPE_END[~]")
+    assert KEY_NAMES[function.key] == 'F5'
+    assert wait.key is None and set_wait.key is None and escape.key is None
+
+
+def test_instruction_is_smaller_than_dict():
+    parsed = parse_taplang("TYPE[`Hello FORMAT[RANDOM[A,B]]`]")[0]
+    instruction = Instruction.from_dict(parsed)
+    dict_size = sys.getsizeof(parsed) + sys.getsizeof(parsed['barrier_info']) + sys.getsizeof(parsed['format_keys']) \
+        + sum(sys.getsizeof(key) for key in parsed['format_keys'])
+    assert sys.getsizeof(instruction) + sys.getsizeof(instruction.format_spans) < dict_size
+
+
+def test_operands_parsed_at_compile_time():
+    program = compile_taplang("SET_WAIT[RANDOM[100, 200]] WAIT[] WAIT[50] SET_WAIT[5] "
+                              "TYPE[`FORMAT[RANDOM[a, b]] FORMAT[x]`]", use_cache=False)
+    assert [i.operand for i in program] == [(100, 200), None, 50, 5, (('a', 'b'), ' x')]
+
+
+def test_repeated_placeholders_draw_independently():
+    program = compile_taplang("TYPE[`FORMAT[RANDOM[a,b,c,d]]-FORMAT[RANDOM[a,b,c,d]]`]", use_cache=False)
+    assert program.instructions[0].operand == (('a', 'b', 'c', 'd'), '-', ('a', 'b', 'c', 'd'))
+    outputs = {interpret_taplang(program)['results'][0] for _ in range(200)}
+    assert any(output[8] != output[10] for output in outputs)
+    assert all(output[9] == '-' for output in outputs)
+
+
+def test_register_handler():
+    previous = register_handler('click', lambda instruction, context: f"Injected {instruction.parameter}")
+    try:
+        result = interpret_taplang(compile_taplang("CLICK[A] CLICK[ENTER]", use_cache=False))
+        assert result['results'] == ["Injected A", "Injected ENTER"]
+    finally:
+        register_handler(Opcode.CLICK, previous)
+    assert interpret_taplang("CLICK[A]")['results'] == ["Clicked key: A"]
+
+
+if __name__ == "__main__":
+    test_dict_view_matches_parse_taplang()
+    print("✅ Instruction dict view matches parse_taplang")
+    test_opcodes_and_key_codes()
+    print("✅ Opcodes and key codes")
+    test_instruction_is_smaller_than_dict()
+    print("✅ Instruction is smaller than the dict form")
+    test_operands_parsed_at_compile_time()
+    print("✅ Operands are parsed at compile time")
+    test_repeated_placeholders_draw_independently()
+    print("✅ Repeated FORMAT placeholders draw independently")
+    test_register_handler()
+    print("✅ Handlers can be replaced per opcode")
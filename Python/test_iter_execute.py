@@ -0,0 +1,92 @@
+"""
+Lazy execution tests
+Checks iter_execute() and summary mode against interpret_taplang() and
+that summary mode keeps memory flat on long scripts
+"""
+
+import itertools
+import tracemalloc
+
+from TapLang import interpret_events, interpret_taplang, iter_execute
+from test_optimizer import scripts
+
+
+def chunked(code, size):
+    return (code[start:start + size] for start in range(0, len(code), size))
+
+
+def test_matches_interpret_taplang():
+    for code in scripts(300, 11):
+        expected = interpret_taplang(code, seed=8)
+        assert list(iter_execute(code, seed=8)) == expected['results'], code
+        assert list(iter_execute(chunked(code, 7), seed=8)) == expected['results'], code
+        events = interpret_events(code, seed=8, layout='us')['events']
+        assert list(iter_execute(code, seed=8, events=True, layout='us')) == list(events), code
+
+
+def test_results_arrive_before_the_source_ends():
+    # An endless source: only a lazy executor can produce anything
+    steps = iter_execute(itertools.cycle(["CLICK[A] ", "WAIT[1] "]))
+    assert list(itertools.islice(steps, 3)) == ["Clicked key: A", "Waited: 1ms", "Clicked key: A"]
+
+
+def test_errors_raise_after_earlier_steps():
+    steps = iter_execute("CLICK[A] CLICK[NOPE] CLICK[B]")
+    assert next(steps) == "Clicked key: A"
+    try:
+        next(steps)
+    except ValueError as e:
+        assert str(e) == "Error in 'CLICK[NOPE]': Invalid key: NOPE"
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_summary_mode():
+    code = "PRESS[CTRL] CLICK[C] RELEASE[CTRL] " * 10 + "TYPE[`done`]"
+    result = interpret_taplang(code, seed=1, summary=2)
+    assert result == {
+        'success': True,
+        'instructions': 31,
+        'counts': {'CLICK': 10, 'PRESS': 10, 'RELEASE': 10, 'TYPE': 1},
+        'results': ["Released key: CTRL", "Typed: 'done'"],
+        'seed': 1,
+    }
+    for code in scripts(100, 12):
+        full = interpret_taplang(code, seed=2, predraw_random=True)
+        summary = interpret_taplang(code, seed=2, predraw_random=True, summary=3)
+        assert summary['results'] == full['results'][-3:], code
+        assert summary['instructions'] == full['instructions']
+
+    failed = interpret_taplang("CLICK[A] FUNCTION[13] CLICK[B]", summary=5)
+    assert not failed['success'] and failed['error'].startswith("Error in 'FUNCTION[13]'")
+    assert failed['instructions'] == 1 and failed['results'] == ["Clicked key: A"]
+
+
+def summary_peak(repeat):
+    code = "TYPE[`hello FORMAT[RANDOM[a,b]]`] PRESS[SHIFT] CLICK[A] RELEASE[SHIFT] WAIT[2] " * repeat
+    tracemalloc.start()
+    try:
+        result = interpret_taplang(code, seed=5, summary=10)
+        assert result['success'] and result['instructions'] == 5 * repeat
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_summary_memory_is_flat():
+    small = summary_peak(1000)
+    large = summary_peak(6000)
+    assert large < small * 1.5, (small, large)
+
+
+if __name__ == "__main__":
+    test_matches_interpret_taplang()
+    print("✅ iter_execute yields the same steps as interpret_taplang")
+    test_results_arrive_before_the_source_ends()
+    print("✅ Steps are produced while the source is still arriving")
+    test_errors_raise_after_earlier_steps()
+    print("✅ Errors are raised after the steps before them")
+    test_summary_mode()
+    print("✅ Summary mode keeps counts and the last results")
+    test_summary_memory_is_flat()
+    print("✅ Summary mode memory does not grow with the script")
@@ -0,0 +1,65 @@
+"""
+Large TYPE tests
+Checks that TYPE text longer than TEXT_CHUNK_SIZE is rendered and sent
+to sinks in pieces, with FORMAT keys resolved as they are reached
+"""
+
+import tracemalloc
+
+from TapLang import BatchWriterBackend, interpret_events, interpret_taplang, iter_execute
+from TapLang.events import EventKind
+from TapLang.interpreter import TEXT_CHUNK_SIZE
+
+LINE = "for (i = 0; i < n; i++) { total += FORMAT[RANDOM[a,b,c]]; }\n"
+PASTE = f"CLICK[A] TYPE[```{LINE * 40000}```] TYPE[`FORMAT[RANDOM[x,y,z]]`]"
+
+
+class NullWriter:
+    def __init__(self):
+        self.data = []
+
+    def write(self, data):
+        self.data.append(len(data))
+        return len(data)
+
+
+def test_pieces_join_to_the_full_text():
+    expected = interpret_taplang(PASTE, seed=4)['results']
+    events = list(interpret_events(PASTE, seed=4)['events'])
+    texts = [event.value for event in events if event.kind == EventKind.TEXT]
+    assert len(texts) > 2
+    assert all(len(text) <= TEXT_CHUNK_SIZE for text in texts)
+    # The last TYPE draws from the same random state as the unchunked run
+    assert f"Typed: '{''.join(texts[:-1])}'" == expected[1]
+    assert f"Typed: '{texts[-1]}'" == expected[2]
+    streamed = [event.value for event in iter_execute(PASTE, seed=4, events=True)
+                if event.kind == EventKind.TEXT]
+    assert streamed == texts
+
+
+def test_small_text_is_one_event():
+    events = interpret_events("TYPE[`Hi FORMAT[RANDOM[a,b]]`]", seed=1)['events']
+    assert len(events) == 1 and events[0].value in ("Hi a", "Hi b")
+
+
+def test_backend_memory_is_bounded():
+    program = interpret_events(PASTE, seed=1)  # Compile once, outside the measurement
+    assert program['success']
+    writer = NullWriter()
+    tracemalloc.start()
+    try:
+        interpret_events(PASTE, seed=1, backend=BatchWriterBackend(writer, sleep=None))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(writer.data) > 2
+    assert peak < len(PASTE) / 4, peak
+
+
+if __name__ == "__main__":
+    test_pieces_join_to_the_full_text()
+    print("✅ Large TYPE text is emitted in pieces that join to the full text")
+    test_small_text_is_one_event()
+    print("✅ Small TYPE text is still one event")
+    test_backend_memory_is_bounded()
+    print("✅ Emitting a large paste to a backend needs memory for one piece")
@@ -0,0 +1,120 @@
+"""
+Keyboard layout tests
+Checks bulk TYPE expansion against a per-character reference
+"""
+
+import random
+
+from TapLang import KeyboardLayout, get_layout, interpret_events, register_layout
+from TapLang.events import EventLog
+from TapLang.instruction import KEY_CODES
+
+US_SHIFTED = '~!@#$%^&*()_+{}|:"<>?'
+US_BASE = "`1234567890-=[]\\;',./"
+SPECIAL = {' ': 'SPACE', '\n': 'ENTER', '\t': 'TAB'}
+
+
+def reference_expand(text):
+    """One character at a time, shifting each shifted character on its own"""
+    log = EventLog()
+    shift = KEY_CODES['SHIFT']
+    events = []
+    for char in text:
+        if char in SPECIAL:
+            events.append((False, SPECIAL[char]))
+        elif char in US_SHIFTED:
+            events.append((True, US_BASE[US_SHIFTED.index(char)]))
+        elif char.isupper():
+            events.append((True, char))
+        else:
+            events.append((False, char.upper()))
+    for index, (shifted, key) in enumerate(events):
+        if shifted and (index == 0 or not events[index - 1][0]):
+            log.key_down(shift)
+        log.key_down(KEY_CODES[key])
+        log.key_up(KEY_CODES[key])
+        if shifted and (index == len(events) - 1 or not events[index + 1][0]):
+            log.key_up(shift)
+    return log
+
+
+class CallSink:
+    def __init__(self):
+        self.log = EventLog()
+
+    def key_down(self, key, side=0):
+        self.log.key_down(key, side)
+
+    def key_up(self, key, side=0):
+        self.log.key_up(key, side)
+
+
+def test_matches_reference():
+    alphabet = 'abcXYZ019 \n\t' + US_SHIFTED + US_BASE
+    rng = random.Random(0)
+    layout = get_layout('us')
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        expected = list(reference_expand(text))
+        assert list(layout.expand(text)) == expected, repr(text)
+        sink = CallSink()
+        layout.expand_into(text, sink)
+        assert list(sink.log) == expected, repr(text)
+
+
+def test_shift_runs_are_grouped():
+    assert get_layout().expand("AB!c").render() == [
+        'Key down: SHIFT', 'Key down: A', 'Key up: A', 'Key down: B', 'Key up: B',
+        'Key down: 1', 'Key up: 1', 'Key up: SHIFT', 'Key down: C', 'Key up: C']
+
+
+def test_unknown_characters_fail():
+    try:
+        get_layout().expand("café")
+    except ValueError as e:
+        assert str(e) == "Cannot type 'é' with keyboard layout us"
+    else:
+        raise AssertionError("expected ValueError")
+    # Digits and control characters are not special to the check
+    tiny = KeyboardLayout('tiny', {'a': ('A', False), 'b': ('B', True)})
+    for text, missing in (("a0", '0'), ("b1", '1'), ("a\x00", '\x00'), ("\x01b", '\x01')):
+        try:
+            tiny.expand(text)
+        except ValueError as e:
+            assert str(e) == f"Cannot type {missing!r} with keyboard layout tiny"
+        else:
+            raise AssertionError(f"expected ValueError for {text!r}")
+
+
+def test_layouts_are_cached_and_pluggable():
+    assert get_layout('us') is get_layout('us')
+    built = []
+
+    def numpad():
+        built.append(1)
+        return KeyboardLayout('digits', {str(d): (str(d), False) for d in range(10)})
+
+    register_layout('digits', numpad)
+    assert get_layout('digits') is get_layout('digits') and built == [1]
+    assert get_layout('digits').expand('42').render() == [
+        'Key down: 4', 'Key up: 4', 'Key down: 2', 'Key up: 2']
+
+
+def test_interpret_events_with_layout():
+    result = interpret_events("TYPE[`Hi FORMAT[RANDOM[x,y]]`] CLICK[ENTER]", seed=3, layout='us')
+    plain = interpret_events("TYPE[`Hi FORMAT[RANDOM[x,y]]`] CLICK[ENTER]", seed=3)
+    typed = plain['events'][0].value
+    assert result['events'].render() == get_layout().expand(typed).render() + ['Key down: ENTER', 'Key up: ENTER']
+
+
+if __name__ == "__main__":
+    test_matches_reference()
+    print("✅ Bulk expansion matches the per-character reference")
+    test_shift_runs_are_grouped()
+    print("✅ SHIFT is held once per run of shifted characters")
+    test_unknown_characters_fail()
+    print("✅ Characters missing from the layout are rejected")
+    test_layouts_are_cached_and_pluggable()
+    print("✅ Layouts are cached and can be registered")
+    test_interpret_events_with_layout()
+    print("✅ interpret_events expands TYPE through a layout")
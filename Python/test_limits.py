@@ -0,0 +1,203 @@
+"""
+Resource limit tests
+Scripts over a ResourceLimits fail with a specific ResourceLimitError as
+soon as the limit is crossed; scripts within the limits run unchanged
+"""
+
+import asyncio
+import itertools
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from TapLang import (
+    RecorderBackend, ResourceLimitError, ResourceLimits, TapLangStreamParser, clear_compile_cache,
+    compile_taplang, execute_instruction, interpret_events, interpret_many, interpret_taplang,
+    iter_execute, parse_taplang, run_taplang_async
+)
+from TapLang.events import EventKind
+from test_optimizer import scripts
+
+LIMITS = ResourceLimits(max_source_length=200, max_instructions=3, max_type_characters=10,
+                        max_format_depth=2, max_random_options=3, max_wait_time=1000)
+
+
+def limit_of(code, limits=LIMITS):
+    try:
+        parse_taplang(code, limits=limits)
+    except ResourceLimitError as e:
+        return e.limit, str(e)
+    return None
+
+
+def test_each_limit():
+    assert limit_of("CLICK[A] " * 30) == ('max_source_length', "Source is longer than 200 characters")
+    assert limit_of("CLICK[A] CLICK[B] CLICK[C] CLICK[D]") == ('max_instructions', "More than 3 instructions")
+    assert limit_of("TYPE[`hello`] TYPE[`world!`]") == \
+        ('max_type_characters', "More than 10 characters of TYPE text")
+    assert limit_of("ESCAPE_TYPE_START[hello world] ESCAPE_TYPE_END[~]")[0] == 'max_type_characters'
+    assert limit_of("TYPE[`FORMAT[RANDOM[a,FORMAT[b]]]`]") == \
+        ('max_format_depth', "FORMAT nested deeper than 2 levels")
+    assert limit_of("TYPE[`FORMAT[RANDOM[a,b,c,d]]`]") == \
+        ('max_random_options', "RANDOM with more than 3 options")
+    assert limit_of("ESCAPE_TYPE_START[RANDOM[a,b,c,d]] ESCAPE_TYPE_END[~]")[0] == 'max_random_options'
+    assert limit_of("WAIT[999999999]") == ('max_wait_time', "Total wait time exceeds 1000ms")
+    assert limit_of("TYPE[`FORMAT[X]`] WAIT[600] WAIT[400]") is None
+    assert limit_of("TYPE[`FORMAT[RANDOM[a,b,c]]`]", LIMITS._replace(max_type_characters=None)) is None
+    assert limit_of("CLICK[A] " * 30, ResourceLimits()) is None
+
+
+def test_limit_is_reached_before_later_errors():
+    # The fifth instruction is invalid, but the limit is crossed first
+    assert limit_of("CLICK[A] CLICK[B] CLICK[C] CLICK[D] CLICK[NOPE]")[0] == 'max_instructions'
+    try:
+        parse_taplang("CLICK[NOPE] CLICK[B] CLICK[C] CLICK[D]", limits=LIMITS)
+    except ResourceLimitError:
+        raise AssertionError("expected the invalid key error")
+    except ValueError as e:
+        assert str(e) == "Error in 'CLICK[NOPE]': Invalid key: NOPE"
+
+
+def test_runtime_waits():
+    code = "SET_WAIT[600] CLICK[A] WAIT[] CLICK[B] WAIT[]"
+    limits = LIMITS._replace(max_instructions=None)
+    result = interpret_taplang(code, seed=1, limits=limits)
+    assert result == {'success': False, 'error': "Total wait time exceeds 1000ms",
+                      'instructions': 0, 'results': [], 'seed': 1}
+    # The backend never sleeps for the wait that crosses the limit
+    backend = RecorderBackend()
+    result = interpret_events(code, backend=backend, limits=limits)
+    assert not result['success']
+    assert [event.value for event in backend if event.kind == EventKind.SLEEP] == [600]
+    summary = interpret_taplang(code, limits=limits, summary=1)
+    assert summary['instructions'] == 4 and summary['results'] == ["Clicked key: B"]
+    result = asyncio.run(run_taplang_async(code, time_scale=0, limits=limits))
+    assert result['error'] == "Total wait time exceeds 1000ms"
+    # Limits only last for their run
+    assert interpret_taplang(code)['success']
+
+
+def test_limits_stay_in_their_run():
+    # Interleaved runs on the shared default context
+    limited = iter_execute("WAIT[10] CLICK[A]", limits=ResourceLimits(max_wait_time=15))
+    next(limited)
+    unlimited = iter_execute("CLICK[A] CLICK[B]")
+    next(unlimited)
+    list(limited)
+    list(unlimited)
+    assert execute_instruction(parse_taplang("WAIT[10]")[0]) == "Waited: 10ms"
+
+    # Concurrent runs, half of them over their limit
+    def run(i):
+        limits = ResourceLimits(max_wait_time=50) if i % 2 else None
+        return interpret_taplang("WAIT[20] " * 5, limits=limits)['success']
+
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(run, range(64))) == [i % 2 == 0 for i in range(64)]
+    assert execute_instruction(parse_taplang("WAIT[10]")[0]) == "Waited: 10ms"
+
+
+def test_streamed_sources_fail_early():
+    endless_text = itertools.chain(["TYPE[```"], itertools.repeat("x" * 1000))
+    steps = iter_execute(endless_text, limits=ResourceLimits(max_source_length=100000))
+    try:
+        next(steps)
+    except ResourceLimitError as e:
+        assert e.limit == 'max_source_length' and e.maximum == 100000
+    else:
+        raise AssertionError("expected ResourceLimitError")
+
+    endless_clicks = iter_execute(itertools.cycle(["CLICK[A] "]), limits=ResourceLimits(max_instructions=50))
+    assert len(list(itertools.islice(endless_clicks, 50))) == 50
+    try:
+        next(endless_clicks)
+    except ResourceLimitError as e:
+        assert e.limit == 'max_instructions'
+    else:
+        raise AssertionError("expected ResourceLimitError")
+
+    parser = TapLangStreamParser(recover=True, limits=ResourceLimits(max_instructions=1))
+    try:
+        parser.feed("CLICK[NOPE] CLICK[A] CLICK[B] ")
+    except ResourceLimitError:
+        assert len(parser.errors) == 1
+    else:
+        raise AssertionError("expected ResourceLimitError")
+
+
+def test_long_type_fails_before_it_completes():
+    limits = ResourceLimits(max_type_characters=1000)
+    for code in ("TYPE[```" + "x" * 2000000 + "```]", "ESCAPE_TYPE_START[" + "x" * 2000000 + "] ESCAPE_TYPE_END[~]"):
+        tracemalloc.start()
+        try:
+            assert limit_of(code, limits)[0] == 'max_type_characters'
+            # Far less than the text, which is never joined into one token
+            assert tracemalloc.get_traced_memory()[1] < 1000000
+        finally:
+            tracemalloc.stop()
+
+    fed = 0
+    parser = TapLangStreamParser(limits=limits)
+    try:
+        for chunk in itertools.chain(["TYPE[`"], itertools.repeat("y" * 7)):
+            parser.feed(chunk)
+            fed += len(chunk)
+    except ResourceLimitError as e:
+        assert e.limit == 'max_type_characters' and fed < 1100
+    else:
+        raise AssertionError("expected ResourceLimitError")
+    assert limit_of("TYPE[`" + "y" * 1000 + "`]", limits) is None
+
+
+def test_results_within_limits_are_unchanged():
+    generous = ResourceLimits(10 ** 6, 10 ** 6, 10 ** 6, 10, 100, 10 ** 9)
+    for code in scripts(200, 25):
+        expected = interpret_taplang(code, seed=6)
+        assert interpret_taplang(code, seed=6, limits=generous) == expected, code
+        assert list(iter_execute(code, seed=6, limits=generous)) == expected['results']
+
+
+def test_compile_cache_is_per_limits():
+    clear_compile_cache()
+    try:
+        code = "CLICK[A] CLICK[B] CLICK[C] CLICK[D]"
+        program = compile_taplang(code)
+        try:
+            compile_taplang(code, limits=LIMITS)
+        except ResourceLimitError:
+            pass
+        else:
+            raise AssertionError("a cached program bypassed the limits")
+        limited = compile_taplang(code, limits=ResourceLimits(max_instructions=4))
+        assert limited is not program and len(limited) == 4
+        assert compile_taplang(code.lower(), limits=ResourceLimits(max_instructions=4)).instructions is limited.instructions
+    finally:
+        clear_compile_cache()
+
+
+def test_batch_fails_only_the_bad_script():
+    batch = ["CLICK[A] WAIT[10]", "WAIT[999999999]", "TYPE[`" + "x" * 500 + "`]", "TYPE[`ok`]"]
+    results = list(interpret_many(batch, workers=1, limits=LIMITS))
+    assert [result['success'] for result in results] == [True, False, False, True]
+    assert results[1]['error'] == "Total wait time exceeds 1000ms"
+    assert results[2]['error'] == "Source is longer than 200 characters"
+
+
+if __name__ == "__main__":
+    test_each_limit()
+    print("✅ Every limit fails with its own error")
+    test_limit_is_reached_before_later_errors()
+    print("✅ Limits are checked in source order with other errors")
+    test_runtime_waits()
+    print("✅ Waits are counted while running, before any sleep")
+    test_limits_stay_in_their_run()
+    print("✅ Limits never leak into other runs on the same context")
+    test_streamed_sources_fail_early()
+    print("✅ Streamed sources fail as soon as a limit is crossed")
+    test_long_type_fails_before_it_completes()
+    print("✅ A TYPE over the limit fails before it is complete")
+    test_results_within_limits_are_unchanged()
+    print("✅ Scripts within the limits run unchanged")
+    test_compile_cache_is_per_limits()
+    print("✅ Compiled programs are cached per limits")
+    test_batch_fails_only_the_bad_script()
+    print("✅ A batch fails only the script over its limits")
@@ -0,0 +1,105 @@
+"""
+Peephole optimizer equivalence tests
+Runs scripts with and without optimization and checks that the key events
+typed through the US layout, the random draws and the timing are the same
+"""
+
+import random
+
+from TapLang import ExecutionContext, analyze_taplang, compile_taplang, interpret_events, optimize_instructions
+from TapLang.events import EventKind
+from test_tokenizer import EXAMPLE_CORPUS
+
+FRAGMENTS = [
+    "CLICK[A]", "CLICK[z]", "CLICK[SPACE]", "CLICK[1]", "CLICK[!]", "CLICK[ENTER]", "CLICK[`]",
+    "WAIT[5]", "WAIT[0]", "WAIT[]", "SET_WAIT[RANDOM[1,9]]", "SET_WAIT[3]",
+    "TYPE[`x FORMAT[RANDOM[a,b]]`]", "ESCAPE_TYPE_START[RANDOM[p,q]] ESCAPE_TYPE_END[~]",
+    "PRESS[CTRL] CLICK[C] RELEASE[CTRL]",
+    "PRESS_LEFT[SHIFT] PRESS[ALT] FUNCTION[4] RELEASE[ALT] RELEASE[SHIFT]",
+    "PRESS_RIGHT[CTRL] PRESS[SHIFT] CLICK[Z] RELEASE[CTRL] RELEASE[SHIFT]",
+    "PRESS[SHIFT] CLICK[A] CLICK[B] RELEASE[SHIFT]",
+    "PRESS[A] CLICK[B] CLICK[C] RELEASE[A]",
+    "CLICK[!] CLICK[A] CLICK[~] CLICK[9] CLICK[;] CLICK[-]",
+    "ESCAPE_TYPE_START[CLICK[A] CLICK[B]] ESCAPE_TYPE_END[~]",
+]
+
+
+def scripts(count, seed):
+    rng = random.Random(seed)
+    for code in EXAMPLE_CORPUS:
+        try:
+            compile_taplang(code)
+        except ValueError:
+            continue
+        yield code
+    for _ in range(count):
+        yield ' '.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+
+
+def observable(log):
+    """Reduce events to what the keyboard produces: adjacent sleeps are merged"""
+    output = []
+    for event in log:
+        if output and event.kind == EventKind.SLEEP and output[-1].kind == EventKind.SLEEP:
+            output[-1] = output[-1]._replace(value=output[-1].value + event.value)
+        else:
+            output.append(event)
+    return output
+
+
+def run(program, seed):
+    """Return the key events of a run typed through the US layout and the next random draw"""
+    context = ExecutionContext(seed=seed)
+    result = interpret_events(program, context, layout='us')
+    if not result['success']:
+        # Text the layout cannot type fails both programs the same way
+        return result['error'], context.rng.random()
+    return observable(result['events']), context.rng.random()
+
+
+def test_optimized_runs_are_equivalent():
+    for code in scripts(3000, 0):
+        plain = compile_taplang(code, use_cache=False)
+        optimized = compile_taplang(code, use_cache=False, optimize=True)
+        assert len(optimized) <= len(plain)
+        for seed in range(3):
+            # Same output and the RNG left in the same state
+            assert run(optimized, seed) == run(plain, seed), code
+
+
+def test_duration_bounds_are_unchanged():
+    for code in scripts(500, 1):
+        plain = analyze_taplang(compile_taplang(code, use_cache=False))
+        optimized = analyze_taplang(compile_taplang(code, use_cache=False, optimize=True))
+        # Folded CLICKs count as typed characters instead of key events
+        assert plain[:3] == optimized[:3], code
+        assert plain.peak_held_modifiers == optimized.peak_held_modifiers, code
+
+
+def test_rewrites():
+    program = compile_taplang("CLICK[H] CLICK[I] CLICK[SPACE] WAIT[10] WAIT[20] WAIT[] "
+                              "PRESS[CTRL] PRESS_LEFT[SHIFT] CLICK[T] RELEASE[SHIFT] RELEASE[CTRL] "
+                              "PRESS[ALT] FUNCTION[4] RELEASE[ALT] CLICK[ENTER]", optimize=True)
+    assert [(i['command'], i['parameter']) for i in program] == [
+        ('TYPE', '`hi `'), ('WAIT', '30'), ('WAIT', ''),
+        ('CHORD', 'CTRL+LEFT_SHIFT+T'), ('CHORD', 'ALT+F4'), ('CLICK', 'ENTER')]
+    assert program.instructions[0]['original'] == "CLICK[H] CLICK[I] CLICK[SPACE]"
+
+
+def test_held_keys_block_folding():
+    instructions = [{'command': 'PRESS', 'parameter': 'CTRL'},
+                    {'command': 'CLICK', 'parameter': 'C'},
+                    {'command': 'CLICK', 'parameter': 'V'},
+                    {'command': 'RELEASE', 'parameter': 'CTRL'}]
+    assert optimize_instructions(instructions) == instructions
+
+
+if __name__ == "__main__":
+    test_optimized_runs_are_equivalent()
+    print("✅ Optimized runs produce the same output and random draws")
+    test_duration_bounds_are_unchanged()
+    print("✅ Duration bounds are unchanged by optimization")
+    test_rewrites()
+    print("✅ WAIT, CLICK and chord runs are rewritten")
+    test_held_keys_block_folding()
+    print("✅ CLICKs under a held key are not folded")
@@ -0,0 +1,73 @@
+"""
+Parallel parsing tests
+parse_taplang_parallel() must return exactly what parse_taplang() returns
+and fail with exactly the same error, wherever the chunks are split
+"""
+
+import random
+
+from TapLang import parse_taplang, parse_taplang_parallel
+from TapLang.parallel import split_points
+from test_optimizer import FRAGMENTS, scripts
+
+# Fragments that put split candidates inside TYPE bodies and escape sequences
+TRICKY = [
+    "TYPE[`a] CLICK[b] c`]",
+    "TYPE[```x FORMAT[RANDOM[p,q]] WAIT[5] y```]",
+    "ESCAPE_TYPE_START[PRESS[SHIFT] CLICK[A]] ESCAPE_TYPE_END[~]",
+    "ESCAPE_TYPE_START[x] CLICK[A]",
+    "PRESS[CTRL]", "RELEASE[CTRL]", "PRESS[ALT]", "RELEASE[ALT]",
+]
+INVALID = ["CLICK[NOPE]", "FUNCTION[13]", "TYPE[oops]", "ESCAPE_TYPE_END[~]", "WAIT[x]", "BOGUS[1]", "CLICK[A"]
+
+
+def outcome(parse, code, **kwargs):
+    try:
+        return parse(code, **kwargs)
+    except ValueError as e:
+        return str(e)
+
+
+def test_matches_serial_parser():
+    code = ' '.join(scripts(400, 21))
+    expected = parse_taplang(code)
+    for chunk_size in (1, 40, 500, 1 << 20):
+        assert parse_taplang_parallel(code, workers=1, chunk_size=chunk_size) == expected
+    assert parse_taplang_parallel(code, workers=2, chunk_size=2000) == expected
+
+
+def test_random_scripts_and_errors():
+    rng = random.Random(4)
+    fragments = FRAGMENTS + TRICKY + INVALID
+    for _ in range(1500):
+        code = ' '.join(rng.choice(fragments) for _ in range(rng.randint(0, 30)))
+        expected = outcome(parse_taplang, code)
+        chunk_size = rng.choice([1, 5, 20, 80])
+        assert outcome(parse_taplang_parallel, code, workers=1, chunk_size=chunk_size) == expected, code
+
+
+def test_held_keys_across_seams():
+    code = "PRESS[CTRL] " + "CLICK[A] " * 50 + "PRESS[CTRL] RELEASE[CTRL]"
+    assert outcome(parse_taplang_parallel, code, workers=1, chunk_size=30) == \
+        "Error in 'PRESS[CTRL]': Key CTRL is already pressed"
+    code = "PRESS[SHIFT] " + "CLICK[A] " * 50
+    assert outcome(parse_taplang_parallel, code, workers=1, chunk_size=30) == \
+        "Unfinished PRESS operations: SHIFT"
+
+
+def test_split_points():
+    code = "CLICK[A] TYPE[`x y`] CLICK[B] CLICK[C]"
+    points = split_points(code, 5)
+    assert points == [9, 21, 30]
+    assert all(code[point - 2:point] == '] ' for point in points)
+
+
+if __name__ == "__main__":
+    test_matches_serial_parser()
+    print("✅ Parallel parsing matches parse_taplang")
+    test_random_scripts_and_errors()
+    print("✅ Random scripts give the same instructions or the same error")
+    test_held_keys_across_seams()
+    print("✅ Held keys are checked across chunk seams")
+    test_split_points()
+    print("✅ Split points follow a closing bracket")
@@ -0,0 +1,79 @@
+"""
+Seeded RNG tests
+Checks replay by seed and that pre-drawn randomness matches sequential runs
+"""
+
+import random
+
+from TapLang import interpret_taplang, compile_taplang, register_handler, reset_wait_state, ExecutionContext
+from TapLang.instruction import Opcode
+from TapLang.interpreter import _default_context
+from TapLang.rng import PredrawnRandom, draw_sizes
+
+RANDOM_SCRIPT = ("SET_WAIT[RANDOM[10,5000]] WAIT[] TYPE[`FORMAT[RANDOM[a,b,c]] x FORMAT[RANDOM[1,2,3,4,5,6,7,8,9]]`] "
+                 "WAIT[] ESCAPE_TYPE_START[RANDOM[p,q,r]] ESCAPE_TYPE_END[~] SET_WAIT[100] WAIT[] "
+                 "SET_WAIT[RANDOM[1,3]] WAIT[] WAIT[7]")
+
+
+def test_seed_replays_run():
+    first = interpret_taplang(RANDOM_SCRIPT, seed=1234)
+    assert first['seed'] == 1234
+    assert interpret_taplang(RANDOM_SCRIPT, seed=1234) == first
+    assert interpret_taplang(RANDOM_SCRIPT, seed=1235)['results'] != first['results']
+
+
+def test_unseeded_context_records_its_seed():
+    result = interpret_taplang(RANDOM_SCRIPT, ExecutionContext())
+    assert interpret_taplang(RANDOM_SCRIPT, seed=result['seed']) == result
+    # The shared default context is reseeded for every run
+    first, second = interpret_taplang(RANDOM_SCRIPT), interpret_taplang(RANDOM_SCRIPT)
+    assert first['seed'] != second['seed']
+    assert interpret_taplang(RANDOM_SCRIPT, seed=first['seed'])['results'] == first['results']
+    assert interpret_taplang(RANDOM_SCRIPT, summary=3)['seed'] != second['seed']
+
+
+def test_draw_sizes():
+    program = compile_taplang(RANDOM_SCRIPT)
+    assert draw_sizes(program) == [4991, 3, 9, 4991, 3, 3]
+    assert draw_sizes(compile_taplang("WAIT[]"), (1, 10)) == [10]
+
+
+def test_predrawn_run_matches_sequential_run():
+    program = compile_taplang(RANDOM_SCRIPT)
+    for seed in range(50):
+        sequential = interpret_taplang(program, seed=seed)
+        assert interpret_taplang(program, seed=seed, predraw_random=True) == sequential
+
+    # WAIT[] draws from a SET_WAIT range left in the context by an earlier run
+    contexts = [ExecutionContext(rng=random.Random(9)) for _ in range(2)]
+    for context in contexts:
+        interpret_taplang("SET_WAIT[RANDOM[1,100]]", context)
+    sequential = interpret_taplang("WAIT[] WAIT[]", contexts[0])
+    assert interpret_taplang("WAIT[] WAIT[]", contexts[1], predraw_random=True) == sequential
+
+
+def test_predrawn_rng_stays_in_its_run():
+    # The shared default context keeps its RNG while a pre-drawn run is in progress
+    seen = []
+    previous = register_handler(Opcode.CLICK, lambda instruction, context: seen.append(
+        (type(context.rng), _default_context.rng)))
+    try:
+        interpret_taplang("SET_WAIT[RANDOM[1,5]] CLICK[A] WAIT[]", predraw_random=True)
+    finally:
+        register_handler(Opcode.CLICK, previous)
+    assert seen == [(PredrawnRandom, _default_context.rng)]
+    assert _default_context.random_wait_range is not None  # Wait state still reaches the context
+    reset_wait_state()
+
+
+if __name__ == "__main__":
+    test_seed_replays_run()
+    print("✅ Same seed replays the same run")
+    test_unseeded_context_records_its_seed()
+    print("✅ Unseeded contexts and default runs record their seed")
+    test_draw_sizes()
+    print("✅ Draw sizes follow SET_WAIT state")
+    test_predrawn_run_matches_sequential_run()
+    print("✅ Pre-drawn runs match sequential runs")
+    test_predrawn_rng_stays_in_its_run()
+    print("✅ Pre-drawn RNG never replaces a shared context's RNG")
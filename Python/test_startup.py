@@ -0,0 +1,65 @@
+"""
+Import-time and lazy loading tests
+"""
+
+import os
+import subprocess
+import sys
+
+import TapLang
+from TapLang import data
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def loaded_after(code):
+    """Return the modules a fresh interpreter has loaded after running code"""
+    script = f"import sys; {code}; print(' '.join(sorted(sys.modules)))"
+    output = subprocess.check_output([sys.executable, "-c", script], cwd=HERE, text=True)
+    return set(output.split())
+
+
+def test_import_is_lazy():
+    modules = loaded_after("import TapLang")
+    for name in ('asyncio', 'multiprocessing', 'TapLang.interpreter', 'TapLang.batch'):
+        assert name not in modules, name
+
+
+def test_interpreter_does_not_load_engines():
+    modules = loaded_after("from TapLang import interpret_taplang")
+    assert 'TapLang.interpreter' in modules
+    for name in ('asyncio', 'multiprocessing', 'hashlib',
+                 'TapLang.optimizer', 'TapLang.layouts', 'TapLang.canonical'):
+        assert name not in modules, name
+
+
+def test_exports_resolve():
+    for name in TapLang.__all__:
+        assert getattr(TapLang, name) is not None, name
+    assert set(TapLang.__all__) <= set(dir(TapLang))
+    try:
+        TapLang.no_such_name
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("expected AttributeError")
+
+
+def test_spec_tables():
+    spec = data.get_spec()
+    assert data.SPEC is spec
+    assert spec['language']['version'] == data.LANGUAGE_VERSION
+    assert data.VALID_INSTRUCTIONS == frozenset(spec['instructions'])
+    assert data.VALID_KEYS == frozenset(key.upper() for keys in spec['keys'].values() for key in keys)
+    assert list(spec['keys']['function_keys']) == list(data.FUNCTION_KEYS)
+
+
+if __name__ == "__main__":
+    test_import_is_lazy()
+    print("✅ import TapLang loads no submodules")
+    test_interpreter_does_not_load_engines()
+    print("✅ Interpreter import skips engines, the optimizer and layouts")
+    test_exports_resolve()
+    print("✅ Lazy exports resolve")
+    test_spec_tables()
+    print("✅ Frozen tables match the spec")
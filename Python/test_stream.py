@@ -0,0 +1,105 @@
+"""
+Streaming parser tests
+Feeds scripts to TapLangStreamParser in small chunks and compares the
+result with parse_taplang on the whole script
+"""
+
+import random
+
+from TapLang import TapLangStreamParser, parse_taplang
+from TapLang.parser import _PIECE_SIZE, IncrementalTokenizer, tokenize_code
+from test_tokenizer import EXAMPLE_CORPUS
+
+
+def stream_parse(code, chunk_sizes):
+    parser = TapLangStreamParser()
+    instructions = []
+    i = 0
+    while i < len(code):
+        size = next(chunk_sizes)
+        instructions.extend(parser.feed(code[i:i+size]))
+        i += size
+    instructions.extend(parser.close())
+    return instructions
+
+
+def parse_outcome(parse):
+    try:
+        return parse()
+    except ValueError as e:
+        return str(e)
+
+
+def test_tokens_match_whole_source():
+    rng = random.Random(0)
+    for code in EXAMPLE_CORPUS:
+        for _ in range(20):
+            tokenizer = IncrementalTokenizer()
+            tokens = []
+            i = 0
+            while i < len(code):
+                size = rng.randint(1, 5)
+                tokens.extend(tokenizer.feed(code[i:i+size]))
+                i += size
+            tokens.extend(tokenizer.close())
+            assert tokens == tokenize_code(code), code
+
+
+def test_long_tokens_in_small_chunks():
+    body = "x FORMAT[RANDOM[a,b]] y\n" * 3000
+    code = f"CLICK[A] TYPE[```{body}```] ESCAPE_TYPE_START[{body}] ESCAPE_TYPE_END[{body}] CLICK[B]"
+    for spans in (False, True):
+        tokenizer = IncrementalTokenizer(spans)
+        tokens = []
+        for i in range(0, len(code), 7):
+            tokens.extend(tokenizer.feed(code[i:i+7]))
+            # Scanned text of the open token is kept as pieces, not re-copied on every feed
+            assert len(tokenizer._buffer) < 2 * _PIECE_SIZE
+        tokens.extend(tokenizer.close())
+        assert tokens == tokenize_code(code, spans)
+
+
+def test_instructions_match_parse_taplang():
+    rng = random.Random(1)
+    sizes = iter(lambda: rng.randint(1, 4), None)
+    for code in EXAMPLE_CORPUS:
+        expected = parse_outcome(lambda: parse_taplang(code))
+        assert parse_outcome(lambda: stream_parse(code, sizes)) == expected, code
+
+
+def test_instructions_arrive_early():
+    parser = TapLangStreamParser()
+    assert parser.feed("PRESS[CTRL] CLI") == [
+        {'command': 'PRESS', 'parameter': 'CTRL', 'original': 'PRESS[CTRL]'}]
+    assert parser.held_keys == {'CTRL'}
+    assert [i['command'] for i in parser.feed("CK[C] ESCAPE_TYPE_START[CLICK[A] x]")] == ['CLICK']
+    assert parser.feed(" ESCAPE_TYPE_END[~] RELEASE[CTRL]") == [{
+        'command': 'TYPE',
+        'parameter': 'CLICK[A] x',
+        'original': 'ESCAPE_TYPE_START[CLICK[A] x] ESCAPE_TYPE_END[~]'
+    }]
+    assert [i['command'] for i in parser.close()] == ['RELEASE']
+
+
+def test_unfinished_press_fails_on_close():
+    parser = TapLangStreamParser()
+    parser.feed("PRESS[SHIFT] CLICK[A] ")
+    try:
+        parser.close()
+    except ValueError as e:
+        assert str(e) == "Unfinished PRESS operations: SHIFT"
+    else:
+        assert False, "close() should fail with SHIFT still held"
+
+
+if __name__ == "__main__":
+    test_tokens_match_whole_source()
+    print("✅ Chunked tokenizing matches tokenize_code")
+    test_long_tokens_in_small_chunks()
+    print("✅ Long tokens fed in small chunks keep the buffer short")
+    test_instructions_match_parse_taplang()
+    print("✅ Chunked parsing matches parse_taplang")
+    test_instructions_arrive_early()
+    print("✅ Instructions are returned as soon as their token is complete")
+    test_unfinished_press_fails_on_close()
+    print("✅ Unfinished PRESS is reported by close()")
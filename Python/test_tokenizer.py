@@ -0,0 +1,136 @@
+"""
+Tokenizer equivalence tests
+Checks that the single-pass tokenize_code produces exactly the tokens of
+the original character-by-character tokenizer
+"""
+
+import random
+
+from TapLang.data import get_spec
+from TapLang.parser import tokenize_code
+
+
+def reference_tokenize(code):
+    """Original quadratic tokenizer, kept as the reference implementation"""
+    tokens = []
+    current_token = ""
+    bracket_count = 0
+    in_escape = False
+
+    i = 0
+    while i < len(code):
+        char = code[i]
+
+        if not in_escape and code[i:].upper().startswith('ESCAPE_TYPE_START['):
+            in_escape = True
+            start = i
+            bracket_count = 0
+            j = i
+            while j < len(code):
+                if code[j] == '[':
+                    bracket_count += 1
+                elif code[j] == ']':
+                    bracket_count -= 1
+                    if bracket_count == 0:
+                        break
+                j += 1
+
+            tokens.append(code[start:j+1])
+            i = j + 1
+
+            while i < len(code) and code[i] == ' ':
+                i += 1
+
+            if i < len(code) and code[i:].upper().startswith('ESCAPE_TYPE_END['):
+                start = i
+                bracket_count = 0
+                j = i
+                while j < len(code):
+                    if code[j] == '[':
+                        bracket_count += 1
+                    elif code[j] == ']':
+                        bracket_count -= 1
+                        if bracket_count == 0:
+                            break
+                    j += 1
+                tokens.append(code[start:j+1])
+                i = j + 1
+                in_escape = False
+            continue
+
+        if char == '[':
+            bracket_count += 1
+            current_token += char
+        elif char == ']':
+            bracket_count -= 1
+            current_token += char
+        elif char == ' ' and bracket_count == 0:
+            if current_token.strip():
+                tokens.append(current_token.strip())
+            current_token = ""
+        else:
+            current_token += char
+
+        i += 1
+
+    if current_token.strip():
+        tokens.append(current_token.strip())
+
+    return [token for token in tokens if token]
+
+
+# Scripts collected from the spec, examples.py and the test scripts
+EXAMPLE_CORPUS = list(get_spec()['examples'].values()) + [
+    "TYPE[Hello World]",
+    "CLICK[H] CLICK[E] CLICK[L] CLICK[L] CLICK[O]",
+    "PRESS[CTRL] CLICK[C] RELEASE[CTRL]",
+    "FUNCTION[1] WAIT[1000] FUNCTION[12]",
+    "PRESS_LEFT[SHIFT] CLICK[A] RELEASE[SHIFT]",
+    "CLICK[!] CLICK[@] CLICK[#] CLICK[$]",
+    "TYPE[User] WAIT[500] CLICK[TAB] TYPE[Pass]",
+    "SET_WAIT[300] WAIT[] WAIT[] TYPE[Done]",
+    "SET_WAIT[RANDOM[100,500]] WAIT[] WAIT[] TYPE[Random]",
+    "TYPE[RANDOM[Hello,Hi,Hey]] WAIT[200] TYPE[RANDOM[World,Earth,Universe]]",
+    "CLICK[HOME] CLICK[END] CLICK[UP] CLICK[DOWN]",
+    "TYPE[`Hello FORMAT[RANDOM[Alice,Bob,Charlie]]`]",
+    "ESCAPE_TYPE_START[This has PRESS[X] keywords] ESCAPE_TYPE_END[~]",
+    "CLICK[HOME] PRESS[SHIFT] CLICK[END] RELEASE[SHIFT]",
+    "TYPE[`Text with ` backticks`]",
+    "TYPE[`FORMAT[RANDOM[]]`]",
+    "TYPE[`Number FORMAT[RANDOM[1,2,3]] and letter FORMAT[RANDOM[A,B,C]]`]",
+    "TYPE[```Hello World```]",
+    "TYPE[```FORMAT[RANDOM[Mr,Ms]] FORMAT[RANDOM[Smith,Jones]]```]",
+    "TYPE[````Text with ``` backticks````]",
+    "TYPE[```Email: user@domain.com and ID: FORMAT[RANDOM[123,456]]```]",
+    "TYPE[```FORMAT[WRONG```]",
+    "PRESS[A] PRESS[A]",
+    "escape_type_start[lower case] escape_type_end[~]",
+    "ESCAPE_TYPE_START[no end] CLICK[A]",
+    "CLICK[A]ESCAPE_TYPE_START[glued] CLICK[B]",
+    "TYPE[`inside ESCAPE_TYPE_START[x] ESCAPE_TYPE_END[~] text`]",
+    "\nSET_WAIT[RANDOM[100,300]]\nTYPE[Starting automation...]\nWAIT[]\n",
+    "CLICK[A]]] CLICK[[B] CLICK[C]",
+    "",
+    "   ",
+]
+
+
+def test_example_corpus():
+    for code in EXAMPLE_CORPUS:
+        assert tokenize_code(code) == reference_tokenize(code), code
+
+
+def test_random_fragments():
+    fragments = ['[', ']', ' ', '  ', 'a', 'B', '`', '\t', '\n', 'CLICK[A]',
+                 'TYPE[', 'ESCAPE_TYPE_START[', 'escape_type_end[', 'ESCAPE_TYPE_END[']
+    rng = random.Random(0)
+    for _ in range(20000):
+        code = ''.join(rng.choice(fragments) for _ in range(rng.randint(0, 12)))
+        assert tokenize_code(code) == reference_tokenize(code), repr(code)
+
+
+if __name__ == "__main__":
+    test_example_corpus()
+    print(f"✅ Example corpus: {len(EXAMPLE_CORPUS)} scripts tokenize identically")
+    test_random_fragments()
+    print("✅ Random fragments tokenize identically")
@@ -0,0 +1,50 @@
+"""
+Bulk validation tests
+"""
+
+import random
+
+from TapLang import parse_instruction, validate_instruction, validate_tokens
+from TapLang.parser import tokenize_code
+from test_tokenizer import EXAMPLE_CORPUS
+
+TOKENS = ['CLICK[a]', 'CLICK[]', 'click[zz]', 'FUNCTION[13]', 'function[1]', 'PRESS_LEFT[shift]',
+          'FOO[x]', 'TYPE[x]', 'TYPE[`ok`]', 'WAIT[-1]', 'SET_WAIT[RANDOM[5,1]]', 'CLICK[a',
+          '[A]', 'FUNCTION[]', 'release[ctrl]', 'CLICK[10]', 'Click[ENTER]', 'CLICK[[]]']
+
+
+def serial_errors(tokens):
+    errors = []
+    for index, token in enumerate(tokens):
+        try:
+            validate_instruction(parse_instruction(token))
+        except ValueError as e:
+            errors.append({'index': index, 'token': token, 'error': str(e)})
+    return errors
+
+
+def test_matches_serial_validation():
+    for code in EXAMPLE_CORPUS:
+        tokens = tokenize_code(code)
+        assert validate_tokens(tokens) == serial_errors(tokens), code
+    rng = random.Random(0)
+    for _ in range(200):
+        tokens = [rng.choice(TOKENS) for _ in range(20)]
+        assert validate_tokens(tokens) == serial_errors(tokens)
+
+
+def test_reports_every_error_with_position():
+    tokens = tokenize_code("CLICK[A] CLICK[NOPE] FUNCTION[13] TYPE[`ok`] PRESS[] WAIT[x]")
+    assert validate_tokens(tokens) == [
+        {'index': 1, 'token': 'CLICK[NOPE]', 'error': "Invalid key: NOPE"},
+        {'index': 2, 'token': 'FUNCTION[13]', 'error': "Invalid function key: F13. Must be 1-12"},
+        {'index': 4, 'token': 'PRESS[]', 'error': "PRESS requires a key parameter"},
+        {'index': 5, 'token': 'WAIT[x]', 'error': "WAIT requires positive integer: X"},
+    ]
+
+
+if __name__ == "__main__":
+    test_matches_serial_validation()
+    print("✅ Bulk validation matches per-instruction validation")
+    test_reports_every_error_with_position()
+    print("✅ Every error is reported with its token index")